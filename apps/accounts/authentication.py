@@ -0,0 +1,22 @@
+from django.utils.translation import gettext_lazy as _
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import InvalidToken
+from rest_framework_simplejwt.settings import api_settings
+
+from config import identity
+from .revocation import store
+
+
+class RevocableJWTAuthentication(JWTAuthentication):
+
+    def get_validated_token(self, raw_token):
+        token = super().get_validated_token(raw_token)
+        if store.is_revoked(token.get(api_settings.JTI_CLAIM)):
+            raise InvalidToken(_("Token has been revoked"))
+        return token
+
+    # el usuario autenticado entra en el mapa de identidad de la peticion
+    def get_user(self, validated_token):
+        user = super().get_user(validated_token)
+        identity.register([user])
+        return user
@@ -0,0 +1,44 @@
+import json
+import sys
+
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.accounts import provisioning
+
+
+class Command(BaseCommand):
+    help = "Create users and their profiles in bulk from a CSV or JSONL file, printing invite tokens."
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help="CSV (with header) or JSONL file; '-' reads stdin.")
+        parser.add_argument('--format', choices=['csv', 'jsonl'], help="Detected from the first line by default.")
+        parser.add_argument('--chunk-size', type=int, default=provisioning.CHUNK_SIZE)
+        parser.add_argument('--workers', type=int, default=0, help="Processes used to hash given passwords.")
+        parser.add_argument('--output', help="Write one JSON result per line here instead of stdout.")
+
+    def handle(self, *args, **options):
+        if options['chunk_size'] < 1:
+            raise CommandError("--chunk-size must be positive.")
+
+        try:
+            source = sys.stdin if options['path'] == '-' else open(options['path'], newline='', encoding='utf-8')
+        except OSError as error:
+            raise CommandError(str(error))
+        output = open(options['output'], 'w', encoding='utf-8') if options['output'] else self.stdout
+
+        try:
+            with provisioning.Provisioner(options['chunk_size'], options['workers']) as provisioner:
+                for result in provisioner.run(provisioning.iter_rows(source, options['format'])):
+                    output.write(json.dumps(result) + '\n')
+        finally:
+            if source is not sys.stdin:
+                source.close()
+            if output is not self.stdout:
+                output.close()
+
+        counts = provisioner.counts
+        message = f"Created {counts['created']}, already existing {counts['exists']}, invalid {counts['invalid']}."
+        if output is self.stdout:
+            self.stderr.write(message)
+        else:
+            self.stdout.write(self.style.SUCCESS(message))
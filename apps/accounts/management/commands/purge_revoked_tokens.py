@@ -0,0 +1,20 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from apps.accounts.revocation import store
+
+
+class Command(BaseCommand):
+    help = "Delete revoked tokens that have already expired."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--interval', type=float, help="Keep running and purge every N seconds.")
+
+    def handle(self, *args, **options):
+        while True:
+            deleted = store.purge()
+            self.stdout.write(self.style.SUCCESS(f"Purged {deleted} expired revoked tokens."))
+            if not options['interval']:
+                break
+            time.sleep(options['interval'])
@@ -1,3 +1,39 @@
+from django.conf import settings
 from django.db import models
 
-# Create your models here.
+
+class RevokedToken(models.Model):
+    jti = models.CharField(
+        max_length=255,
+        unique=True
+    )
+
+    token_type = models.CharField(
+        max_length=20
+    )
+
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        null=True,
+        blank=True,
+        related_name='revoked_tokens'
+    )
+
+    expires_at = models.DateTimeField(
+        db_index=True,
+        help_text="After this time the token is invalid anyway and the row can be purged."
+    )
+
+    revoked_date = models.DateTimeField(
+        auto_now_add=True,
+        db_index=True
+    )
+
+    class Meta:
+        verbose_name = 'Revoked Token'
+        verbose_name_plural = 'Revoked Tokens'
+        ordering = ['-revoked_date']
+
+    def __str__(self):
+        return f"{self.token_type} {self.jti}"
@@ -0,0 +1,235 @@
+import csv
+import json
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+
+from django.conf import settings
+from django.contrib.auth.base_user import BaseUserManager
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.password_validation import validate_password
+from django.contrib.auth.tokens import default_token_generator
+from django.core.exceptions import ValidationError
+from django.core.validators import validate_email
+from django.db import IntegrityError, transaction
+from django.db.models import Q
+from django.utils.encoding import force_bytes
+from django.utils.http import urlsafe_base64_encode
+
+from apps.job_applications.matching import index as match_index
+from apps.users.models import User, EmployeeProfile, EmployerProfile
+
+CHUNK_SIZE = 1000
+
+# filas por peticion a /users/provision/; mas alla, el comando provision_users
+REQUEST_MAX_ROWS = getattr(settings, 'PROVISION_REQUEST_MAX_ROWS', 10000)
+
+ROLES = ('employee', 'employer')
+
+PROFILE_FIELDS = {
+    'employee': (EmployeeProfile, ['skills', 'github_url', 'linkedin_url']),
+    'employer': (EmployerProfile, ['company_name', 'company_website', 'company_description']),
+}
+
+
+def _init_worker():
+    import django
+    django.setup()
+
+
+def _chain(first, rest):
+    yield first
+    yield from rest
+
+
+# CSV con cabecera o una linea JSON por usuario; sin formato explicito se
+# decide por la primera linea
+def iter_rows(lines, input_format=None):
+    lines = iter(lines)
+    if input_format is None:
+        first = next(lines, '')
+        input_format = 'jsonl' if first.lstrip().startswith('{') else 'csv'
+        lines = _chain(first, lines)
+
+    if input_format == 'csv':
+        for row in csv.DictReader(lines):
+            yield row
+        return
+
+    for line in lines:
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            yield json.loads(line)
+        except ValueError:
+            yield {'_error': "Invalid JSON line."}
+
+
+def clean_row(row):
+    if not isinstance(row, dict):
+        raise ValidationError("Each row must be an object.")
+    if row.get('_error'):
+        raise ValidationError(row['_error'])
+
+    email = BaseUserManager.normalize_email((row.get('email') or '').strip())
+    validate_email(email)
+
+    role = (row.get('role') or 'employee').strip().lower()
+    if role not in ROLES:
+        raise ValidationError(f"Role must be one of {', '.join(ROLES)}.")
+
+    profile_model, fields = PROFILE_FIELDS[role]
+    profile = {field: (row.get(field) or '').strip() for field in fields if row.get(field)}
+    if role == 'employer' and not profile.get('company_name'):
+        raise ValidationError("Employers need a company_name.")
+
+    cleaned = {
+        'email': email,
+        'username': email[:150],
+        'first_name': (row.get('first_name') or '').strip()[:150],
+        'last_name': (row.get('last_name') or '').strip()[:150],
+        'role': role,
+        'password': row.get('password') or None,
+        'profile': profile,
+    }
+    # las mismas reglas que accept-invite (AUTH_PASSWORD_VALIDATORS)
+    if cleaned['password']:
+        validate_password(cleaned['password'], User(
+            email=email, username=cleaned['username'], first_name=cleaned['first_name'], last_name=cleaned['last_name']
+        ))
+    return cleaned
+
+
+def invite_for(user):
+    return {
+        'uid': urlsafe_base64_encode(force_bytes(user.pk)),
+        'token': default_token_generator.make_token(user),
+    }
+
+
+# Alta masiva por lotes: un lote son dos o tres consultas (emails existentes,
+# usuarios, perfiles). Con workers (solo el comando, no las peticiones) las
+# contrasenas que vengan en la entrada se hashean en paralelo en un pool de
+# procesos; sin contrasena el usuario queda con una inutilizable y recibe un
+# token de invitacion para fijarla.
+class Provisioner:
+
+    def __init__(self, chunk_size=CHUNK_SIZE, workers=0):
+        self.chunk_size = chunk_size
+        self.pool = ProcessPoolExecutor(max_workers=workers, initializer=_init_worker) if workers else None
+        self.counts = {'created': 0, 'exists': 0, 'invalid': 0}
+
+    def close(self):
+        if self.pool is not None:
+            self.pool.shutdown()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def _hash(self, passwords):
+        if self.pool is None:
+            return [make_password(password) for password in passwords]
+        return list(self.pool.map(make_password, passwords, chunksize=max(1, len(passwords) // 32)))
+
+    def run(self, rows):
+        rows = iter(rows)
+        line = 0
+        while True:
+            chunk = list(islice(rows, self.chunk_size))
+            if not chunk:
+                break
+            yield from self.provision_chunk(chunk, start=line + 1)
+            line += len(chunk)
+        # bulk_create no dispara post_save: el indice de matching se rehace
+        # entero en la siguiente consulta
+        if self.counts['created']:
+            match_index.invalidate()
+
+    def _insert(self, users, pending):
+        with transaction.atomic():
+            User.objects.bulk_create(users, batch_size=self.chunk_size)
+            for role, (profile_model, fields) in PROFILE_FIELDS.items():
+                profile_model.objects.bulk_create(
+                    [
+                        profile_model(user=user, **cleaned['profile'])
+                        for user, (line, cleaned) in zip(users, pending)
+                        if cleaned['role'] == role
+                    ],
+                    batch_size=self.chunk_size
+                )
+
+    def provision_chunk(self, rows, start=1):
+        results = []
+        valid = {}
+        for line, row in enumerate(rows, start=start):
+            try:
+                cleaned = clean_row(row)
+            except ValidationError as error:
+                results.append({
+                    'line': line,
+                    'email': row.get('email') if isinstance(row, dict) else None,
+                    'status': 'invalid',
+                    'error': ' '.join(error.messages)
+                })
+                continue
+            if cleaned['email'] in valid:
+                results.append({'line': line, 'email': cleaned['email'], 'status': 'invalid', 'error': "Duplicated in input."})
+                continue
+            valid[cleaned['email']] = (line, cleaned)
+
+        existing = set()
+        for email, username in User.objects.filter(
+            Q(email__in=valid.keys()) | Q(username__in=[cleaned['username'] for line, cleaned in valid.values()])
+        ).values_list('email', 'username'):
+            existing.update((email, username))
+        pending = []
+        for email, (line, cleaned) in valid.items():
+            if email in existing or cleaned['username'] in existing:
+                results.append({'line': line, 'email': email, 'status': 'exists'})
+            else:
+                pending.append((line, cleaned))
+
+        # el hash se calcula antes de abrir la transaccion
+        with_password = [index for index, (line, cleaned) in enumerate(pending) if cleaned['password']]
+        hashes = dict(zip(with_password, self._hash([pending[index][1]['password'] for index in with_password])))
+
+        users = [
+            User(
+                email=cleaned['email'],
+                username=cleaned['username'],
+                first_name=cleaned['first_name'],
+                last_name=cleaned['last_name'],
+                role=cleaned['role'],
+                password=hashes.get(index) or make_password(None),
+            )
+            for index, (line, cleaned) in enumerate(pending)
+        ]
+
+        try:
+            self._insert(users, pending)
+            created = list(zip(users, pending))
+        except IntegrityError:
+            # otro proceso registro alguno de estos emails entre la consulta y
+            # el insert: se repite el lote fila a fila
+            created = []
+            for user, (line, cleaned) in zip(users, pending):
+                try:
+                    self._insert([user], [(line, cleaned)])
+                except IntegrityError:
+                    results.append({'line': line, 'email': user.email, 'status': 'exists'})
+                else:
+                    created.append((user, (line, cleaned)))
+
+        for user, (line, cleaned) in created:
+            result = {'line': line, 'email': user.email, 'status': 'created', 'id': user.pk}
+            if not cleaned['password']:
+                result.update(invite_for(user))
+            results.append(result)
+
+        for result in results:
+            self.counts[result['status']] += 1
+        results.sort(key=lambda result: result['line'])
+        return results
@@ -0,0 +1,138 @@
+import hashlib
+import math
+import threading
+import time
+from datetime import datetime, timedelta, timezone as dt_timezone
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+from rest_framework_simplejwt.settings import api_settings
+
+from config.db_routers import use_primary
+from .models import RevokedToken
+
+# cada cuanto un proceso trae las revocaciones hechas por otros procesos
+SYNC_SECONDS = getattr(settings, 'REVOCATION_SYNC_SECONDS', 5)
+# margen hacia atras en cada sincronizacion, para filas confirmadas tarde
+SYNC_OVERLAP_SECONDS = 60
+# el filtro se rehace de cero para soltar los tokens ya expirados
+REBUILD_SECONDS = getattr(settings, 'REVOCATION_REBUILD_SECONDS', 3600)
+MIN_CAPACITY = 1024
+ERROR_RATE = 0.001
+
+
+class BloomFilter:
+
+    def __init__(self, capacity, error_rate=ERROR_RATE):
+        self.capacity = capacity
+        self.size = math.ceil(-capacity * math.log(error_rate) / math.log(2) ** 2)
+        self.hashes = max(1, round(self.size / capacity * math.log(2)))
+        self.bits = bytearray((self.size + 7) // 8)
+        self.count = 0
+
+    def _positions(self, key):
+        digest = hashlib.blake2b(key.encode(), digest_size=16).digest()
+        first = int.from_bytes(digest[:8], 'little')
+        second = int.from_bytes(digest[8:], 'little') | 1
+        for i in range(self.hashes):
+            yield (first + i * second) % self.size
+
+    def add(self, key):
+        for position in self._positions(key):
+            self.bits[position >> 3] |= 1 << (position & 7)
+        self.count += 1
+
+    def __contains__(self, key):
+        return all(self.bits[position >> 3] & (1 << (position & 7)) for position in self._positions(key))
+
+
+# Lista de jti revocados delante de la tabla RevokedToken. Un token que no esta
+# en el filtro no esta revocado (cero consultas); si esta, se confirma contra
+# la tabla, porque el filtro admite falsos positivos.
+class RevocationStore:
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._bloom = None
+        self._synced_date = None
+        self._synced_at = 0
+        self._built_at = 0
+
+    def invalidate(self):
+        self._bloom = None
+
+    def _rebuild(self):
+        now = timezone.now()
+        with use_primary():
+            jtis = list(RevokedToken.objects.filter(expires_at__gt=now).values_list('jti', flat=True))
+        bloom = BloomFilter(max(MIN_CAPACITY, len(jtis) * 2))
+        for jti in jtis:
+            bloom.add(jti)
+        self._bloom = bloom
+        self._synced_date = now
+        self._synced_at = self._built_at = time.monotonic()
+
+    def _sync(self):
+        now = timezone.now()
+        with use_primary():
+            jtis = RevokedToken.objects.filter(
+                revoked_date__gte=self._synced_date - timedelta(seconds=SYNC_OVERLAP_SECONDS)
+            ).values_list('jti', flat=True)
+            for jti in jtis:
+                self._bloom.add(jti)
+        self._synced_date = now
+        self._synced_at = time.monotonic()
+
+    def _ensure(self):
+        elapsed = time.monotonic()
+        if self._bloom is not None and elapsed - self._synced_at < SYNC_SECONDS:
+            return
+        with self._lock:
+            if (
+                self._bloom is None
+                or elapsed - self._built_at > REBUILD_SECONDS
+                or self._bloom.count > self._bloom.capacity
+            ):
+                self._rebuild()
+            elif elapsed - self._synced_at >= SYNC_SECONDS:
+                self._sync()
+
+    def is_revoked(self, jti):
+        if not jti:
+            return False
+        self._ensure()
+        if jti not in self._bloom:
+            return False
+        with use_primary():
+            return RevokedToken.objects.filter(jti=jti).exists()
+
+    # devuelve False si el token ya estaba revocado: con rotacion, un refresh
+    # solo puede canjearse una vez aunque lleguen dos peticiones a la vez
+    def revoke(self, token):
+        jti = token.get(api_settings.JTI_CLAIM)
+        if not jti:
+            return False
+        try:
+            with transaction.atomic():
+                RevokedToken.objects.create(
+                    jti=jti,
+                    token_type=token.token_type,
+                    user_id=token.get(api_settings.USER_ID_CLAIM),
+                    expires_at=datetime.fromtimestamp(token['exp'], tz=dt_timezone.utc)
+                )
+        except IntegrityError:
+            return False
+        with self._lock:
+            if self._bloom is not None:
+                self._bloom.add(jti)
+        return True
+
+    def purge(self):
+        deleted, _ = RevokedToken.objects.filter(expires_at__lte=timezone.now()).delete()
+        if deleted:
+            self.invalidate()
+        return deleted
+
+
+store = RevocationStore()
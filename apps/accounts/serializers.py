@@ -0,0 +1,21 @@
+from django.utils.translation import gettext_lazy as _
+from rest_framework_simplejwt.exceptions import InvalidToken
+from rest_framework_simplejwt.serializers import TokenRefreshSerializer
+from rest_framework_simplejwt.settings import api_settings
+
+from .revocation import store
+
+
+# simplejwt solo pone en la lista negra con su app token_blacklist; aqui el
+# refresh rotado se revoca en RevokedToken antes de emitir el nuevo
+class RevocableTokenRefreshSerializer(TokenRefreshSerializer):
+
+    def validate(self, attrs):
+        refresh = self.token_class(attrs["refresh"])
+        if api_settings.ROTATE_REFRESH_TOKENS and api_settings.BLACKLIST_AFTER_ROTATION:
+            revoked = not store.revoke(refresh)
+        else:
+            revoked = store.is_revoked(refresh.get(api_settings.JTI_CLAIM))
+        if revoked:
+            raise InvalidToken(_("Token has been revoked"))
+        return super().validate(attrs)
@@ -1,3 +1,130 @@
-from django.test import TestCase
+import json
+import threading
+from unittest import mock
 
-# Create your tests here.
+from django.db import IntegrityError, connections
+from django.test import TestCase, TransactionTestCase
+from rest_framework.test import APIClient
+
+from apps.users.models import EmployerProfile, User
+from . import provisioning
+
+
+def registration(email, **fields):
+    return {
+        'first_name': 'Jane', 'last_name': 'Doe', 'email': email, 'password': 'abc12345', 'password2': 'abc12345',
+        'birth_date': '1990-01-01', 'phone_number': '123', **fields
+    }
+
+
+# estas pruebas son del registro, no del limite por IP de /register/
+def without_throttling(test):
+    patcher = mock.patch('config.throttling.rate_for', return_value=None)
+    patcher.start()
+    test.addCleanup(patcher.stop)
+
+
+class RegistrationTests(TestCase):
+
+    def setUp(self):
+        without_throttling(self)
+        self.client = APIClient()
+
+    def test_duplicate_email_is_reported_on_email(self):
+        self.assertEqual(self.client.post('/users/register/', registration('jane@example.com'), format='json').status_code, 201)
+        response = self.client.post('/users/register/', registration('jane@EXAMPLE.com'), format='json')
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.data['details'], {'email': ["Email already registered."]})
+
+    def test_long_emails_with_the_same_username_both_register(self):
+        prefix = 'a' * 150
+        for email in [f'{prefix}1@example.com', f'{prefix}2@example.com']:
+            response = self.client.post('/users/register/', registration(email), format='json')
+            self.assertEqual(response.status_code, 201, response.data)
+        usernames = User.objects.filter(email__startswith=prefix).values_list('username', flat=True)
+        self.assertEqual(len(set(usernames)), 2)
+
+    def test_profile_error_is_not_reported_as_duplicate_email(self):
+        data = {'user': registration('boss@example.com'), 'company_name': 'ACME'}
+        with mock.patch.object(EmployerProfile.objects, 'create', side_effect=IntegrityError("NOT NULL constraint failed")):
+            with self.assertRaises(IntegrityError):
+                self.client.post('/employers/register/', data, format='json')
+        self.assertFalse(User.objects.filter(email='boss@example.com').exists())
+
+
+class RegistrationLoadTests(TransactionTestCase):
+
+    def setUp(self):
+        without_throttling(self)
+
+    def register_concurrently(self, emails):
+        barrier = threading.Barrier(len(emails))
+        responses = [None] * len(emails)
+
+        def run(index, email):
+            try:
+                barrier.wait()
+                responses[index] = APIClient().post('/users/register/', registration(email), format='json')
+            finally:
+                connections.close_all()
+
+        threads = [threading.Thread(target=run, args=(index, email)) for index, email in enumerate(emails)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return responses
+
+    def test_parallel_signups_with_the_same_email(self):
+        responses = self.register_concurrently(['jane@example.com'] * 8)
+
+        self.assertEqual(sorted(response.status_code for response in responses), [201] + [400] * 7)
+        for response in responses:
+            if response.status_code == 400:
+                self.assertEqual(response.data['details'], {'email': ["Email already registered."]})
+        self.assertEqual(User.objects.count(), 1)
+
+    def test_parallel_signups_with_different_emails(self):
+        responses = self.register_concurrently([f'user{index}@example.com' for index in range(8)])
+
+        self.assertEqual([response.status_code for response in responses], [201] * 8)
+        self.assertEqual(User.objects.count(), 8)
+
+
+class ProvisionTests(TestCase):
+    rows = (
+        "email,role,first_name,last_name,company_name,password\n"
+        "ann@example.com,employee,Ann,Lee,,\n"
+        "bob@example.com,employer,Bob,Ray,Acme,S3cret-pass-99\n"
+        "eve@example.com,employee,Eve,Doe,,password\n"
+    )
+
+    def setUp(self):
+        self.admin = User.objects.create_superuser(
+            email='admin@example.com', username='admin', password='S3cret-pass-99', first_name='Ad', last_name='Min'
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(self.admin)
+
+    def provision(self, query=''):
+        return self.client.generic('POST', f'/users/provision/{query}', self.rows, content_type='text/csv')
+
+    def test_rows_are_inserted_before_the_response(self):
+        with mock.patch.object(provisioning, 'ProcessPoolExecutor') as pool:
+            response = self.provision('?workers=4')
+        pool.assert_not_called()
+
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(response.streaming)
+        results = [json.loads(line) for line in response.content.decode().splitlines()]
+        self.assertEqual(results[-1], {'summary': {'created': 2, 'exists': 0, 'invalid': 1}})
+        self.assertEqual([result['status'] for result in results[:-1]], ['created', 'created', 'invalid'])
+        self.assertIn('too common', results[2]['error'])
+        self.assertTrue(User.objects.get(email='bob@example.com').check_password('S3cret-pass-99'))
+        self.assertFalse(User.objects.filter(email='eve@example.com').exists())
+
+    def test_large_files_go_to_the_command(self):
+        with mock.patch.object(provisioning, 'REQUEST_MAX_ROWS', 2):
+            response = self.provision()
+        self.assertEqual(response.status_code, 413)
+        self.assertEqual(User.objects.count(), 1)
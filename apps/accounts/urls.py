@@ -1,5 +1,5 @@
 from django.urls import path, include
-from .views import UserViewSet, EmployerViewSet, EmployeeViewSet
+from .views import UserViewSet, EmployerViewSet, EmployeeViewSet, userLogOut
 from rest_framework.routers import DefaultRouter
 
 router = DefaultRouter()
@@ -8,5 +8,6 @@ router.register(r'employers', EmployerViewSet, basename='employer')
 router.register(r'employees', EmployeeViewSet, basename='employee')
 
 urlpatterns = [
+    path("logout/", userLogOut.as_view(), name="logout"),
     path("", include(router.urls)),
 ]
\ No newline at end of file
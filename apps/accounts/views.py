@@ -1,16 +1,61 @@
-from contextvars import Token
+import codecs
+import json
+from itertools import islice
+
+from django.contrib.auth.password_validation import validate_password
+from django.contrib.auth.tokens import default_token_generator
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.http import HttpResponse
+from django.utils.encoding import force_str
+from django.utils.http import urlsafe_base64_decode
 from rest_framework.response import Response
 from apps.users.models import User, EmployerProfile, EmployeeProfile
-from apps.users.serializers import UserSerializer, EmployerProfileSerializer, EmployeeProfileSerializer
+from apps.users.serializers import (
+    UserSerializer,
+    EmployerProfileSerializer,
+    EmployeeProfileSerializer,
+    EmployerRegistrationSerializer,
+    EmployeeRegistrationSerializer
+)
 from django.contrib.auth import authenticate
 from rest_framework import viewsets, status
-from rest_framework_simplejwt.tokens import RefreshToken
+from rest_framework.exceptions import ValidationError
+from rest_framework_simplejwt.exceptions import TokenError
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.tokens import RefreshToken, Token
 from rest_framework.decorators import action
 from rest_framework.views import APIView
-from rest_framework.permissions import IsAuthenticated
+from rest_framework.permissions import IsAuthenticated, IsAdminUser
+from config.fieldsets import SparseFieldsetMixin
+from . import provisioning
+from .revocation import store as revocation_store
 
 
-class UserViewSet(viewsets.ModelViewSet):
+# valida, guarda (el serializer ya maneja el set_password) y genera los tokens
+def register_response(serializer):
+    if not serializer.is_valid():
+        return Response(
+            {"error": "register failed", "details": serializer.errors},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+
+    try:
+        user = serializer.save()
+    except ValidationError as error:
+        return Response(
+            {"error": "register failed", "details": error.detail},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+
+    refresh = RefreshToken.for_user(user)  # genera un token nuevo
+    return Response({
+        "refresh": str(refresh),
+        "access": str(refresh.access_token),
+        "user": UserSerializer(user).data
+    }, status=status.HTTP_201_CREATED)
+
+
+class UserViewSet(SparseFieldsetMixin, viewsets.ModelViewSet):
     queryset = User.objects.all()
     serializer_class = UserSerializer
 
@@ -52,37 +97,99 @@ class UserViewSet(viewsets.ModelViewSet):
 
     @action(detail=False, methods=["POST"])
     def register(self, request):
-        serializer = UserSerializer(data=request.data)
-
-        if serializer.is_valid():
-            user = serializer.save()  # El serializer ya maneja el set_password
+        return register_response(UserSerializer(data=request.data))
+
+    # alta masiva: un fichero "file" (multipart) o el CSV/JSONL como cuerpo;
+    # responde una linea JSON por fila. Las filas se insertan dentro de la
+    # peticion, con su enrutado al primario; para ficheros de mas de
+    # PROVISION_REQUEST_MAX_ROWS filas esta manage.py provision_users
+    @action(detail=False, methods=["POST"], permission_classes=[IsAdminUser])
+    def provision(self, request):
+        input_format = request.query_params.get("format")
+        if input_format not in (None, "csv", "jsonl"):
+            return Response({"error": "format must be csv or jsonl"}, status=status.HTTP_400_BAD_REQUEST)
+
+        if request.content_type.startswith("multipart/"):
+            upload = request.FILES.get("file")
+            if upload is None:
+                return Response({"error": "file is required"}, status=status.HTTP_400_BAD_REQUEST)
+            stream = upload
+        else:
+            stream = request.stream
+            if stream is None:
+                return Response({"error": "empty body"}, status=status.HTTP_400_BAD_REQUEST)
+        if input_format is None and "json" in request.content_type:
+            input_format = "jsonl"
+
+        max_rows = provisioning.REQUEST_MAX_ROWS
+        try:
+            rows = list(islice(provisioning.iter_rows(codecs.iterdecode(stream, "utf-8"), input_format), max_rows + 1))
+        except UnicodeDecodeError:
+            return Response({"error": "the file must be UTF-8"}, status=status.HTTP_400_BAD_REQUEST)
+        if len(rows) > max_rows:
+            return Response(
+                {"error": f"at most {max_rows} rows per request; use manage.py provision_users for larger files"},
+                status=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE
+            )
 
-            refresh = RefreshToken.for_user(user)  # genera un token nuevo
+        provisioner = provisioning.Provisioner()
+        results = [json.dumps(result) for result in provisioner.run(rows)]
+        results.append(json.dumps({"summary": provisioner.counts}))
+        return HttpResponse("\n".join(results) + "\n", content_type="application/x-ndjson")
 
-            return Response({
-                "refresh": str(refresh),
-                "access": str(refresh.access_token),
-                "user": UserSerializer(user).data
-            }, status=status.HTTP_201_CREATED)
+    # el usuario provisionado fija su contrasena con el uid y token de la invitacion
+    @action(detail=False, methods=["POST"], url_path="accept-invite", permission_classes=[])
+    def accept_invite(self, request):
+        uid = request.data.get("uid")
+        token = request.data.get("token")
+        password = request.data.get("password")
+        if not uid or not token or not password:
+            return Response({"error": "uid, token and password are required"}, status=status.HTTP_400_BAD_REQUEST)
+
+        try:
+            user = User.objects.get(pk=force_str(urlsafe_base64_decode(uid)))
+        except (ValueError, TypeError, OverflowError, User.DoesNotExist):
+            user = None
+        if user is None or not default_token_generator.check_token(user, token):
+            return Response({"error": "invalid or expired invite"}, status=status.HTTP_400_BAD_REQUEST)
+
+        try:
+            validate_password(password, user)
+        except DjangoValidationError as error:
+            return Response({"password": error.messages}, status=status.HTTP_400_BAD_REQUEST)
+        user.set_password(password)
+        user.save(update_fields=["password"])
 
-        return Response(
-            {"error": "register failed", "details": serializer.errors},
-            status=status.HTTP_400_BAD_REQUEST
-        )
+        refresh = RefreshToken.for_user(user)
+        return Response({
+            "refresh": str(refresh),
+            "access": str(refresh.access_token),
+            "user": UserSerializer(user).data
+        })
 
 
+# revoca el access token de la peticion y, si se envia, el refresh token
 class userLogOut(APIView):
     permission_classes = [IsAuthenticated]
-    
+
     def post(self, request):
-        print(request.headers)
-        token_key = request.auth.key
-        token = Token.objects.get(key=token_key)
-        token.delete()
+        refresh = None
+        if request.data.get("refresh"):
+            try:
+                refresh = RefreshToken(request.data["refresh"])
+            except TokenError as error:
+                return Response({"refresh": [str(error)]}, status=status.HTTP_400_BAD_REQUEST)
+            if str(refresh.get(api_settings.USER_ID_CLAIM)) != str(request.user.pk):
+                return Response({"refresh": ["Token does not belong to this user."]}, status=status.HTTP_400_BAD_REQUEST)
+
+        if isinstance(request.auth, Token):
+            revocation_store.revoke(request.auth)
+        if refresh is not None:
+            revocation_store.revoke(refresh)
 
         return Response({'detail': 'Successfully logged out.'})
 
-class EmployerViewSet(viewsets.ModelViewSet):
+class EmployerViewSet(SparseFieldsetMixin, viewsets.ModelViewSet):
     queryset = EmployerProfile.objects.all()
     serializer_class = EmployerProfileSerializer
 
@@ -92,27 +199,12 @@ class EmployerViewSet(viewsets.ModelViewSet):
 
         return super().get_serializer_class()
 
+    # crea usuario y perfil juntos: {"user": {...}, <campos del perfil>}
     @action(detail=False, methods=["POST"])
     def register(self, request):
-        serializer = EmployerProfileSerializer(data=request.data)
-
-        if serializer.is_valid():
-            user = serializer.save()  # El serializer ya maneja el set_password
-
-            refresh = RefreshToken.for_user(user)  # genera un token nuevo
-
-            return Response({
-                "refresh": str(refresh),
-                "access": str(refresh.access_token),
-                "user": UserSerializer(user).data
-            }, status=status.HTTP_201_CREATED)
-
-        return Response(
-            {"error": "register failed", "details": serializer.errors},
-            status=status.HTTP_400_BAD_REQUEST
-        )
+        return register_response(EmployerRegistrationSerializer(data=request.data))
 
-class EmployeeViewSet(viewsets.ModelViewSet):
+class EmployeeViewSet(SparseFieldsetMixin, viewsets.ModelViewSet):
     queryset = EmployeeProfile.objects.all()
     serializer_class = EmployeeProfileSerializer
 
@@ -122,22 +214,7 @@ class EmployeeViewSet(viewsets.ModelViewSet):
 
         return super().get_serializer_class()
 
+    # crea usuario y perfil juntos: {"user": {...}, <campos del perfil>}
     @action(detail=False, methods=["POST"])
     def register(self, request):
-        serializer = EmployeeProfileSerializer(data=request.data)
-
-        if serializer.is_valid():
-            user = serializer.save()  # El serializer ya maneja el set_password
-
-            refresh = RefreshToken.for_user(user)  # genera un token nuevo
-
-            return Response({
-                "refresh": str(refresh),
-                "access": str(refresh.access_token),
-                "user": UserSerializer(user).data
-            }, status=status.HTTP_201_CREATED)
-
-        return Response(
-            {"error": "register failed", "details": serializer.errors},
-            status=status.HTTP_400_BAD_REQUEST
-        )
\ No newline at end of file
+        return register_response(EmployeeRegistrationSerializer(data=request.data))
\ No newline at end of file
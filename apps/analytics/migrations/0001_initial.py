@@ -0,0 +1,40 @@
+# Generated by Django 5.2.4 on 2026-10-19 16:31
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        ('job_applications', '0008_alter_vacancy_closing_date_and_more'),
+        ('users', '0002_alter_user_birth_date'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='VacancyDailyStats',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('applications', models.PositiveIntegerField(default=0, help_text='Applications received that day.')),
+                ('reviewing', models.PositiveIntegerField(default=0, help_text='Applications that reached review that day.')),
+                ('interviews', models.PositiveIntegerField(default=0, help_text='Applications that reached the interview stage that day.')),
+                ('accepted', models.PositiveIntegerField(default=0)),
+                ('rejected', models.PositiveIntegerField(default=0)),
+                ('withdrawn', models.PositiveIntegerField(default=0)),
+                ('time_to_hire_seconds', models.BigIntegerField(default=0, help_text='Sum of apply-to-accept durations for the hires of that day.')),
+                ('employer', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='daily_stats', to='users.employerprofile')),
+                ('vacancy', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='daily_stats', to='job_applications.vacancy')),
+            ],
+            options={
+                'verbose_name': 'Vacancy Daily Stats',
+                'verbose_name_plural': 'Vacancy Daily Stats',
+                'ordering': ['date'],
+                'indexes': [models.Index(fields=['employer', 'date'], name='analytics_v_employe_848fbd_idx')],
+                'unique_together': {('vacancy', 'date')},
+            },
+        ),
+    ]
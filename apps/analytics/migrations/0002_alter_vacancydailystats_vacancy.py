@@ -0,0 +1,20 @@
+# Generated by Django 5.2.4 on 2026-10-19 16:56
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('analytics', '0001_initial'),
+        ('job_applications', '0014_archive'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='vacancydailystats',
+            name='vacancy',
+            field=models.ForeignKey(db_constraint=False, on_delete=django.db.models.deletion.DO_NOTHING, related_name='daily_stats', to='job_applications.vacancy'),
+        ),
+    ]
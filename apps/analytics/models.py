@@ -0,0 +1,61 @@
+from django.db import models
+from apps.users.models import EmployerProfile
+from apps.job_applications.models import Vacancy
+
+
+class VacancyDailyStats(models.Model):
+    # sin cascada: las metricas sobreviven al archivado de la vacante; un
+    # borrado real las elimina en receivers.vacancy_deleted
+    vacancy = models.ForeignKey(
+        Vacancy,
+        on_delete=models.DO_NOTHING,
+        related_name='daily_stats',
+        db_constraint=False
+    )
+
+    # denormalizado para poder agregar por empleador sin join
+    employer = models.ForeignKey(
+        EmployerProfile,
+        on_delete=models.CASCADE,
+        related_name='daily_stats'
+    )
+
+    date = models.DateField()
+
+    applications = models.PositiveIntegerField(
+        default=0,
+        help_text="Applications received that day."
+    )
+
+    reviewing = models.PositiveIntegerField(
+        default=0,
+        help_text="Applications that reached review that day."
+    )
+
+    interviews = models.PositiveIntegerField(
+        default=0,
+        help_text="Applications that reached the interview stage that day."
+    )
+
+    accepted = models.PositiveIntegerField(default=0)
+
+    rejected = models.PositiveIntegerField(default=0)
+
+    withdrawn = models.PositiveIntegerField(default=0)
+
+    time_to_hire_seconds = models.BigIntegerField(
+        default=0,
+        help_text="Sum of apply-to-accept durations for the hires of that day."
+    )
+
+    class Meta:
+        verbose_name = 'Vacancy Daily Stats'
+        verbose_name_plural = 'Vacancy Daily Stats'
+        ordering = ['date']
+        unique_together = ['vacancy', 'date']
+        indexes = [
+            models.Index(fields=['employer', 'date']),
+        ]
+
+    def __str__(self):
+        return f"{self.vacancy_id} - {self.date}"
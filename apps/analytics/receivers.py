@@ -0,0 +1,13 @@
+from django.db.models.signals import pre_delete
+from django.dispatch import receiver
+
+from apps.job_applications.archive import is_archiving
+from apps.job_applications.models import Vacancy
+from .models import VacancyDailyStats
+
+
+# las metricas de una vacante archivada se conservan; las de una borrada no
+@receiver(pre_delete, sender=Vacancy)
+def vacancy_deleted(sender, instance, **kwargs):
+    if not is_archiving():
+        VacancyDailyStats.objects.filter(vacancy_id=instance.pk).delete()
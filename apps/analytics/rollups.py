@@ -0,0 +1,156 @@
+from collections import defaultdict
+
+from django.db.models import F
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from apps.job_applications.models import Vacancy
+from .models import VacancyDailyStats
+
+COUNTER_FIELDS = [
+    'applications',
+    'reviewing',
+    'interviews',
+    'accepted',
+    'rejected',
+    'withdrawn',
+    'time_to_hire_seconds',
+]
+
+# posicion de cada estado dentro del embudo pending -> reviewing -> interview -> accepted
+STAGE_RANK = {
+    'pending': 0,
+    'reviewing': 1,
+    'interview_scheduled': 2,
+    'interview_completed': 2,
+    'accepted': 3,
+}
+
+STAGE_COLUMNS = ['reviewing', 'interviews', 'accepted']
+
+EXIT_COLUMNS = {
+    'rejected': 'rejected',
+    'withdrawn': 'withdrawn',
+}
+
+
+# los payloads del outbox llegan con las fechas serializadas en ISO 8601
+def _as_datetime(value):
+    if isinstance(value, str):
+        return parse_datetime(value)
+    return value
+
+
+def _local_date(value):
+    if timezone.is_aware(value):
+        value = timezone.localtime(value)
+    return value.date()
+
+
+def status_increments(previous_status, new_status, applied_date=None, changed_date=None):
+    increments = {}
+
+    if new_status in EXIT_COLUMNS:
+        increments[EXIT_COLUMNS[new_status]] = 1
+        return increments
+
+    previous_rank = STAGE_RANK.get(previous_status, 0)
+    new_rank = STAGE_RANK.get(new_status, 0)
+
+    # si se salta una etapa (pending -> interview) cuenta como alcanzada igualmente
+    for rank in range(previous_rank + 1, new_rank + 1):
+        increments[STAGE_COLUMNS[rank - 1]] = 1
+
+    if new_status == 'accepted' and 'accepted' in increments and applied_date and changed_date:
+        increments['time_to_hire_seconds'] = int((changed_date - applied_date).total_seconds())
+
+    return increments
+
+
+def apply_increments(vacancy_id, employer_id, date, increments):
+    increments = {field: value for field, value in increments.items() if value}
+    if not increments:
+        return
+
+    stats, created = VacancyDailyStats.objects.get_or_create(
+        vacancy_id=vacancy_id,
+        date=date,
+        defaults={'employer_id': employer_id}
+    )
+    VacancyDailyStats.objects.filter(pk=stats.pk).update(
+        **{field: F(field) + value for field, value in increments.items()}
+    )
+
+
+def _employers_for(vacancy_ids):
+    return dict(
+        Vacancy.objects.filter(pk__in=vacancy_ids).order_by().values_list('id', 'employer_id')
+    )
+
+
+def _apply_grouped(grouped, employers):
+    missing = {vacancy_id for vacancy_id, date in grouped if vacancy_id not in employers}
+    if missing:
+        employers.update(_employers_for(missing))
+
+    for (vacancy_id, date), increments in grouped.items():
+        # la vacante pudo borrarse antes de que el evento se procesara
+        if vacancy_id in employers:
+            apply_increments(vacancy_id, employers[vacancy_id], date, increments)
+
+
+# Cada postulacion es un dict con vacancy_id y applied_date. Se emite un UPDATE
+# por (vacante, dia) en lugar de uno por fila.
+def record_applications(applications):
+    grouped = defaultdict(lambda: defaultdict(int))
+
+    for application in applications:
+        key = (application['vacancy_id'], _local_date(_as_datetime(application['applied_date'])))
+        grouped[key]['applications'] += 1
+
+    _apply_grouped(grouped, {})
+
+
+# Cada cambio es un dict con vacancy_id, previous_status, new_status,
+# applied_date, changed_date y opcionalmente employer_id.
+def record_status_changes(changes):
+    grouped = defaultdict(lambda: defaultdict(int))
+    employers = {}
+
+    for change in changes:
+        changed_date = _as_datetime(change['changed_date'])
+        key = (change['vacancy_id'], _local_date(changed_date))
+        if change.get('employer_id'):
+            employers[change['vacancy_id']] = change['employer_id']
+        increments = status_increments(
+            change['previous_status'],
+            change['new_status'],
+            _as_datetime(change.get('applied_date')),
+            changed_date
+        )
+        for field, value in increments.items():
+            grouped[key][field] += value
+
+    _apply_grouped(grouped, employers)
+
+
+def funnel(totals):
+    def rate(numerator, denominator):
+        return round(numerator / denominator, 4) if denominator else None
+
+    applications = totals.get('applications') or 0
+    reviewing = totals.get('reviewing') or 0
+    interviews = totals.get('interviews') or 0
+    accepted = totals.get('accepted') or 0
+    time_to_hire = totals.get('time_to_hire_seconds') or 0
+
+    return {
+        **{field: totals.get(field) or 0 for field in COUNTER_FIELDS if field != 'time_to_hire_seconds'},
+        'conversion': {
+            'pending_to_reviewing': rate(reviewing, applications),
+            'reviewing_to_interview': rate(interviews, reviewing),
+            'interview_to_accepted': rate(accepted, interviews),
+            'overall': rate(accepted, applications),
+        },
+        'avg_time_to_hire_days': round(time_to_hire / accepted / 86400, 2) if accepted else None,
+    }
@@ -0,0 +1,12 @@
+from apps.outbox.publisher import subscriber
+from . import rollups
+
+
+@subscriber('application.created')
+def applications_created(payloads):
+    rollups.record_applications(payloads)
+
+
+@subscriber('application.status_changed')
+def statuses_changed(payloads):
+    rollups.record_status_changes(payloads)
@@ -0,0 +1,45 @@
+from io import StringIO
+
+from django.core.management import call_command
+from django.db.models import Sum
+from django.test import TestCase
+
+from apps.job_applications.tests import all_applications, client_for, create_employee, create_employer, create_vacancy
+from apps.outbox import worker
+from .models import VacancyDailyStats
+
+
+class BackfillTests(TestCase):
+    databases = '__all__'
+
+    def setUp(self):
+        self.employer = create_employer('acme')
+        self.vacancy = create_vacancy(self.employer)
+        for index in range(3):
+            employee = create_employee(f'candidate{index}')
+            response = client_for(employee.user).post('/applications/', {'vacancy': self.vacancy.pk}, format='json')
+            self.assertEqual(response.status_code, 201, response.content)
+        recruiter = client_for(self.employer.user)
+        for application in all_applications()[1:]:
+            recruiter.patch(f'/applications/{application.pk}/', {'status': 'reviewing'}, format='json')
+
+    def totals(self):
+        return VacancyDailyStats.objects.filter(vacancy=self.vacancy).aggregate(
+            applications=Sum('applications'), reviewing=Sum('reviewing')
+        )
+
+    def drain(self):
+        while worker.drain():
+            pass
+
+    def test_backfill_with_pending_events_does_not_double_count(self):
+        call_command('backfill_analytics', stdout=StringIO())
+        self.drain()
+        self.assertEqual(self.totals(), {'applications': 3, 'reviewing': 2})
+
+    def test_backfill_after_drain_matches_live_rollups(self):
+        self.drain()
+        self.assertEqual(self.totals(), {'applications': 3, 'reviewing': 2})
+        call_command('backfill_analytics', vacancy=self.vacancy.pk, stdout=StringIO())
+        self.drain()
+        self.assertEqual(self.totals(), {'applications': 3, 'reviewing': 2})
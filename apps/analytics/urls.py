@@ -0,0 +1,10 @@
+from django.urls import path, include
+from .views import FunnelViewSet
+from rest_framework.routers import DefaultRouter
+
+router = DefaultRouter()
+router.register(r'analytics/funnel', FunnelViewSet, basename='funnel')
+
+urlpatterns = [
+    path("", include(router.urls)),
+]
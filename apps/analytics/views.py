@@ -0,0 +1,48 @@
+from datetime import timedelta
+
+from django.db.models import Sum
+from django.utils import timezone
+from rest_framework import viewsets
+from rest_framework.response import Response
+
+from apps.job_applications.views import IsEmployer
+from .models import VacancyDailyStats
+from .rollups import COUNTER_FIELDS, funnel
+
+
+class FunnelViewSet(viewsets.ViewSet):
+    permission_classes = [IsEmployer]
+    lookup_value_regex = r'\d+'
+
+    def get_queryset(self):
+        return VacancyDailyStats.objects.filter(
+            employer=self.request.user.employer_profile
+        )
+
+    def _since(self):
+        try:
+            days = int(self.request.query_params.get('days', 30))
+        except ValueError:
+            days = 30
+        return timezone.localdate() - timedelta(days=max(days, 1) - 1)
+
+    # embudo agregado de todas las vacantes del empleador
+    def list(self, request):
+        totals = self.get_queryset().aggregate(
+            **{field: Sum(field) for field in COUNTER_FIELDS}
+        )
+        return Response(funnel(totals))
+
+    # embudo de una vacante con la serie diaria de postulaciones
+    def retrieve(self, request, pk=None):
+        queryset = self.get_queryset().filter(vacancy_id=pk)
+        totals = queryset.aggregate(
+            **{field: Sum(field) for field in COUNTER_FIELDS}
+        )
+        daily = queryset.filter(date__gte=self._since()).values('date', 'applications')
+
+        return Response({
+            'vacancy': int(pk),
+            **funnel(totals),
+            'daily': list(daily),
+        })
@@ -4,3 +4,10 @@ from django.apps import AppConfig
 class JobApplicationsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'apps.job_applications'
+
+    def ready(self):
+        from django.db.models.signals import post_migrate
+        from . import receivers  # noqa: F401
+        from .sharding import reserve_id_ranges
+
+        post_migrate.connect(reserve_id_ranges, sender=self)
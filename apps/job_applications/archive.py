@@ -0,0 +1,243 @@
+from collections import defaultdict
+from contextlib import contextmanager
+from contextvars import ContextVar
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, transaction
+from django.utils import timezone
+
+from . import sharding
+from .models import (
+    ApplicationDocument,
+    ApplicationStatusHistory,
+    ArchivedApplication,
+    ArchivedVacancy,
+    Interview,
+    JobApplication,
+    Vacancy
+)
+from .serializers import JobApplicationSerializer, VacancySerializer
+
+ARCHIVE_AFTER_DAYS = getattr(settings, 'ARCHIVE_AFTER_DAYS', 180)
+ARCHIVE_BATCH_SIZE = getattr(settings, 'ARCHIVE_BATCH_SIZE', 500)
+
+FINAL_STATUSES = ['rejected', 'accepted', 'withdrawn']
+
+# partes del snapshot que solo ve el empleador de la postulacion
+PRIVATE_FIELDS = ['notes']
+PRIVATE_CHILD_FIELDS = {
+    'status_history': ['reason', 'changed_by_id'],
+    'interviews': ['score', 'feedback'],
+}
+
+_archiving = ContextVar('archiving', default=False)
+
+
+# los receivers que reaccionan a borrados (metricas, indices) pueden
+# distinguir un archivado de un borrado real
+def is_archiving():
+    return _archiving.get()
+
+
+@contextmanager
+def archiving():
+    token = _archiving.set(True)
+    try:
+        yield
+    finally:
+        _archiving.reset(token)
+
+
+def _children(model, alias, application_ids, fields):
+    grouped = defaultdict(list)
+    for row in model.objects.using(alias).filter(
+        application_id__in=application_ids
+    ).order_by('pk').values('application_id', *fields):
+        grouped[row.pop('application_id')].append(row)
+    return grouped
+
+
+def public_snapshot(data):
+    data = {key: value for key, value in data.items() if key not in PRIVATE_FIELDS}
+    for key, fields in PRIVATE_CHILD_FIELDS.items():
+        if key in data:
+            data[key] = [{name: value for name, value in row.items() if name not in fields} for row in data[key]]
+    return data
+
+
+# Archiva un lote de postulaciones de un shard: copia la representacion de
+# detalle con su historial, entrevistas y documentos, y borra las filas.
+# release=False cuando la vacante se archiva tambien: su contador desaparece
+# con ella y no hace falta otra escritura en el primario.
+def archive_application_ids(alias, application_ids, release=True):
+    with sharding.atomic(alias), archiving():
+        applications = list(
+            sharding.with_related(
+                JobApplication.objects.using(alias).select_for_update(of=('self',)),
+                'employee__user',
+                'vacancy__employer'
+            ).filter(pk__in=application_ids)
+        )
+        if not applications:
+            return 0
+        ids = [application.pk for application in applications]
+
+        history = _children(
+            ApplicationStatusHistory, alias, ids,
+            ['previous_status', 'new_status', 'changed_by_id', 'changed_date', 'reason']
+        )
+        interviews = _children(
+            Interview, alias, ids,
+            ['interview_type', 'scheduled_date', 'duration_minutes', 'status', 'score', 'feedback']
+        )
+        documents = _children(
+            ApplicationDocument, alias, ids,
+            ['document', 'document_type', 'description', 'uploaded_date']
+        )
+
+        ArchivedApplication.objects.using(alias).bulk_create(
+            [
+                ArchivedApplication(
+                    id=application.pk,
+                    employee_id=application.employee_id,
+                    employer_id=application.employer_id,
+                    vacancy_id=application.vacancy_id,
+                    status=application.status,
+                    applied_date=application.applied_date,
+                    last_updated=application.last_updated,
+                    data={
+                        **JobApplicationSerializer(application).data,
+                        'notes': application.notes,
+                        'status_history': history[application.pk],
+                        'interviews': interviews[application.pk],
+                        'documents': documents[application.pk],
+                    }
+                )
+                for application in applications
+            ],
+            ignore_conflicts=True
+        )
+        JobApplication.objects.using(alias).filter(pk__in=ids).delete()
+
+        if not release:
+            return len(ids)
+        released = defaultdict(int)
+        for application in applications:
+            if application.status != 'withdrawn':
+                released[application.vacancy_id] += 1
+        Vacancy.release_applications(released)
+    return len(ids)
+
+
+def archive_applications(cutoff, batch_size=ARCHIVE_BATCH_SIZE):
+    archived = 0
+    for alias in sharding.shard_aliases():
+        while True:
+            ids = list(
+                JobApplication.objects.using(alias).filter(
+                    status__in=FINAL_STATUSES,
+                    last_updated__lt=cutoff
+                ).order_by('pk').values_list('pk', flat=True)[:batch_size]
+            )
+            if not ids:
+                break
+            archived += archive_application_ids(alias, ids)
+    return archived
+
+
+# Una vacante cerrada se archiva con todas sus postulaciones, sea cual sea su
+# estado; sus metricas diarias se conservan. Shard y primario no comparten
+# transaccion: primero se archivan las postulaciones (cada lote es atomico en
+# su shard) y despues, en el primario, solo las vacantes que siguen cerradas
+# y ya no tienen postulaciones vivas. Si el proceso se corta entre medias, la
+# vacante sigue cumpliendo el filtro y la siguiente ejecucion la termina.
+def archive_vacancies(cutoff, batch_size=ARCHIVE_BATCH_SIZE):
+    archived = 0
+    applications = 0
+    last_pk = 0
+    while True:
+        # se avanza por pk: una vacante que se salta no se vuelve a leer en esta pasada
+        batch = list(
+            Vacancy.objects.filter(
+                state="C",
+                closed_date__lt=cutoff,
+                pk__gt=last_pk
+            ).order_by('pk').values_list('pk', 'employer_id')[:batch_size]
+        )
+        if not batch:
+            break
+        last_pk = batch[-1][0]
+
+        by_shard = defaultdict(list)
+        for vacancy_id, employer_id in batch:
+            by_shard[sharding.shard_for_employer(employer_id)].append(vacancy_id)
+        for alias, vacancy_ids in by_shard.items():
+            while True:
+                ids = list(
+                    JobApplication.objects.using(alias).filter(
+                        vacancy_id__in=vacancy_ids
+                    ).order_by('pk').values_list('pk', flat=True)[:batch_size]
+                )
+                if not ids:
+                    break
+                applications += archive_application_ids(alias, ids, release=False)
+
+        with transaction.atomic(using=DEFAULT_DB_ALIAS), archiving():
+            # reabierta o con una postulacion nueva entre medias: se queda viva
+            vacancies = list(
+                Vacancy.objects.select_for_update(of=('self',)).select_related('employer').prefetch_related('technologies').filter(
+                    pk__in=[vacancy_id for vacancy_id, employer_id in batch],
+                    state="C",
+                    closed_date__lt=cutoff
+                ).order_by('pk')
+            )
+            busy = set()
+            for alias, vacancy_ids in by_shard.items():
+                busy.update(
+                    JobApplication.objects.using(alias).filter(
+                        vacancy_id__in=vacancy_ids
+                    ).values_list('vacancy_id', flat=True).distinct()
+                )
+            vacancies = [vacancy for vacancy in vacancies if vacancy.pk not in busy]
+
+            ArchivedVacancy.objects.bulk_create(
+                [
+                    ArchivedVacancy(
+                        id=vacancy.pk,
+                        employer_id=vacancy.employer_id,
+                        title=vacancy.title,
+                        closed_date=vacancy.closed_date,
+                        data=VacancySerializer(vacancy).data
+                    )
+                    for vacancy in vacancies
+                ],
+                ignore_conflicts=True
+            )
+            Vacancy.objects.filter(pk__in=[vacancy.pk for vacancy in vacancies]).delete()
+        archived += len(vacancies)
+    return archived, applications
+
+
+def run(days=ARCHIVE_AFTER_DAYS, batch_size=ARCHIVE_BATCH_SIZE):
+    cutoff = timezone.now() - timedelta(days=days)
+    vacancies, vacancy_applications = archive_vacancies(cutoff, batch_size)
+    applications = archive_applications(cutoff, batch_size)
+    return {
+        'vacancies': vacancies,
+        'applications': applications + vacancy_applications,
+    }
+
+
+def pending(days=ARCHIVE_AFTER_DAYS):
+    cutoff = timezone.now() - timedelta(days=days)
+    return {
+        'vacancies': Vacancy.objects.filter(state="C", closed_date__lt=cutoff).count(),
+        'applications': sum(
+            JobApplication.objects.using(alias).filter(
+                status__in=FINAL_STATUSES,
+                last_updated__lt=cutoff
+            ).count()
+            for alias in sharding.shard_aliases()
+        ),
+    }
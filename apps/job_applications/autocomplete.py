@@ -0,0 +1,101 @@
+import heapq
+import logging
+import threading
+import time
+from bisect import bisect_left
+
+from django.db import connection
+from django.db.models import Count
+
+from .models import Technology
+
+logger = logging.getLogger(__name__)
+
+# los cambios de uso (M2M de vacantes) se acumulan y se aplican como mucho
+# una vez por este intervalo
+USAGE_REFRESH_SECONDS = 60
+
+
+# Indice de prefijos sobre un array ordenado: cada nombre (y cada palabra del
+# nombre) es una clave; un prefijo es el rango [bisect(p), bisect(p + max)).
+class TechnologyAutocomplete:
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._keys = []
+        self._entries = []
+        self._built_at = None
+        self._usage_dirty = False
+
+    def invalidate(self):
+        self._built_at = None
+
+    def mark_usage_dirty(self):
+        self._usage_dirty = True
+
+    # se llama al arrancar el servidor. Construye el indice en un hilo aparte:
+    # el modulo ASGI/WSGI no toca la base de datos al importarse (bajo ASGI el
+    # ORM no puede usarse desde el event loop). Si falla, el indice se
+    # construye en la primera busqueda.
+    def warm(self):
+        thread = threading.Thread(target=self._warm, name='autocomplete-warm', daemon=True)
+        thread.start()
+        return thread
+
+    def _warm(self):
+        try:
+            self.rebuild()
+        except Exception:
+            logger.warning("Could not warm the technology autocomplete index", exc_info=True)
+            self.invalidate()
+        finally:
+            connection.close()
+
+    def rebuild(self):
+        pairs = []
+        for technology_id, name, usage in Technology.objects.annotate(
+            usage=Count('technologies')
+        ).order_by().values_list('id', 'name', 'usage'):
+            entry = (technology_id, name, usage)
+            lowered = name.lower()
+            pairs.append((lowered, entry))
+            for word in lowered.split()[1:]:
+                pairs.append((word, entry))
+
+        pairs.sort(key=lambda pair: pair[0])
+
+        with self._lock:
+            self._keys = [key for key, entry in pairs]
+            self._entries = [entry for key, entry in pairs]
+            self._built_at = time.monotonic()
+            self._usage_dirty = False
+
+    def _ensure(self):
+        if self._built_at is None:
+            self.rebuild()
+        elif self._usage_dirty and time.monotonic() - self._built_at > USAGE_REFRESH_SECONDS:
+            self.rebuild()
+
+    def search(self, prefix, limit=10):
+        prefix = prefix.strip().lower()
+        if not prefix:
+            return []
+
+        self._ensure()
+        keys, entries = self._keys, self._entries
+        start = bisect_left(keys, prefix)
+        end = bisect_left(keys, prefix + '\uffff', start)
+
+        matches = {}
+        for entry in entries[start:end]:
+            matches[entry[0]] = entry
+
+        # mas usadas primero; a igualdad de uso, orden alfabetico
+        ranked = heapq.nsmallest(limit, matches.values(), key=lambda entry: (-entry[2], entry[1].lower()))
+        return [
+            {'id': technology_id, 'name': name, 'vacancies': usage}
+            for technology_id, name, usage in ranked
+        ]
+
+
+index = TechnologyAutocomplete()
@@ -0,0 +1,113 @@
+from django.db.models import F, FloatField, Q, Value
+from django.db.models.functions import ACos, Cos, Greatest, Least, Radians, Sin
+from rest_framework import filters
+from rest_framework.exceptions import ValidationError
+
+from .geo import EARTH_RADIUS_KM, bounding_box, covering_prefixes, geocode
+from .models import to_cents
+
+MAX_RADIUS_KM = 1000
+
+
+def salary_param(request, name):
+    value = request.query_params.get(name)
+    if value in (None, ''):
+        return None
+    try:
+        cents = to_cents(value)
+    except (ArithmeticError, ValueError):
+        raise ValidationError({name: "Must be a number."})
+    if cents < 0:
+        raise ValidationError({name: "Cannot be negative."})
+    return cents
+
+
+# ?near=<lat>,<lon> o ?near=<lugar> con ?radius_km= (50 por defecto), de la
+# mas cercana a la mas lejana. Las vacantes remotas siempre coinciden (al
+# final) salvo con ?include_remote=false; el OR se resuelve con los indices de
+# geohash y de modality.
+class VacancyLocationFilter(filters.BaseFilterBackend):
+
+    def _center(self, near):
+        parts = near.split(',')
+        if len(parts) == 2:
+            try:
+                return float(parts[0]), float(parts[1])
+            except ValueError:
+                pass
+        point = geocode(near)
+        if point is None:
+            raise ValidationError({'near': f"Unknown location '{near}'."})
+        return point
+
+    def filter_queryset(self, request, queryset, view):
+        near = request.query_params.get('near')
+        if not near:
+            return queryset
+
+        latitude, longitude = self._center(near)
+        try:
+            radius = float(request.query_params.get('radius_km', 50))
+        except ValueError:
+            raise ValidationError({'radius_km': "Must be a number."})
+        radius = min(max(radius, 0.1), MAX_RADIUS_KM)
+
+        # celdas de geohash como rangos sobre un indice, luego caja y distancia exacta
+        cells = Q()
+        for prefix in covering_prefixes(latitude, longitude, radius):
+            cells |= Q(geohash__gte=prefix, geohash__lt=prefix + '{')
+
+        min_lat, max_lat, min_lon, max_lon = bounding_box(latitude, longitude, radius)
+        box = Q(latitude__range=(min_lat, max_lat), longitude__range=(min_lon, max_lon))
+
+        lat0 = Radians(Value(latitude, output_field=FloatField()))
+        lon0 = Radians(Value(longitude, output_field=FloatField()))
+        cosine = (
+            Cos(lat0) * Cos(Radians(F('latitude'))) * Cos(Radians(F('longitude')) - lon0)
+            + Sin(lat0) * Sin(Radians(F('latitude')))
+        )
+        queryset = queryset.annotate(
+            distance_km=EARTH_RADIUS_KM * ACos(Greatest(Least(cosine, Value(1.0)), Value(-1.0)))
+        )
+        nearby = cells & box & Q(distance_km__lte=radius)
+
+        if request.query_params.get('include_remote', 'true').lower() not in ('false', '0', 'no'):
+            nearby |= Q(modality='remote')
+        return queryset.filter(nearby).order_by(F('distance_km').asc(nulls_last=True), *queryset.query.order_by)
+
+
+# ?salary_from=&salary_to= devuelve las vacantes cuyo rango se solapa con el
+# pedido; ?salary_at_least= las que pagan al menos esa cantidad. Se compara
+# sobre las columnas en centimos, cubiertas por los indices
+# (salary_currency, salary_max_cents, salary_min_cents) y su simetrico.
+class VacancySalaryFilter(filters.BaseFilterBackend):
+
+    def filter_queryset(self, request, queryset, view):
+        salary_from = salary_param(request, 'salary_from')
+        salary_to = salary_param(request, 'salary_to')
+        at_least = salary_param(request, 'salary_at_least')
+        if salary_from is None and salary_to is None and at_least is None:
+            return queryset
+
+        if salary_from is not None and salary_to is not None and salary_from > salary_to:
+            raise ValidationError({'salary_to': "Must be greater than or equal to salary_from."})
+
+        currency = request.query_params.get('currency', 'USD').strip().upper()
+        queryset = queryset.filter(salary_currency=currency).exclude(
+            salary_min_cents__isnull=True,
+            salary_max_cents__isnull=True
+        )
+
+        # un extremo sin definir se trata como abierto
+        lower = max(value for value in (salary_from, at_least, 0) if value is not None)
+        if lower:
+            queryset = queryset.filter(
+                Q(salary_max_cents__gte=lower)
+                | Q(salary_max_cents__isnull=True, salary_min_cents__gte=lower)
+            )
+        if salary_to is not None:
+            queryset = queryset.filter(
+                Q(salary_min_cents__lte=salary_to)
+                | Q(salary_min_cents__isnull=True)
+            )
+        return queryset
@@ -0,0 +1,123 @@
+import csv
+import math
+import unicodedata
+from functools import lru_cache
+from pathlib import Path
+
+GAZETTEER_PATH = Path(__file__).resolve().parent / 'data' / 'gazetteer.csv'
+
+EARTH_RADIUS_KM = 6371.0
+
+GEOHASH_BASE32 = '0123456789bcdefghjkmnpqrstuvwxyz'
+GEOHASH_PRECISION = 9
+
+
+def normalize_place(value):
+    value = unicodedata.normalize('NFKD', value or '')
+    value = ''.join(char for char in value if not unicodedata.combining(char))
+    return ' '.join(value.lower().replace('.', ' ').split())
+
+
+@lru_cache(maxsize=1)
+def gazetteer():
+    places = {}
+    with open(GAZETTEER_PATH, newline='', encoding='utf-8') as handle:
+        for row in csv.DictReader(handle):
+            point = (float(row['latitude']), float(row['longitude']))
+            names = [row['name']] + [name for name in (row['alternate_names'] or '').split('|') if name]
+            for name in names:
+                places.setdefault(normalize_place(name), point)
+    return places
+
+
+# "Madrid", "Madrid, Spain" o "Remote - Bogota" -> (lat, lon); None si no se conoce
+def geocode(location):
+    places = gazetteer()
+    location = normalize_place(location)
+    if not location:
+        return None
+    if location in places:
+        return places[location]
+
+    for separator in (',', ' - ', '/', '('):
+        for part in location.split(separator):
+            part = part.strip(' )')
+            if part in places:
+                return places[part]
+    return None
+
+
+def encode_geohash(latitude, longitude, precision=GEOHASH_PRECISION):
+    lat_range = [-90.0, 90.0]
+    lon_range = [-180.0, 180.0]
+    geohash = []
+    bit, char, even = 0, 0, True
+
+    while len(geohash) < precision:
+        if even:
+            middle = (lon_range[0] + lon_range[1]) / 2
+            if longitude >= middle:
+                char |= 16 >> bit
+                lon_range[0] = middle
+            else:
+                lon_range[1] = middle
+        else:
+            middle = (lat_range[0] + lat_range[1]) / 2
+            if latitude >= middle:
+                char |= 16 >> bit
+                lat_range[0] = middle
+            else:
+                lat_range[1] = middle
+        even = not even
+        if bit < 4:
+            bit += 1
+        else:
+            geohash.append(GEOHASH_BASE32[char])
+            bit, char = 0, 0
+
+    return ''.join(geohash)
+
+
+def cell_size(precision):
+    bits = precision * 5
+    lat_bits = bits // 2
+    lon_bits = bits - lat_bits
+    return 180.0 / 2 ** lat_bits, 360.0 / 2 ** lon_bits
+
+
+def haversine_km(lat1, lon1, lat2, lon2):
+    lat1, lon1, lat2, lon2 = map(math.radians, (lat1, lon1, lat2, lon2))
+    a = math.sin((lat2 - lat1) / 2) ** 2 + math.cos(lat1) * math.cos(lat2) * math.sin((lon2 - lon1) / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * math.asin(math.sqrt(a))
+
+
+def bounding_box(latitude, longitude, radius_km):
+    lat_delta = math.degrees(radius_km / EARTH_RADIUS_KM)
+    cos_lat = max(math.cos(math.radians(latitude)), 1e-6)
+    lon_delta = min(math.degrees(radius_km / (EARTH_RADIUS_KM * cos_lat)), 180.0)
+    return (
+        max(latitude - lat_delta, -90.0),
+        min(latitude + lat_delta, 90.0),
+        max(longitude - lon_delta, -180.0),
+        min(longitude + lon_delta, 180.0),
+    )
+
+
+# Prefijos de geohash que cubren el bounding box del radio: se elige la mayor
+# precision cuya celda es al menos tan grande como la caja, de modo que las
+# celdas de sus cuatro esquinas la cubren entera.
+def covering_prefixes(latitude, longitude, radius_km):
+    min_lat, max_lat, min_lon, max_lon = bounding_box(latitude, longitude, radius_km)
+
+    precision = 1
+    for candidate in range(GEOHASH_PRECISION, 0, -1):
+        height, width = cell_size(candidate)
+        if height >= max_lat - min_lat and width >= max_lon - min_lon:
+            precision = candidate
+            break
+
+    return sorted({
+        encode_geohash(lat, lon, precision)
+        for lat in (min_lat, max_lat)
+        for lon in (min_lon, max_lon)
+    })
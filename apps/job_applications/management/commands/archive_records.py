@@ -0,0 +1,25 @@
+from django.core.management.base import BaseCommand
+
+from apps.job_applications import archive
+
+
+class Command(BaseCommand):
+    help = "Move closed vacancies and finished applications older than the horizon into the archive tables."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int, default=archive.ARCHIVE_AFTER_DAYS)
+        parser.add_argument('--batch-size', type=int, default=archive.ARCHIVE_BATCH_SIZE)
+        parser.add_argument('--dry-run', action='store_true', help="Only report how many rows would be archived.")
+
+    def handle(self, *args, **options):
+        if options['dry_run']:
+            counts = archive.pending(options['days'])
+            self.stdout.write(
+                f"{counts['vacancies']} vacancies and {counts['applications']} applications would be archived."
+            )
+            return
+
+        counts = archive.run(options['days'], options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(
+            f"Archived {counts['vacancies']} vacancies and {counts['applications']} applications."
+        ))
@@ -0,0 +1,121 @@
+import hashlib
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.management.base import BaseCommand
+from django.db import DatabaseError, connections, transaction
+from django.test.utils import override_settings
+
+from ...models import Vacancy
+
+SCRATCH_TABLE = 'benchmark_database_writes'
+
+
+def timed(requests, query, reconnect, alias):
+    connection = connections[alias]
+    connection.close()
+    started = time.perf_counter()
+    for _ in range(requests):
+        # CONN_MAX_AGE=0: Django cierra la conexion al terminar cada peticion
+        if reconnect:
+            connection.close()
+        query(alias)
+    elapsed = time.perf_counter() - started
+    connection.close()
+    return elapsed
+
+
+def read_page(alias):
+    list(Vacancy.objects.using(alias).order_by('-id').values_list('id', 'title')[:20])
+
+
+# Una peticion de escritura: trabajo de CPU fuera de la base de datos (como el
+# PBKDF2 del login o el registro) y una transaccion corta.
+def write_request(alias, request_lock):
+    def work():
+        hashlib.pbkdf2_hmac('sha256', b'password', b'salt', 20000)
+        with transaction.atomic(using=alias):
+            with connections[alias].cursor() as cursor:
+                cursor.execute(f'INSERT INTO {SCRATCH_TABLE} (value) VALUES (%s)', [random.random()])
+
+    if request_lock is None:
+        return work()
+    with request_lock:
+        return work()
+
+
+def mixed_load(alias, operations, threads, write_ratio, request_lock=None):
+    errors = []
+
+    def operation(index):
+        try:
+            if index % round(1 / write_ratio) == 0:
+                write_request(alias, request_lock)
+            else:
+                read_page(alias)
+        except DatabaseError as exc:
+            errors.append(exc)
+
+    def run(indexes):
+        try:
+            for index in indexes:
+                operation(index)
+        finally:
+            connections[alias].close()
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as pool:
+        list(pool.map(run, [range(start, operations, threads) for start in range(threads)]))
+    return time.perf_counter() - started, len(errors)
+
+
+class Command(BaseCommand):
+    help = "Measure connection setup savings, or throughput under a mixed read/write load (--mixed)."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=2000)
+        parser.add_argument('--database', default='default', help="Alias to benchmark, e.g. replica_1.")
+        parser.add_argument('--mixed', action='store_true', help="Run the mixed read/write load instead.")
+        parser.add_argument('--threads', type=int, default=8)
+        parser.add_argument('--write-ratio', type=float, default=0.2)
+
+    def handle(self, *args, **options):
+        if options['mixed']:
+            return self.mixed(options)
+
+        requests, alias = options['requests'], options['database']
+        read_page(alias)
+
+        fresh = timed(requests, read_page, True, alias)
+        persistent = timed(requests, read_page, False, alias)
+
+        self.stdout.write(f"{requests} requests against '{alias}' ({connections[alias].vendor})")
+        self.stdout.write(f"{'new connection':18} {fresh * 1000:9.1f} ms {fresh / requests * 1e6:8.1f} us/request")
+        self.stdout.write(f"{'persistent':18} {persistent * 1000:9.1f} ms {persistent / requests * 1e6:8.1f} us/request")
+        self.stdout.write(f"connection setup is {(fresh - persistent) / fresh:.0%} of the time per request")
+
+    def mixed(self, options):
+        alias, operations, threads = options['database'], options['requests'], options['threads']
+        with connections[alias].cursor() as cursor:
+            cursor.execute(f'CREATE TABLE IF NOT EXISTS {SCRATCH_TABLE} (id INTEGER PRIMARY KEY, value REAL)')
+
+        # la cola por peticion es lo que hacia antes la middleware: el lock
+        # cubria tambien el trabajo fuera de la base de datos
+        modes = [
+            ('busy timeout only', False, None),
+            ('queue per request', False, threading.Lock()),
+            ('queue per transaction', True, None),
+        ]
+        self.stdout.write(
+            f"{operations} operations, {threads} threads, {options['write_ratio']:.0%} writes against '{alias}'"
+        )
+        try:
+            for name, serialize, request_lock in modes:
+                with override_settings(SQLITE_SERIALIZE_WRITES=serialize):
+                    elapsed, errors = mixed_load(alias, operations, threads, options['write_ratio'], request_lock)
+                self.stdout.write(f"{name:22} {operations / elapsed:9.1f} ops/s {errors:6d} errors")
+        finally:
+            with connections[alias].cursor() as cursor:
+                cursor.execute(f'DROP TABLE IF EXISTS {SCRATCH_TABLE}')
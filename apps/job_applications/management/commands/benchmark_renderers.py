@@ -0,0 +1,69 @@
+import gzip
+import time
+from datetime import timedelta
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+from rest_framework.renderers import JSONRenderer
+
+from apps.users.models import EmployerProfile
+from config import renderers
+from ...models import Technology, Vacancy
+from ...serializers import VacancySerializer
+
+
+# Una pagina de vacantes en memoria, sin base de datos: mismos tipos que
+# devuelve VacancySerializer para filas reales.
+def sample_page(rows):
+    now = timezone.now()
+    technologies = [Technology(pk=index, name=name) for index, name in enumerate(['Python', 'Django', 'PostgreSQL', 'React'], 1)]
+    employer = EmployerProfile(pk=1, company_name='ACME', company_website='https://acme.example')
+    vacancies = []
+    for index in range(rows):
+        vacancy = Vacancy(
+            pk=index + 1,
+            employer=employer,
+            title=f'Backend developer {index}',
+            description='Build and operate the APIs behind our hiring platform. ' * 18,
+            location='Madrid',
+            salary_min=Decimal('42000.00') + index,
+            salary_max=Decimal('58000.50') + index,
+            experience_required=3,
+            closing_date=now + timedelta(days=30),
+            state='O',
+        )
+        vacancy.publication_date = now - timedelta(minutes=index)
+        vacancy._prefetched_objects_cache = {'technologies': technologies[:1 + index % 4]}
+        vacancies.append(vacancy)
+    return VacancySerializer(vacancies, many=True).data
+
+
+class Command(BaseCommand):
+    help = "Compare render time and payload size of the API renderers on a page of vacancies."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=1000)
+        parser.add_argument('--repeat', type=int, default=20)
+
+    def handle(self, *args, **options):
+        data = sample_page(options['rows'])
+
+        candidates = [('json (stdlib)', JSONRenderer())]
+        if renderers.orjson is not None:
+            candidates.append(('json (orjson)', renderers.FastJSONRenderer()))
+        if renderers.msgpack is not None:
+            candidates.append(('msgpack', renderers.MessagePackRenderer()))
+
+        self.stdout.write(f"{options['rows']} vacancies, best of {options['repeat']} renders")
+        for name, renderer in candidates:
+            timings = []
+            for _ in range(options['repeat']):
+                started = time.perf_counter()
+                body = renderer.render(data, renderer.media_type, {})
+                timings.append(time.perf_counter() - started)
+            self.stdout.write(
+                f"{name:15} {min(timings) * 1000:8.2f} ms {len(body):10,d} bytes {len(gzip.compress(body)):9,d} gzipped"
+            )
+        if renderers.msgpack is None:
+            self.stdout.write("msgpack is not installed; skipped.")
@@ -0,0 +1,30 @@
+from django.core.management.base import BaseCommand
+
+from apps.job_applications.models import Vacancy
+
+
+class Command(BaseCommand):
+    help = "Geocode vacancy locations against the bundled gazetteer."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--all', action='store_true', help="Re-geocode vacancies that already have coordinates.")
+        parser.add_argument('--chunk-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        vacancies = Vacancy.objects.only('id', 'location', 'latitude', 'longitude', 'geohash')
+        if not options['all']:
+            vacancies = vacancies.filter(geohash='')
+
+        chunk, located, total = [], 0, 0
+        for vacancy in vacancies.iterator(chunk_size=options['chunk_size']):
+            vacancy.geocode()
+            located += bool(vacancy.geohash)
+            total += 1
+            chunk.append(vacancy)
+            if len(chunk) >= options['chunk_size']:
+                Vacancy.objects.bulk_update(chunk, ['latitude', 'longitude', 'geohash'])
+                chunk = []
+        if chunk:
+            Vacancy.objects.bulk_update(chunk, ['latitude', 'longitude', 'geohash'])
+
+        self.stdout.write(self.style.SUCCESS(f"Geocoded {located} of {total} vacancies."))
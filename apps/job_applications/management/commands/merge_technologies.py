@@ -0,0 +1,84 @@
+from collections import defaultdict
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from apps.job_applications.models import Technology, TechnologyAlias, Vacancy
+from apps.job_applications.normalization import canonical_key, resolver
+
+
+class Command(BaseCommand):
+    help = "Merge duplicate technologies into one, rewriting vacancy links in bulk."
+
+    def add_arguments(self, parser):
+        parser.add_argument('target', nargs='?', help="Technology name or id to keep.")
+        parser.add_argument('sources', nargs='*', help="Technology names or ids to merge into the target.")
+        parser.add_argument(
+            '--auto',
+            action='store_true',
+            help="Merge every group of technologies that share a normalized name."
+        )
+
+    def _get(self, value):
+        lookup = {'pk': int(value)} if value.isdigit() else {'name__iexact': value}
+        try:
+            return Technology.objects.get(**lookup)
+        except Technology.DoesNotExist:
+            raise CommandError(f"Technology '{value}' does not exist.")
+
+    def handle(self, *args, **options):
+        if options['auto']:
+            groups = defaultdict(list)
+            for technology in Technology.objects.order_by('id'):
+                groups[canonical_key(technology.name)].append(technology)
+            merges = [(group[0], group[1:]) for group in groups.values() if len(group) > 1]
+        else:
+            if not options['target'] or not options['sources']:
+                raise CommandError("Give a target and at least one source, or use --auto.")
+            target = self._get(options['target'])
+            sources = [self._get(value) for value in options['sources']]
+            merges = [(target, [source for source in sources if source.pk != target.pk])]
+
+        for target, sources in merges:
+            merged = merge(target, sources)
+            self.stdout.write(
+                f"{', '.join(source.name for source in sources)} -> {target.name} ({merged} vacancies)"
+            )
+
+        resolver.invalidate()
+        self.stdout.write(self.style.SUCCESS(f"Merged {sum(len(sources) for target, sources in merges)} technologies."))
+
+
+def merge(target, sources):
+    if not sources:
+        return 0
+
+    through = Vacancy.technologies.through
+    source_ids = [source.pk for source in sources]
+
+    with transaction.atomic():
+        vacancy_ids = list(
+            through.objects.filter(technology_id__in=source_ids)
+            .values_list('vacancy_id', flat=True)
+            .distinct()
+        )
+        through.objects.bulk_create(
+            [through(vacancy_id=vacancy_id, technology_id=target.pk) for vacancy_id in vacancy_ids],
+            ignore_conflicts=True,
+            batch_size=1000
+        )
+        through.objects.filter(technology_id__in=source_ids).delete()
+
+        TechnologyAlias.objects.filter(technology_id__in=source_ids).update(technology=target)
+        TechnologyAlias.objects.bulk_create(
+            [
+                TechnologyAlias(alias=canonical_key(source.name)[:50], technology=target)
+                for source in sources
+                if canonical_key(source.name) != canonical_key(target.name)
+            ],
+            ignore_conflicts=True
+        )
+
+        Technology.objects.filter(pk__in=source_ids).delete()
+
+    return len(vacancy_ids)
@@ -0,0 +1,278 @@
+import heapq
+import math
+import re
+import threading
+import time
+from collections import defaultdict
+
+from django.conf import settings
+from django.db import connection
+
+from apps.users.models import EmployeeProfile
+from .models import Vacancy
+from .normalization import canonical_key, resolver
+
+# segundos tras los que el indice se reconstruye entero, para recoger cambios
+# hechos por otros procesos. La reconstruccion va en un hilo aparte y mientras
+# tanto se sigue sirviendo el indice anterior.
+INDEX_TTL = getattr(settings, 'MATCHING_INDEX_TTL', 300)
+
+SKILL_WEIGHT = 0.7
+MODALITY_WEIGHT = 0.15
+SALARY_WEIGHT = 0.15
+
+SKILL_SEPARATORS = re.compile(r'[,;/|\n]+')
+
+
+def parse_skills(text, technology_ids):
+    ids = set()
+    for token in SKILL_SEPARATORS.split(text or ''):
+        key = canonical_key(token)
+        if key in technology_ids:
+            ids.add(technology_ids[key])
+    return ids
+
+
+def to_bits(ids):
+    bits = 0
+    for technology_id in ids:
+        bits |= 1 << technology_id
+    return bits
+
+
+def bit_ids(bits):
+    ids = []
+    while bits:
+        low = bits & -bits
+        ids.append(low.bit_length() - 1)
+        bits ^= low
+    return ids
+
+
+def skill_score(a, b):
+    overlap = (a & b).bit_count()
+    if not overlap:
+        return 0.0
+    # similitud coseno entre vectores binarios
+    return overlap / math.sqrt(a.bit_count() * b.bit_count())
+
+
+def modality_score(vacancy_modality, preferred):
+    if vacancy_modality == preferred:
+        return 1.0
+    if 'hybrid' in (vacancy_modality, preferred):
+        return 0.5
+    return 0.0
+
+
+def salary_score(salary_max, expected):
+    if salary_max is None or expected <= salary_max:
+        return 1.0
+    return max(0.0, 1 - (expected - salary_max) / expected)
+
+
+# Indice en memoria: cada vacante abierta y cada candidato es un bitset de ids
+# de Technology, con un indice invertido tecnologia -> ids para puntuar solo a
+# quienes comparten al menos una tecnologia.
+class MatchIndex:
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._built_at = None
+        self._stale = False
+        self._rebuilding = None
+        # ids cambiados mientras se reconstruye, que se aplican sobre el indice nuevo
+        self._touched_vacancies = set()
+        self._touched_candidates = set()
+        self.technology_ids = {}
+        self.vacancies = {}
+        self.candidates = {}
+        self.vacancy_postings = defaultdict(set)
+        self.candidate_postings = defaultdict(set)
+
+    @property
+    def is_built(self):
+        return self._built_at is not None
+
+    def invalidate(self):
+        self._stale = True
+
+    def ensure(self):
+        if self._built_at is None:
+            self.rebuild()
+        elif self._stale or time.monotonic() - self._built_at > INDEX_TTL:
+            self.refresh()
+
+    def refresh(self):
+        with self._lock:
+            if self._rebuilding is not None:
+                return self._rebuilding
+            self._stale = False
+            self._rebuilding = threading.Thread(target=self._rebuild_in_background, name='match-index', daemon=True)
+            self._rebuilding.start()
+            return self._rebuilding
+
+    def _rebuild_in_background(self):
+        try:
+            self.rebuild()
+        finally:
+            with self._lock:
+                self._rebuilding = None
+            connection.close()
+
+    def rebuild(self):
+        with self._lock:
+            self._touched_vacancies.clear()
+            self._touched_candidates.clear()
+
+        technology_ids = dict(resolver.lookup())
+
+        vacancies = {
+            vacancy_id: [0, modality, salary_max]
+            for vacancy_id, modality, salary_max in Vacancy.objects.filter(
+                state="O"
+            ).order_by().values_list('id', 'modality', 'salary_max')
+        }
+        for vacancy_id, technology_id in Vacancy.technologies.through.objects.filter(
+            vacancy__state="O"
+        ).values_list('vacancy_id', 'technology_id'):
+            vacancies[vacancy_id][0] |= 1 << technology_id
+
+        candidates = {}
+        for employee_id, skills in EmployeeProfile.objects.order_by().values_list('id', 'skills'):
+            bits = to_bits(parse_skills(skills, technology_ids))
+            if bits:
+                candidates[employee_id] = bits
+
+        vacancy_postings = defaultdict(set)
+        for vacancy_id, (bits, modality, salary_max) in vacancies.items():
+            for technology_id in bit_ids(bits):
+                vacancy_postings[technology_id].add(vacancy_id)
+
+        candidate_postings = defaultdict(set)
+        for employee_id, bits in candidates.items():
+            for technology_id in bit_ids(bits):
+                candidate_postings[technology_id].add(employee_id)
+
+        with self._lock:
+            self.technology_ids = technology_ids
+            self.vacancies = vacancies
+            self.candidates = candidates
+            self.vacancy_postings = vacancy_postings
+            self.candidate_postings = candidate_postings
+            self._built_at = time.monotonic()
+            touched_vacancies, self._touched_vacancies = self._touched_vacancies, set()
+            touched_candidates, self._touched_candidates = self._touched_candidates, set()
+
+        for vacancy_id in touched_vacancies:
+            self.update_vacancy(vacancy_id)
+        skills = dict(EmployeeProfile.objects.filter(pk__in=touched_candidates).values_list('id', 'skills'))
+        for employee_id in touched_candidates:
+            if employee_id in skills:
+                self.update_candidate(employee_id, skills[employee_id])
+            else:
+                self.remove_candidate(employee_id)
+
+    def _unpost(self, postings, key, bits):
+        for technology_id in bit_ids(bits):
+            postings[technology_id].discard(key)
+
+    def remove_vacancy(self, vacancy_id):
+        with self._lock:
+            if self._rebuilding is not None:
+                self._touched_vacancies.add(vacancy_id)
+            entry = self.vacancies.pop(vacancy_id, None)
+            if entry:
+                self._unpost(self.vacancy_postings, vacancy_id, entry[0])
+
+    def update_vacancy(self, vacancy_id):
+        if not self.is_built:
+            return
+        row = Vacancy.objects.filter(pk=vacancy_id, state="O").values_list('modality', 'salary_max').first()
+        technology_ids = list(Vacancy.technologies.through.objects.filter(
+            vacancy_id=vacancy_id
+        ).values_list('technology_id', flat=True))
+
+        with self._lock:
+            self.remove_vacancy(vacancy_id)
+            if row is None:
+                return
+            bits = to_bits(technology_ids)
+            self.vacancies[vacancy_id] = [bits, row[0], row[1]]
+            for technology_id in bit_ids(bits):
+                self.vacancy_postings[technology_id].add(vacancy_id)
+
+    def remove_candidate(self, employee_id):
+        with self._lock:
+            if self._rebuilding is not None:
+                self._touched_candidates.add(employee_id)
+            bits = self.candidates.pop(employee_id, 0)
+            self._unpost(self.candidate_postings, employee_id, bits)
+
+    def update_candidate(self, employee_id, skills):
+        if not self.is_built:
+            return
+        with self._lock:
+            self.remove_candidate(employee_id)
+            bits = to_bits(parse_skills(skills, self.technology_ids))
+            if bits:
+                self.candidates[employee_id] = bits
+                for technology_id in bit_ids(bits):
+                    self.candidate_postings[technology_id].add(employee_id)
+
+    def candidate_bits(self, employee_id):
+        self.ensure()
+        return self.candidates.get(employee_id, 0)
+
+    def top_vacancies(self, bits, k=10, modality=None, salary=None):
+        self.ensure()
+        with self._lock:
+            pool = set()
+            for technology_id in bit_ids(bits):
+                pool |= self.vacancy_postings.get(technology_id, set())
+            entries = [(vacancy_id, self.vacancies[vacancy_id]) for vacancy_id in pool]
+
+        total_weight = SKILL_WEIGHT
+        if modality:
+            total_weight += MODALITY_WEIGHT
+        if salary is not None:
+            total_weight += SALARY_WEIGHT
+
+        def score(entry):
+            vacancy_id, (vacancy_bits, vacancy_modality, salary_max) = entry
+            value = SKILL_WEIGHT * skill_score(bits, vacancy_bits)
+            if modality:
+                value += MODALITY_WEIGHT * modality_score(vacancy_modality, modality)
+            if salary is not None:
+                value += SALARY_WEIGHT * salary_score(
+                    float(salary_max) if salary_max is not None else None,
+                    salary
+                )
+            return value / total_weight
+
+        ranked = heapq.nlargest(k, ((score(entry), entry[0]) for entry in entries))
+        return [(vacancy_id, round(value, 4)) for value, vacancy_id in ranked]
+
+    def top_candidates(self, vacancy_id, k=10):
+        self.ensure()
+        with self._lock:
+            entry = self.vacancies.get(vacancy_id)
+            if entry is None:
+                return []
+            bits = entry[0]
+            pool = set()
+            for technology_id in bit_ids(bits):
+                pool |= self.candidate_postings.get(technology_id, set())
+            candidates = [(employee_id, self.candidates[employee_id]) for employee_id in pool]
+
+        ranked = heapq.nlargest(
+            k,
+            ((skill_score(bits, candidate_bits), employee_id) for employee_id, candidate_bits in candidates)
+        )
+        return [
+            (employee_id, round(value, 4), bit_ids(bits & self.candidates.get(employee_id, 0)))
+            for value, employee_id in ranked
+        ]
+
+
+index = MatchIndex()
@@ -0,0 +1,32 @@
+# Generated by Django 5.2.4 on 2026-10-19 16:35
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def count_applications(apps, schema_editor):
+    Vacancy = apps.get_model('job_applications', 'Vacancy')
+    JobApplication = apps.get_model('job_applications', 'JobApplication')
+
+    counts = JobApplication.objects.filter(
+        vacancy=OuterRef('pk')
+    ).order_by().values('vacancy').annotate(total=Count('id')).values('total')
+
+    Vacancy.objects.update(applications_count=Coalesce(Subquery(counts), 0))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('job_applications', '0008_alter_vacancy_closing_date_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='vacancy',
+            name='applications_count',
+            field=models.PositiveIntegerField(default=0, editable=False, help_text='Number of applications received.'),
+        ),
+        migrations.RunPython(count_applications, migrations.RunPython.noop),
+    ]
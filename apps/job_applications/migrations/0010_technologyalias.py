@@ -0,0 +1,27 @@
+# Generated by Django 5.2.4 on 2026-10-19 16:40
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('job_applications', '0009_vacancy_applications_count'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TechnologyAlias',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('alias', models.CharField(max_length=50, unique=True)),
+                ('technology', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='aliases', to='job_applications.technology')),
+            ],
+            options={
+                'verbose_name': 'Technology Alias',
+                'verbose_name_plural': 'Technology Aliases',
+                'ordering': ['alias'],
+            },
+        ),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 5.2.4 on 2026-10-19 16:43
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('job_applications', '0010_technologyalias'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='vacancy',
+            name='geohash',
+            field=models.CharField(blank=True, db_index=True, editable=False, help_text='Geohash of the geocoded location, used for radius searches.', max_length=12),
+        ),
+        migrations.AddField(
+            model_name='vacancy',
+            name='latitude',
+            field=models.FloatField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='vacancy',
+            name='longitude',
+            field=models.FloatField(blank=True, editable=False, null=True),
+        ),
+    ]
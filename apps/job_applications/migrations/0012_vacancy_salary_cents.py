@@ -0,0 +1,48 @@
+# Generated by Django 5.2.4 on 2026-10-19 16:44
+
+from django.db import migrations, models
+from django.db.models import BigIntegerField, F
+from django.db.models.functions import Cast, Round
+
+
+def backfill_salary_cents(apps, schema_editor):
+    Vacancy = apps.get_model('job_applications', 'Vacancy')
+    Vacancy.objects.update(
+        salary_min_cents=Cast(Round(F('salary_min') * 100), BigIntegerField()),
+        salary_max_cents=Cast(Round(F('salary_max') * 100), BigIntegerField()),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('job_applications', '0011_vacancy_geolocation'),
+        ('users', '0002_alter_user_birth_date'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='vacancy',
+            name='salary_currency',
+            field=models.CharField(default='USD', help_text='ISO 4217 currency of the salary range.', max_length=3),
+        ),
+        migrations.AddField(
+            model_name='vacancy',
+            name='salary_max_cents',
+            field=models.BigIntegerField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='vacancy',
+            name='salary_min_cents',
+            field=models.BigIntegerField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='vacancy',
+            index=models.Index(fields=['salary_currency', 'salary_max_cents', 'salary_min_cents'], name='vacancy_salary_max_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='vacancy',
+            index=models.Index(fields=['salary_currency', 'salary_min_cents', 'salary_max_cents'], name='vacancy_salary_min_idx'),
+        ),
+        migrations.RunPython(backfill_salary_cents, migrations.RunPython.noop),
+    ]
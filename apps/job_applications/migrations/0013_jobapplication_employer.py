@@ -0,0 +1,53 @@
+# Generated by Django 5.2.4 on 2026-10-19 16:50
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import OuterRef, Subquery
+
+
+def copy_vacancy_employer(apps, schema_editor):
+    Vacancy = apps.get_model('job_applications', 'Vacancy')
+    JobApplication = apps.get_model('job_applications', 'JobApplication')
+
+    JobApplication.objects.using(schema_editor.connection.alias).update(
+        employer_id=Subquery(Vacancy.objects.filter(pk=OuterRef('vacancy_id')).values('employer_id')[:1])
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('job_applications', '0012_vacancy_salary_cents'),
+        ('users', '0002_alter_user_birth_date'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='jobapplication',
+            name='employer',
+            field=models.ForeignKey(db_constraint=False, editable=False, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='received_applications', to='users.employerprofile'),
+        ),
+        migrations.AlterField(
+            model_name='applicationstatushistory',
+            name='changed_by',
+            field=models.ForeignKey(db_constraint=False, on_delete=django.db.models.deletion.CASCADE, related_name='status_changes', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AlterField(
+            model_name='interview',
+            name='interviewer',
+            field=models.ForeignKey(db_constraint=False, on_delete=django.db.models.deletion.CASCADE, related_name='conducted_interviews', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AlterField(
+            model_name='jobapplication',
+            name='employee',
+            field=models.ForeignKey(db_constraint=False, on_delete=django.db.models.deletion.CASCADE, related_name='job_applications', to='users.employeeprofile'),
+        ),
+        migrations.AlterField(
+            model_name='jobapplication',
+            name='vacancy',
+            field=models.ForeignKey(db_constraint=False, on_delete=django.db.models.deletion.CASCADE, related_name='job_applications', to='job_applications.vacancy'),
+        ),
+        migrations.RunPython(copy_vacancy_employer, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,65 @@
+# Generated by Django 5.2.4 on 2026-10-19 16:56
+
+import django.core.serializers.json
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models.functions import Coalesce
+
+
+def backfill_closed_date(apps, schema_editor):
+    Vacancy = apps.get_model('job_applications', 'Vacancy')
+    Vacancy.objects.using(schema_editor.connection.alias).filter(state="C").update(
+        closed_date=Coalesce('closing_date', 'publication_date')
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('job_applications', '0013_jobapplication_employer'),
+        ('users', '0002_alter_user_birth_date'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='vacancy',
+            name='closed_date',
+            field=models.DateTimeField(blank=True, db_index=True, editable=False, help_text='When the vacancy was closed.', null=True),
+        ),
+        migrations.RunPython(backfill_closed_date, migrations.RunPython.noop),
+        migrations.CreateModel(
+            name='ArchivedApplication',
+            fields=[
+                ('id', models.BigIntegerField(primary_key=True, serialize=False)),
+                ('vacancy_id', models.BigIntegerField(db_index=True)),
+                ('status', models.CharField(choices=[('pending', 'Pending Review'), ('reviewing', 'Under Review'), ('interview_scheduled', 'Interview Scheduled'), ('interview_completed', 'Interview Completed'), ('rejected', 'Rejected'), ('accepted', 'Accepted'), ('withdrawn', 'Withdrawn by Candidate')], max_length=20)),
+                ('applied_date', models.DateTimeField()),
+                ('last_updated', models.DateTimeField()),
+                ('archived_date', models.DateTimeField(auto_now_add=True)),
+                ('data', models.JSONField(encoder=django.core.serializers.json.DjangoJSONEncoder)),
+                ('employee', models.ForeignKey(db_constraint=False, on_delete=django.db.models.deletion.CASCADE, related_name='archived_applications', to='users.employeeprofile')),
+                ('employer', models.ForeignKey(db_constraint=False, on_delete=django.db.models.deletion.CASCADE, related_name='archived_applications', to='users.employerprofile')),
+            ],
+            options={
+                'verbose_name': 'Archived Application',
+                'verbose_name_plural': 'Archived Applications',
+                'ordering': ['-applied_date'],
+            },
+        ),
+        migrations.CreateModel(
+            name='ArchivedVacancy',
+            fields=[
+                ('id', models.BigIntegerField(primary_key=True, serialize=False)),
+                ('title', models.CharField(max_length=200)),
+                ('closed_date', models.DateTimeField(null=True)),
+                ('archived_date', models.DateTimeField(auto_now_add=True)),
+                ('data', models.JSONField(encoder=django.core.serializers.json.DjangoJSONEncoder)),
+                ('employer', models.ForeignKey(db_constraint=False, on_delete=django.db.models.deletion.CASCADE, related_name='archived_vacancies', to='users.employerprofile')),
+            ],
+            options={
+                'verbose_name': 'Archived Vacancy',
+                'verbose_name_plural': 'Archived Vacancies',
+                'ordering': ['-closed_date'],
+            },
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.4 on 2026-10-19 18:53
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('job_applications', '0015_applications_count_excludes_withdrawn'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='vacancy',
+            name='modality',
+            field=models.CharField(choices=[('remote', 'Remote'), ('onsite', 'On-site'), ('hybrid', 'Hybrid')], db_index=True, default='hybrid', max_length=20),
+        ),
+    ]
@@ -1,7 +1,35 @@
+from decimal import Decimal
+
 from django.utils import timezone
 from django.db import models
+from django.db.models import F
+from django.db.models.functions import Greatest
 from django.core.exceptions import ValidationError
+from django.core.serializers.json import DjangoJSONEncoder
 from apps.users.models import EmployeeProfile, EmployerProfile, User
+from config import identity
+from .validation import ValidatedModelMixin
+
+
+def to_cents(amount):
+    if amount is None:
+        return None
+    return int((Decimal(str(amount)) * 100).to_integral_value())
+
+
+# objects.create() elige la base sin ver la fila y una postulacion nueva
+# acabaria en default; sin .using() explicito se deja decidir al router con la
+# instancia, que la manda al shard de su empleador (ver sharding.ShardRouter)
+class ShardedQuerySet(models.QuerySet):
+
+    def create(self, **kwargs):
+        if self._db is not None:
+            return super().create(**kwargs)
+        obj = self.model(**kwargs)
+        self._for_write = True
+        obj.save(force_insert=True)
+        return obj
+
 
 class Technology(models.Model):
     name = models.CharField(
@@ -17,7 +45,28 @@ class Technology(models.Model):
         verbose_name_plural = "Technologies"
         ordering = ['name']
 
-class Vacancy(models.Model):
+class TechnologyAlias(models.Model):
+    # clave normalizada (ver normalization.canonical_key), p. ej. "nodejs" o "js"
+    alias = models.CharField(
+        max_length=50,
+        unique=True
+    )
+
+    technology = models.ForeignKey(
+        Technology,
+        on_delete=models.CASCADE,
+        related_name="aliases"
+    )
+
+    def __str__(self):
+        return f"{self.alias} → {self.technology.name}"
+
+    class Meta:
+        verbose_name = 'Technology Alias'
+        verbose_name_plural = 'Technology Aliases'
+        ordering = ['alias']
+
+class Vacancy(ValidatedModelMixin, models.Model):
     STATUS_CHOICES = [
         ("O", "Open"),
         ("C", "Closed")
@@ -29,6 +78,9 @@ class Vacancy(models.Model):
         ("hybrid", "Hybrid")
     ]
 
+    VALIDATED_FIELDS = ['salary_min', 'salary_max', 'closing_date']
+    TRACKED_FIELDS = ['location', 'state']
+
     employer = models.ForeignKey(
         EmployerProfile,
         on_delete=models.CASCADE,
@@ -48,11 +100,32 @@ class Vacancy(models.Model):
     modality = models.CharField(
         max_length=20,
         choices=MODALITY_CHOICES,
-        default="hybrid"
+        default="hybrid",
+        db_index=True
     )
 
     location = models.CharField(max_length=100)
 
+    latitude = models.FloatField(
+        null=True,
+        blank=True,
+        editable=False
+    )
+
+    longitude = models.FloatField(
+        null=True,
+        blank=True,
+        editable=False
+    )
+
+    geohash = models.CharField(
+        max_length=12,
+        blank=True,
+        editable=False,
+        db_index=True,
+        help_text="Geohash of the geocoded location, used for radius searches."
+    )
+
     salary_min = models.DecimalField(
         max_digits=10,
         decimal_places=2,
@@ -69,6 +142,25 @@ class Vacancy(models.Model):
         help_text="Maximum salary range."
     )
 
+    salary_currency = models.CharField(
+        max_length=3,
+        default="USD",
+        help_text="ISO 4217 currency of the salary range."
+    )
+
+    # copias enteras (centimos) de salary_min/salary_max para filtrar con indices
+    salary_min_cents = models.BigIntegerField(
+        null=True,
+        blank=True,
+        editable=False
+    )
+
+    salary_max_cents = models.BigIntegerField(
+        null=True,
+        blank=True,
+        editable=False
+    )
+
     experience_required = models.CharField(
         max_length=50,
         blank=True,
@@ -80,7 +172,6 @@ class Vacancy(models.Model):
     )
 
     closing_date = models.DateTimeField(
-        default= timezone.now(),
         null=True,
         blank=True,
         help_text="When applications close."
@@ -92,6 +183,20 @@ class Vacancy(models.Model):
         default="O"
     )
 
+    closed_date = models.DateTimeField(
+        null=True,
+        blank=True,
+        editable=False,
+        db_index=True,
+        help_text="When the vacancy was closed."
+    )
+
+    applications_count = models.PositiveIntegerField(
+        default=0,
+        editable=False,
+        help_text="Number of applications that are not withdrawn."
+    )
+
     def clean(self):
         if self.salary_min and self.salary_max:
             if self.salary_min >= self.salary_max:
@@ -99,18 +204,58 @@ class Vacancy(models.Model):
                     "Minimum salary must be less than maximum salary."
                 )
             
-        if self.closing_date and self.closing_date <= self.publication_date:
+        # publication_date todavia no existe antes del primer INSERT
+        publication_date = self.publication_date or timezone.now()
+        if self.closing_date and self.closing_date <= publication_date:
             raise ValidationError(
                 "Closing date must be after publication date."
             )
-        
+
+    def geocode(self):
+        from .geo import encode_geohash, geocode
+
+        point = geocode(self.location)
+        if point:
+            self.latitude, self.longitude = point
+            self.geohash = encode_geohash(*point)
+        else:
+            self.latitude = self.longitude = None
+            self.geohash = ''
+
     def save(self, *args, **kwargs):
-        self.clean()
+        changed = self.changed_fields()
+        derived = set()
+
+        # solo se geocodifica cuando cambia la ubicacion
+        if 'location' in changed:
+            self.geocode()
+            derived |= {'latitude', 'longitude', 'geohash'}
+
+        if 'state' in changed:
+            self.closed_date = timezone.now() if self.state == "C" else None
+            derived.add('closed_date')
+
+        if changed & {'salary_min', 'salary_max'}:
+            self.salary_min_cents = to_cents(self.salary_min)
+            self.salary_max_cents = to_cents(self.salary_max)
+            derived |= {'salary_min_cents', 'salary_max_cents'}
+
+        if derived and kwargs.get('update_fields') is not None:
+            kwargs['update_fields'] = set(kwargs['update_fields']) | derived
         super().save(*args, **kwargs)
 
     def __str__(self):
-        return f"{self.title} - {self.employer.company_name} ({self.modality})"
+        return f"{self.title} - {identity.related(self, 'employer').company_name} ({self.modality})"
     
+    # {vacancy_id: n}: resta postulaciones retiradas, borradas o archivadas
+    @classmethod
+    def release_applications(cls, counts):
+        for vacancy_id, count in counts.items():
+            if count:
+                cls.objects.filter(pk=vacancy_id).update(
+                    applications_count=Greatest(F('applications_count') - count, 0)
+                )
+
     @property
     def is_open(self):
         return self.state == "O"
@@ -129,8 +274,18 @@ class Vacancy(models.Model):
         verbose_name = "Vacancy"
         verbose_name_plural = "Vacancies"
         ordering = ["-publication_date"]
-
-class JobApplication(models.Model):
+        indexes = [
+            models.Index(
+                fields=['salary_currency', 'salary_max_cents', 'salary_min_cents'],
+                name='vacancy_salary_max_idx'
+            ),
+            models.Index(
+                fields=['salary_currency', 'salary_min_cents', 'salary_max_cents'],
+                name='vacancy_salary_min_idx'
+            ),
+        ]
+
+class JobApplication(ValidatedModelMixin, models.Model):
     STATUS_CHOICES = [
         ('pending', 'Pending Review'),
         ('reviewing', 'Under Review'),
@@ -141,16 +296,43 @@ class JobApplication(models.Model):
         ('withdrawn', 'Withdrawn by Candidate')
     ]
 
+    # estados a los que se puede pasar desde cada estado
+    STATUS_TRANSITIONS = {
+        'pending': ['reviewing', 'interview_scheduled', 'rejected', 'withdrawn'],
+        'reviewing': ['interview_scheduled', 'accepted', 'rejected', 'withdrawn'],
+        'interview_scheduled': ['interview_completed', 'rejected', 'withdrawn'],
+        'interview_completed': ['interview_scheduled', 'accepted', 'rejected', 'withdrawn'],
+        'rejected': [],
+        'accepted': [],
+        'withdrawn': []
+    }
+
+    VALIDATED_FIELDS = ['employee', 'vacancy']
+
+    # las postulaciones y sus tablas hijas pueden vivir en otro shard que
+    # usuarios y vacantes, por eso estas claves no llevan restriccion en la base de datos
     employee = models.ForeignKey(
         EmployeeProfile,
         on_delete=models.CASCADE,
-        related_name="job_applications"
+        related_name="job_applications",
+        db_constraint=False
     )
 
     vacancy = models.ForeignKey(
         Vacancy,
         on_delete=models.CASCADE,
-        related_name="job_applications"
+        related_name="job_applications",
+        db_constraint=False
+    )
+
+    # copia de vacancy.employer: clave de particion de los shards
+    employer = models.ForeignKey(
+        EmployerProfile,
+        on_delete=models.CASCADE,
+        related_name="received_applications",
+        db_constraint=False,
+        editable=False,
+        null=True
     )
 
     status = models.CharField(
@@ -192,29 +374,57 @@ class JobApplication(models.Model):
         help_text="When can you start working?"
     )
 
+    objects = ShardedQuerySet.as_manager()
+
     class Meta:
         verbose_name = "Job Application"
         verbose_name_plural = "Job Applications"
         ordering = ['-applied_date']
         unique_together = ['employee', 'vacancy']
 
-    def clean(self):
-        if self.vacancy and self.vacancy.state == "C":
-            raise ValidationError(
-                "Cannot apply to a closed vacancy"
-            )
-        
-        if self.employee and self.vacancy and self.employee.user == self.vacancy.employer.user:
-            raise ValidationError(
-                "Cannot apply to your own vacancy"
-            )
-        
     def save(self, *args, **kwargs):
-        self.clean()
+        if self.employer_id is None and self.vacancy_id is not None:
+            if self._meta.get_field('vacancy').is_cached(self):
+                self.employer_id = self.vacancy.employer_id
+            else:
+                self.employer_id = Vacancy.objects.filter(pk=self.vacancy_id).values_list('employer_id', flat=True).first()
         super().save(*args, **kwargs)
 
+    def clean(self):
+        for application, message in self.validate_many([self]):
+            raise ValidationError(message)
+
+    # valida varias postulaciones con dos consultas por ids, sin recorrer relaciones
+    @classmethod
+    def validate_many(cls, applications):
+        vacancies = {
+            row['id']: row
+            for row in Vacancy.objects.filter(
+                pk__in={application.vacancy_id for application in applications if application.vacancy_id}
+            ).order_by().values('id', 'state', 'employer__user_id')
+        }
+        employee_users = dict(
+            EmployeeProfile.objects.filter(
+                pk__in={application.employee_id for application in applications if application.employee_id}
+            ).order_by().values_list('id', 'user_id')
+        )
+
+        errors = []
+        for application in applications:
+            vacancy = vacancies.get(application.vacancy_id)
+            if vacancy is None:
+                continue
+
+            if vacancy['state'] == "C":
+                errors.append((application, "Cannot apply to a closed vacancy"))
+            elif employee_users.get(application.employee_id) == vacancy['employer__user_id']:
+                errors.append((application, "Cannot apply to your own vacancy"))
+
+        return errors
+
+    # en listados (admin, logs) cada candidato y vacante se carga una sola vez por peticion
     def __str__(self):
-        return f"{self.employee.user.get_full_name()} - {self.vacancy.title}"
+        return f"{identity.related(self, 'employee__user').get_full_name()} - {identity.related(self, 'vacancy').title}"
     
     @property
     def can_withdraw(self):
@@ -223,6 +433,10 @@ class JobApplication(models.Model):
     @property
     def is_active(self):
         return self.status not in ["rejected", "accepted", "withdrawn"]
+
+    @classmethod
+    def can_transition(cls, previous_status, new_status):
+        return new_status in cls.STATUS_TRANSITIONS.get(previous_status, [])
     
 class ApplicationStatusHistory(models.Model):
     application = models.ForeignKey(
@@ -244,7 +458,8 @@ class ApplicationStatusHistory(models.Model):
     changed_by = models.ForeignKey(
         'users.User',
         on_delete=models.CASCADE,
-        related_name='status_changes'
+        related_name='status_changes',
+        db_constraint=False
     )
     
     changed_date = models.DateTimeField(auto_now_add=True)
@@ -254,15 +469,17 @@ class ApplicationStatusHistory(models.Model):
         help_text="Reason for status change"
     )
 
+    objects = ShardedQuerySet.as_manager()
+
     class Meta:
         verbose_name = 'Application Status History'
         verbose_name_plural = 'Application Status Histories'
         ordering = ['-changed_date']
     
     def __str__(self):
-        return f"{self.application} - {self.previous_status} → {self.new_status}"
+        return f"{identity.related(self, 'application')} - {self.previous_status} → {self.new_status}"
     
-class Interview(models.Model):
+class Interview(ValidatedModelMixin, models.Model):
     INTERVIEW_TYPES = [
         ('phone', 'Phone Interview'),
         ('video', 'Video Interview'),
@@ -277,6 +494,8 @@ class Interview(models.Model):
         ('rescheduled', 'Rescheduled')
     ]
 
+    VALIDATED_FIELDS = ['scheduled_date', 'score']
+
     application = models.ForeignKey(
         JobApplication,
         on_delete=models.CASCADE,
@@ -305,7 +524,8 @@ class Interview(models.Model):
     interviewer = models.ForeignKey(
         User,
         on_delete=models.CASCADE,
-        related_name="conducted_interviews"
+        related_name="conducted_interviews",
+        db_constraint=False
     )
 
     status = models.CharField(
@@ -328,6 +548,8 @@ class Interview(models.Model):
     created_date = models.DateTimeField(auto_now_add=True)
     updated_date = models.DateTimeField(auto_now=True)
 
+    objects = ShardedQuerySet.as_manager()
+
     class Meta:
         verbose_name = 'Interview'
         verbose_name_plural = 'Interviews'
@@ -336,7 +558,8 @@ class Interview(models.Model):
     def clean(self):
         from django.utils import timezone
         
-        if self.scheduled_date and self.scheduled_date < timezone.now():
+        # una entrevista ya pasada puede seguir editandose (feedback, score)
+        if 'scheduled_date' in self.changed_fields() and self.scheduled_date and self.scheduled_date < timezone.now():
             raise ValidationError(
                 "Interview cannot be scheduled in the past."
             )
@@ -345,13 +568,9 @@ class Interview(models.Model):
             raise ValidationError(
                 "Score must be between 1 and 10."
             )
-    
-    def save(self, *args, **kwargs):
-        self.clean()
-        super().save(*args, **kwargs)
-    
+
     def __str__(self):
-        return f"{self.application.employee.user.get_full_name()} - {self.interview_type} - {self.scheduled_date.strftime('%Y-%m-%d %H:%M')}"
+        return f"{identity.related(self, 'application__employee__user').get_full_name()} - {self.interview_type} - {self.scheduled_date.strftime('%Y-%m-%d %H:%M')}"
 
 
 class ApplicationDocument(models.Model):
@@ -391,10 +610,104 @@ class ApplicationDocument(models.Model):
     
     uploaded_date = models.DateTimeField(auto_now_add=True)
 
+    objects = ShardedQuerySet.as_manager()
+
     class Meta:
         verbose_name = 'Application Document'
         verbose_name_plural = 'Application Documents'
         ordering = ['-uploaded_date']
     
     def __str__(self):
-        return f"{self.application} - {self.document_type}"
\ No newline at end of file
+        return f"{identity.related(self, 'application')} - {self.document_type}"
+
+
+# Vacantes cerradas y postulaciones finalizadas que salieron de las tablas
+# principales. Conservan el id original y, en data, la representacion de
+# detalle que tenian al archivarse.
+class ArchivedVacancy(models.Model):
+    id = models.BigIntegerField(
+        primary_key=True
+    )
+
+    employer = models.ForeignKey(
+        EmployerProfile,
+        on_delete=models.CASCADE,
+        related_name="archived_vacancies",
+        db_constraint=False
+    )
+
+    title = models.CharField(
+        max_length=200
+    )
+
+    closed_date = models.DateTimeField(
+        null=True
+    )
+
+    archived_date = models.DateTimeField(
+        auto_now_add=True
+    )
+
+    data = models.JSONField(
+        encoder=DjangoJSONEncoder
+    )
+
+    class Meta:
+        verbose_name = "Archived Vacancy"
+        verbose_name_plural = "Archived Vacancies"
+        ordering = ["-closed_date"]
+
+    def __str__(self):
+        return f"{self.title} (archived)"
+
+
+class ArchivedApplication(models.Model):
+    id = models.BigIntegerField(
+        primary_key=True
+    )
+
+    employee = models.ForeignKey(
+        EmployeeProfile,
+        on_delete=models.CASCADE,
+        related_name="archived_applications",
+        db_constraint=False
+    )
+
+    employer = models.ForeignKey(
+        EmployerProfile,
+        on_delete=models.CASCADE,
+        related_name="archived_applications",
+        db_constraint=False
+    )
+
+    # la vacante puede estar archivada tambien
+    vacancy_id = models.BigIntegerField(
+        db_index=True
+    )
+
+    status = models.CharField(
+        max_length=20,
+        choices=JobApplication.STATUS_CHOICES
+    )
+
+    applied_date = models.DateTimeField()
+
+    last_updated = models.DateTimeField()
+
+    archived_date = models.DateTimeField(
+        auto_now_add=True
+    )
+
+    data = models.JSONField(
+        encoder=DjangoJSONEncoder
+    )
+
+    objects = ShardedQuerySet.as_manager()
+
+    class Meta:
+        verbose_name = "Archived Application"
+        verbose_name_plural = "Archived Applications"
+        ordering = ["-applied_date"]
+
+    def __str__(self):
+        return f"Application {self.pk} (archived)"
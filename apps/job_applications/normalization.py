@@ -0,0 +1,118 @@
+import difflib
+import re
+import threading
+
+from .models import Technology, TechnologyAlias
+
+# similitud minima para sugerir una tecnologia existente. Solo es una
+# sugerencia: "javac" o "scalaz" son parecidos a "java" y "scala" pero son
+# tecnologias distintas, asi que nunca se asocian ni se guardan como alias.
+FUZZY_CUTOFF = 0.8
+
+NON_ALNUM = re.compile(r'[^a-z0-9#+]+')
+
+# alias conocidos -> nombre canonico, aplicados antes de crear una tecnologia nueva
+BUILTIN_ALIASES = {
+    'js': 'Javascript',
+    'ecmascript': 'Javascript',
+    'es6': 'Javascript',
+    'ts': 'Typescript',
+    'node': 'Node.js',
+    'nodejs': 'Node.js',
+    'reactjs': 'React',
+    'vuejs': 'Vue',
+    'angularjs': 'Angular',
+    'golang': 'Go',
+    'py': 'Python',
+    'python3': 'Python',
+    'postgres': 'Postgresql',
+    'psql': 'Postgresql',
+    'k8s': 'Kubernetes',
+    'csharp': 'C#',
+    'cpp': 'C++',
+    'dotnet': '.Net',
+}
+
+
+def canonical_key(name):
+    return NON_ALNUM.sub('', (name or '').lower())
+
+
+def display_name(name):
+    name = ' '.join(name.split())
+    return BUILTIN_ALIASES.get(canonical_key(name), name.title())
+
+
+# Tabla compilada clave normalizada -> id de Technology, construida a partir de
+# los nombres existentes y de TechnologyAlias. Se invalida con cualquier cambio.
+class TechnologyResolver:
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._lookup = None
+
+    def invalidate(self):
+        self._lookup = None
+
+    def lookup(self):
+        lookup = self._lookup
+        if lookup is None:
+            lookup = {}
+            for technology_id, name in Technology.objects.order_by('id').values_list('id', 'name'):
+                lookup.setdefault(canonical_key(name), technology_id)
+            for alias, technology_id in TechnologyAlias.objects.values_list('alias', 'technology_id'):
+                lookup[alias] = technology_id
+            for alias, canonical in BUILTIN_ALIASES.items():
+                if canonical_key(canonical) in lookup:
+                    lookup.setdefault(alias, lookup[canonical_key(canonical)])
+            self._lookup = lookup
+        return lookup
+
+    def match(self, name):
+        key = canonical_key(name)
+        if not key:
+            return None
+        lookup = self.lookup()
+
+        return lookup.get(key)
+
+    # nombres de tecnologias parecidas, para "quiza quisiste decir..."
+    def suggest(self, name, limit=3):
+        key = canonical_key(name)
+        if not key:
+            return []
+        lookup = self.lookup()
+        technology_ids = []
+        for close in difflib.get_close_matches(key, lookup.keys(), n=limit * 3, cutoff=FUZZY_CUTOFF):
+            if lookup[close] not in technology_ids:
+                technology_ids.append(lookup[close])
+        technology_ids = technology_ids[:limit]
+        names = dict(Technology.objects.filter(pk__in=technology_ids).values_list('id', 'name'))
+        return [names[technology_id] for technology_id in technology_ids if technology_id in names]
+
+    def resolve(self, names):
+        technology_ids = []
+        for name in names:
+            key = canonical_key(name)
+            if not key:
+                continue
+
+            technology_id = self.match(name)
+            if technology_id is None:
+                technology, created = Technology.objects.get_or_create(name=display_name(name)[:50])
+                technology_id = technology.pk
+
+            with self._lock:
+                if self._lookup is not None:
+                    self._lookup[key] = technology_id
+            if technology_id not in technology_ids:
+                technology_ids.append(technology_id)
+
+        return list(Technology.objects.filter(pk__in=technology_ids))
+
+
+resolver = TechnologyResolver()
+
+
+def resolve_technologies(names):
+    return resolver.resolve(names)
@@ -0,0 +1,139 @@
+from django.db import transaction
+from django.db.models.signals import post_save, post_delete, pre_delete, m2m_changed
+from django.dispatch import receiver
+
+from apps.outbox.publisher import publish, publish_many
+from apps.users.models import EmployeeProfile
+from . import sharding
+from .autocomplete import index as autocomplete_index
+from .matching import index as match_index
+from .models import JobApplication, ApplicationStatusHistory, Interview, Technology, TechnologyAlias, Vacancy
+from .normalization import resolver
+from .salary import stats as salary_stats
+from .signals import bulk_status_changed
+
+
+@receiver(post_save, sender=JobApplication)
+def application_created(sender, instance, created, **kwargs):
+    if created:
+        publish('application.created', {
+            'application_id': instance.pk,
+            'vacancy_id': instance.vacancy_id,
+            'employer_id': instance.employer_id,
+            'employee_id': instance.employee_id,
+            'applied_date': instance.applied_date,
+        })
+
+
+@receiver(post_save, sender=ApplicationStatusHistory)
+def status_changed(sender, instance, created, **kwargs):
+    if created:
+        application = instance.application
+        publish('application.status_changed', {
+            'application_id': application.pk,
+            'history_id': instance.pk,
+            'vacancy_id': application.vacancy_id,
+            'employer_id': application.employer_id,
+            'employee_id': application.employee_id,
+            'previous_status': instance.previous_status,
+            'new_status': instance.new_status,
+            'applied_date': application.applied_date,
+            'changed_date': instance.changed_date,
+            'changed_by': instance.changed_by_id,
+        })
+
+
+@receiver(bulk_status_changed)
+def statuses_changed(sender, changes, **kwargs):
+    publish_many('application.status_changed', changes)
+
+
+@receiver(post_save, sender=Interview)
+def interview_scheduled(sender, instance, created, **kwargs):
+    if created:
+        publish('interview.scheduled', {
+            'interview_id': instance.pk,
+            'application_id': instance.application_id,
+            'employer_id': instance.application.employer_id,
+            'interview_type': instance.interview_type,
+            'scheduled_date': instance.scheduled_date,
+            'interviewer': instance.interviewer_id,
+        })
+
+
+# El borrado en cascada de Django solo ve la base de datos de la fila borrada;
+# las postulaciones en otros shards se borran aqui
+@receiver(pre_delete, sender=Vacancy)
+def vacancy_applications_deleted(sender, instance, **kwargs):
+    if sharding.is_sharded():
+        JobApplication.objects.using(sharding.shard_for_employer(instance.employer_id)).filter(
+            vacancy_id=instance.pk
+        ).delete()
+
+
+@receiver(pre_delete, sender=EmployeeProfile)
+def employee_applications_deleted(sender, instance, **kwargs):
+    if sharding.is_sharded():
+        for alias in sharding.shard_aliases():
+            JobApplication.objects.using(alias).filter(employee_id=instance.pk).delete()
+
+
+# Mantener el indice de matching al dia sin reconstruirlo entero
+
+@receiver(post_save, sender=Vacancy)
+def vacancy_saved(sender, instance, created, **kwargs):
+    # un id reutilizado (p. ej. tras un rollback) no hereda el empleador cacheado
+    if created:
+        sharding.forget_vacancy(instance.pk)
+    transaction.on_commit(lambda: match_index.update_vacancy(instance.pk))
+    transaction.on_commit(salary_stats.invalidate)
+
+
+@receiver(post_delete, sender=Vacancy)
+def vacancy_deleted(sender, instance, **kwargs):
+    match_index.remove_vacancy(instance.pk)
+    salary_stats.invalidate()
+    sharding.forget_vacancy(instance.pk)
+
+
+@receiver(m2m_changed, sender=Vacancy.technologies.through)
+def vacancy_technologies_changed(sender, instance, action, reverse, pk_set, **kwargs):
+    if action not in ('post_add', 'post_remove', 'post_clear'):
+        return
+    if reverse and action == 'post_clear':
+        match_index.invalidate()
+        return
+    vacancy_ids = pk_set if reverse else [instance.pk]
+    for vacancy_id in vacancy_ids:
+        transaction.on_commit(lambda vacancy_id=vacancy_id: match_index.update_vacancy(vacancy_id))
+
+
+@receiver(post_save, sender=EmployeeProfile)
+def employee_profile_saved(sender, instance, **kwargs):
+    transaction.on_commit(lambda: match_index.update_candidate(instance.pk, instance.skills))
+
+
+@receiver(post_delete, sender=EmployeeProfile)
+def employee_profile_deleted(sender, instance, **kwargs):
+    match_index.remove_candidate(instance.pk)
+
+
+@receiver([post_save, post_delete], sender=Technology)
+def technology_changed(sender, **kwargs):
+    # un nombre nuevo puede cambiar como se interpretan las skills de todos
+    resolver.invalidate()
+    match_index.invalidate()
+    transaction.on_commit(autocomplete_index.rebuild)
+
+
+@receiver([post_save, post_delete], sender=TechnologyAlias)
+def technology_alias_changed(sender, **kwargs):
+    resolver.invalidate()
+    match_index.invalidate()
+
+
+@receiver(m2m_changed, sender=Vacancy.technologies.through)
+def technology_usage_changed(sender, action, **kwargs):
+    if action in ('post_add', 'post_remove', 'post_clear'):
+        autocomplete_index.mark_usage_dirty()
+        salary_stats.invalidate()
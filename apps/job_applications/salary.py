@@ -0,0 +1,168 @@
+import threading
+import time
+from bisect import bisect_left, bisect_right
+from collections import OrderedDict
+
+from django.conf import settings
+
+from .geo import normalize_place
+from .models import Vacancy
+
+# segundos tras los que las distribuciones se recalculan aunque nadie las invalide
+STATS_TTL = getattr(settings, 'SALARY_STATS_TTL', 300)
+
+# las claves salen de la query (?currency=, ?technology=, ?location=): se
+# guardan como mucho estas combinaciones, descartando las menos usadas
+SORTED_CACHE_SIZE = getattr(settings, 'SALARY_STATS_CACHE_SIZE', 256)
+CURRENCY_CACHE_SIZE = 16
+
+PERCENTILES = (10, 25, 50, 75, 90)
+MAX_BUCKETS = 50
+
+
+# salario representativo de una vacante en centimos: el punto medio del rango,
+# o el extremo que este definido
+def representative_cents(salary_min_cents, salary_max_cents):
+    if salary_min_cents is not None and salary_max_cents is not None:
+        return (salary_min_cents + salary_max_cents) // 2
+    if salary_min_cents is not None:
+        return salary_min_cents
+    return salary_max_cents
+
+
+def percentile(values, rank):
+    if not values:
+        return None
+    # interpolacion lineal entre los dos vecinos mas cercanos
+    position = (len(values) - 1) * rank / 100
+    lower = int(position)
+    upper = min(lower + 1, len(values) - 1)
+    return values[lower] + (values[upper] - values[lower]) * (position - lower)
+
+
+def histogram(values, buckets):
+    if not values:
+        return []
+    low, high = values[0], values[-1]
+    if low == high:
+        return [{'from': low, 'to': high, 'count': len(values)}]
+
+    width = (high - low) / buckets
+    edges = [low + width * step for step in range(buckets)] + [high]
+    result = []
+    for step in range(buckets):
+        start = bisect_left(values, edges[step])
+        # el ultimo tramo incluye el maximo
+        if step == buckets - 1:
+            end = len(values)
+        else:
+            end = bisect_left(values, edges[step + 1])
+        result.append({'from': edges[step], 'to': edges[step + 1], 'count': end - start})
+    return result
+
+
+# Distribuciones de salario de las vacantes abiertas: una lectura de la base de
+# datos por moneda y, a partir de ella, un array ordenado por cada combinacion
+# tecnologia/ubicacion pedida. Percentiles e histogramas salen del array.
+class SalaryStats:
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._rows = OrderedDict()
+        self._sorted = OrderedDict()
+        self._built_at = None
+
+    def invalidate(self):
+        self._built_at = None
+
+    def _ensure(self):
+        if self._built_at is None or time.monotonic() - self._built_at > STATS_TTL:
+            with self._lock:
+                self._rows = OrderedDict()
+                self._sorted = OrderedDict()
+                self._built_at = time.monotonic()
+
+    def _get(self, cache, key):
+        with self._lock:
+            value = cache.get(key)
+            if value is not None:
+                cache.move_to_end(key)
+            return value
+
+    def _put(self, cache, key, value, size):
+        with self._lock:
+            cache[key] = value
+            cache.move_to_end(key)
+            while len(cache) > size:
+                cache.popitem(last=False)
+
+    def _load(self, currency):
+        rows = {}
+        for vacancy_id, salary_min_cents, salary_max_cents, location in Vacancy.objects.filter(
+            state="O",
+            salary_currency=currency
+        ).exclude(
+            salary_min_cents__isnull=True,
+            salary_max_cents__isnull=True
+        ).order_by().values_list('id', 'salary_min_cents', 'salary_max_cents', 'location'):
+            rows[vacancy_id] = (
+                representative_cents(salary_min_cents, salary_max_cents),
+                normalize_place(location),
+                set()
+            )
+        for vacancy_id, technology_id in Vacancy.technologies.through.objects.filter(
+            vacancy_id__in=rows.keys()
+        ).values_list('vacancy_id', 'technology_id'):
+            rows[vacancy_id][2].add(technology_id)
+        return list(rows.values())
+
+    def values(self, currency, technology_id=None, location=None):
+        self._ensure()
+        location = normalize_place(location) if location else None
+        key = (currency, technology_id, location)
+
+        values = self._get(self._sorted, key)
+        if values is not None:
+            return values
+
+        rows = self._get(self._rows, currency)
+        if rows is None:
+            rows = self._load(currency)
+            self._put(self._rows, currency, rows, CURRENCY_CACHE_SIZE)
+
+        values = sorted(
+            cents for cents, place, technologies in rows
+            if (technology_id is None or technology_id in technologies)
+            and (location is None or location in place)
+        )
+        self._put(self._sorted, key, values, SORTED_CACHE_SIZE)
+        return values
+
+    def summary(self, currency, technology_id=None, location=None, buckets=10, salary=None):
+        values = self.values(currency, technology_id, location)
+        buckets = min(max(buckets, 1), MAX_BUCKETS)
+
+        def amount(cents):
+            return None if cents is None else round(cents / 100, 2)
+
+        result = {
+            'currency': currency,
+            'count': len(values),
+            'min': amount(values[0]) if values else None,
+            'max': amount(values[-1]) if values else None,
+            'mean': amount(sum(values) / len(values)) if values else None,
+            'percentiles': {
+                f'p{rank}': amount(percentile(values, rank)) for rank in PERCENTILES
+            },
+            'histogram': [
+                {'from': amount(bucket['from']), 'to': amount(bucket['to']), 'count': bucket['count']}
+                for bucket in histogram(values, buckets)
+            ],
+        }
+        if salary is not None and values:
+            # porcentaje de vacantes que pagan como mucho salary (en centimos)
+            result['salary_percentile'] = round(100 * bisect_right(values, salary) / len(values), 1)
+        return result
+
+
+stats = SalaryStats()
@@ -2,14 +2,26 @@ from rest_framework import serializers, permissions
 from .models import (
     JobApplication,
     ApplicationDocument,
-    ApplicationStatusHistory,
     Interview,
     Technology,
     Vacancy
 )
+from . import sharding
+from .normalization import display_name, resolve_technologies, resolver
+from django.db import DEFAULT_DB_ALIAS, IntegrityError, transaction
+from django.db.models import F
 from django.utils import timezone
 
 
+def validate_currency(value):
+    value = (value or '').strip().upper()
+    if len(value) != 3 or not value.isalpha():
+        raise serializers.ValidationError(
+            "Currency must be a three-letter ISO 4217 code."
+        )
+    return value
+
+
 class TechnologySerializer(serializers.ModelSerializer):
     class Meta:
         model = Technology
@@ -24,7 +36,15 @@ class TechnologySerializer(serializers.ModelSerializer):
             raise serializers.ValidationError(
                 "The technology name has to be at least 3 characters long."
             )
-        return value.title()
+
+        # "Nodejs", "Node.Js" o "node js" son la misma tecnologia
+        existing = resolver.match(value)
+        if existing is not None and (self.instance is None or existing != self.instance.pk):
+            name = Technology.objects.filter(pk=existing).values_list('name', flat=True).first()
+            raise serializers.ValidationError(
+                f"This technology already exists as '{name}'."
+            )
+        return display_name(value)
 
 
 class VacancySerializer(serializers.ModelSerializer):
@@ -63,6 +83,9 @@ class VacancySerializer(serializers.ModelSerializer):
     salary_range = serializers.ReadOnlyField()
     is_open = serializers.ReadOnlyField()
 
+    # solo con ?near= (ver VacancyLocationFilter)
+    distance_km = serializers.SerializerMethodField()
+
     class Meta:
         model = Vacancy
         fields = [
@@ -79,6 +102,7 @@ class VacancySerializer(serializers.ModelSerializer):
             'location',
             'salary_min',
             'salary_max',
+            'salary_currency',
             'salary_range',
             'experience_required',
             'publication_date',
@@ -86,10 +110,24 @@ class VacancySerializer(serializers.ModelSerializer):
             'state',
             'status_display',
             'applications_count',
-            'is_open'
+            'is_open',
+            'distance_km'
         ]
-        read_only_fields = ['id', 'publication_date', 'employer_name', 'employer_website', 'technologies',
-            'status_display', 'modality_display', 'applications_count', 'salary_range', 'is_open']
+        read_only_fields = ['id', 'employer', 'publication_date', 'employer_name', 'employer_website', 'technologies',
+            'status_display', 'modality_display', 'applications_count', 'salary_range', 'is_open', 'distance_km']
+        # columnas que leen las propiedades del modelo (ver config.fieldsets)
+        fieldset_sources = {
+            'salary_range': ['salary_min', 'salary_max'],
+            'is_open': ['state'],
+            'distance_km': [],
+        }
+
+    def get_distance_km(self, vacancy):
+        distance = getattr(vacancy, 'distance_km', None)
+        return None if distance is None else round(distance, 1)
+
+    def validate_salary_currency(self, value):
+        return validate_currency(value)
 
     def validate_title(self, value):
         if len(value) < 5:
@@ -118,17 +156,12 @@ class VacancySerializer(serializers.ModelSerializer):
         return value
 
     def create(self, validated_data):
-        technology_names = validated_data.pop('technologies', [])
+        technology_names = validated_data.pop('technology', [])
         validated_data['employer'] = self.context['request'].user.employer_profile
 
         vacancy = super().create(validated_data)
+        vacancy.technologies.add(*resolve_technologies(technology_names))
 
-        for tech_name in technology_names:
-            technology, created = Technology.objects.get_or_create(
-                name=tech_name.title()
-            )
-            vacancy.technologies.add(technology)
-        
         return vacancy
         
     def update(self, instance, validated_data):
@@ -136,12 +169,7 @@ class VacancySerializer(serializers.ModelSerializer):
         instance = super().update(instance, validated_data)
 
         if technology_names is not None:
-            instance.technologies.clear()
-            for tech_name in technology_names:
-                technology, created = Technology.objects.get_or_create(
-                    name=tech_name.title()
-                )
-                instance.technologies.add(technology)
+            instance.technologies.set(resolve_technologies(technology_names))
 
         return instance
     
@@ -170,9 +198,14 @@ class VacancyListSerializer(serializers.ModelSerializer):
 
 class VacancyCreateSerializer(serializers.ModelSerializer):
     technology_names = serializers.ListField(
-        child=serializers.CharField(max_length=50, required=False)
+        child=serializers.CharField(max_length=50),
+        write_only=True,
+        required=False
     )
     
+    def validate_salary_currency(self, value):
+        return validate_currency(value)
+
     class Meta:
         model = Vacancy
         fields = [
@@ -184,21 +217,17 @@ class VacancyCreateSerializer(serializers.ModelSerializer):
             'location',
             'salary_min',
             'salary_max',
+            'salary_currency',
             'experience_required',
             'closing_date'
         ]
     
     def create(self, validated_data):
-        technology_names = validated_data.pop('technologies')
+        technology_names = validated_data.pop('technology_names', [])
         validated_data['employer'] = self.context['request'].user.employer_profile
         vacancy = super().create(validated_data)
+        vacancy.technologies.add(*resolve_technologies(technology_names))
 
-        for tech_name in technology_names:
-            technology, created = Technology.objects.get_or_create(
-                name=tech_name.title()
-            )
-            vacancy.technologies.add(technology)
-        
         return vacancy
     
 class JobApplicationSerializer(serializers.ModelSerializer):
@@ -212,8 +241,13 @@ class JobApplicationSerializer(serializers.ModelSerializer):
         fields = [
             'id',
             'employee',
+            'employee_name',
+            'employee_email',
             'vacancy',
+            'vacancy_title',
+            'company_name',
             'status',
+            'status_display',
             'cover_letter',
             'applied_date',
             'last_updated',
@@ -224,6 +258,11 @@ class JobApplicationSerializer(serializers.ModelSerializer):
             'is_active'
         ]
         read_only_fields = ['id', 'applied_data','last_updated', 'availability_date', 'employee_name', 'employee_email', 'vacancy_title', 'company_name', 'status_display', 'can_withdraw', 'is_active']
+        fieldset_sources = {
+            'employee_name': ['employee__user__first_name', 'employee__user__last_name'],
+            'can_withdraw': ['status'],
+            'is_active': ['status'],
+        }
         extra_kwargs = {
             'cover_letter': {'required': False},
             'notes': {'required': False, 'write_only': True},
@@ -280,9 +319,14 @@ class JobApplicationListSerializer(serializers.ModelSerializer):
             'applied_date',
             'salary_expectation'
         ]
+        fieldset_sources = {
+            'employee_name': ['employee__user__first_name', 'employee__user__last_name'],
+        }
 
 class JobApplicationCreateSerializer(serializers.ModelSerializer):
-    
+    # solo el id: el estado de la vacante se comprueba al insertar, no aqui
+    vacancy = serializers.IntegerField(source='vacancy_id', min_value=1)
+
     class Meta:
         model = JobApplication
         fields = [
@@ -291,10 +335,56 @@ class JobApplicationCreateSerializer(serializers.ModelSerializer):
             'salary_expectation',
             'availability_date'
         ]
-    
+        # la restriccion unique (employee, vacancy) de la base de datos hace de validador
+        validators = []
+
+    def validate_cover_letter(self, value):
+        if len(value) > 1000:
+            raise serializers.ValidationError(
+                "Cover letter cannot exceed 1000 characters."
+            )
+        return value
+
     def create(self, validated_data):
-        validated_data['employee'] = self.context['request'].user.employee_profile
-        return super().create(validated_data)
+        user = self.context['request'].user
+        vacancy_id = validated_data['vacancy_id']
+
+        if not hasattr(user, 'employee_profile'):
+            raise serializers.ValidationError("Only candidates can apply to vacancies.")
+
+        employer_id = sharding.employer_for_vacancy(vacancy_id)
+        if employer_id is None:
+            raise serializers.ValidationError({'vacancy': "Vacancy not found."})
+        shard = sharding.shard_for_employer(employer_id)
+
+        with sharding.atomic(shard):
+            # el UPDATE bloquea la fila de la vacante, comprueba que siga abierta
+            # y que no sea del propio usuario, y suma el contador en un solo viaje
+            opened = Vacancy.objects.filter(
+                pk=vacancy_id,
+                state="O"
+            ).exclude(
+                employer__user_id=user.id
+            ).update(applications_count=F('applications_count') + 1)
+
+            if not opened:
+                vacancy = Vacancy.objects.filter(pk=vacancy_id).values('state', 'employer__user_id').first()
+                if vacancy is None:
+                    raise serializers.ValidationError({'vacancy': "Vacancy not found."})
+                if vacancy['state'] == "C":
+                    raise serializers.ValidationError({'vacancy': "This vacancy is closed."})
+                raise serializers.ValidationError({'vacancy': "Cannot apply to your own vacancy."})
+
+            application = JobApplication(employee=user.employee_profile, employer_id=employer_id, **validated_data)
+            try:
+                with transaction.atomic(using=shard):
+                    application.save(force_insert=True, validate=False, using=shard)
+            except IntegrityError:
+                raise serializers.ValidationError(
+                    {'vacancy': "You have already applied to this vacancy."}
+                )
+
+        return application
     
 class JobApplicationUpdateSerializer(serializers.ModelSerializer):
     reason = serializers.CharField(write_only=True, required=False, max_length=500)
@@ -308,19 +398,59 @@ class JobApplicationUpdateSerializer(serializers.ModelSerializer):
             'reason': {'required': False}
         }
 
+    def validate_status(self, value):
+        # solo el candidato retira su postulacion (JobApplicationViewSet.withdraw)
+        if value == 'withdrawn' and not self.context.get('withdraw'):
+            raise serializers.ValidationError("Only the candidate can withdraw an application.")
+        if self.instance and value != self.instance.status and not JobApplication.can_transition(self.instance.status, value):
+            raise serializers.ValidationError(
+                f"Cannot change status from '{self.instance.status}' to '{value}'."
+            )
+        return value
+
     def update(self, instance, validated_data):
         reason = validated_data.pop('reason', '')
         previous_status = instance.status
 
-        instance = super().update(instance, validated_data)
+        # el historial y su evento en el outbox se confirman junto con el cambio
+        with sharding.atomic(instance._state.db or DEFAULT_DB_ALIAS):
+            instance = super().update(instance, validated_data)
 
-        if previous_status != instance.status:
-            ApplicationStatusHistory.objects.create(
-                application=instance,
-                previous_status=previous_status,
-                new_status=instance.status,
-                changed_by=self.context['request'].user,
-                reason=reason
-            )
+            if previous_status != instance.status and instance.status == 'withdrawn':
+                Vacancy.release_applications({instance.vacancy_id: 1})
 
-        return instance
\ No newline at end of file
+            if previous_status != instance.status:
+                instance.status_history.create(
+                    previous_status=previous_status,
+                    new_status=instance.status,
+                    changed_by=self.context['request'].user,
+                    reason=reason
+                )
+
+        return instance
+
+class JobApplicationBulkStatusSerializer(serializers.Serializer):
+    ids = serializers.ListField(
+        child=serializers.IntegerField(),
+        required=False,
+        max_length=10000
+    )
+    vacancy = serializers.IntegerField(required=False)
+    from_status = serializers.ChoiceField(
+        choices=JobApplication.STATUS_CHOICES,
+        required=False
+    )
+    status = serializers.ChoiceField(choices=JobApplication.STATUS_CHOICES)
+    reason = serializers.CharField(required=False, allow_blank=True, max_length=500)
+
+    def validate_status(self, value):
+        if value == 'withdrawn':
+            raise serializers.ValidationError("Only the candidate can withdraw an application.")
+        return value
+
+    def validate(self, data):
+        if not data.get('ids') and not data.get('vacancy'):
+            raise serializers.ValidationError(
+                "Provide a list of application ids or a vacancy."
+            )
+        return data
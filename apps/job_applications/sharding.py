@@ -0,0 +1,199 @@
+import heapq
+import threading
+from collections import OrderedDict
+from contextlib import ExitStack, contextmanager
+from itertools import islice
+
+from django.conf import settings
+from django.apps import apps
+from django.db import DEFAULT_DB_ALIAS, connections, transaction
+
+from apps.users.models import EmployerProfile
+from .models import JobApplication, Vacancy
+
+# Las postulaciones y sus tablas hijas se reparten por employer_id entre los
+# alias de APPLICATION_SHARDS; usuarios, vacantes y el resto de tablas viven
+# solo en el primario. Con un unico shard (por defecto) nada cambia.
+SHARDED_MODELS = {'jobapplication', 'applicationstatushistory', 'interview', 'applicationdocument', 'archivedapplication'}
+
+# cada shard numera sus filas a partir de indice * SHARD_ID_SPAN, para que los
+# ids sigan siendo unicos entre shards
+SHARD_ID_SPAN = 2 ** 40
+
+# vacante -> empleador; una vacante nunca cambia de empleador. Solo se guardan
+# las VACANCY_EMPLOYER_CACHE_SIZE mas usadas.
+VACANCY_EMPLOYER_CACHE_SIZE = getattr(settings, 'VACANCY_EMPLOYER_CACHE_SIZE', 10000)
+_vacancy_employers = OrderedDict()
+_vacancy_employers_lock = threading.Lock()
+
+
+def shard_aliases():
+    return list(getattr(settings, 'APPLICATION_SHARDS', None) or [DEFAULT_DB_ALIAS])
+
+
+def is_sharded():
+    return len(shard_aliases()) > 1
+
+
+def is_sharded_model(model):
+    return model._meta.app_label == 'job_applications' and model._meta.model_name in SHARDED_MODELS
+
+
+def shard_for_employer(employer_id):
+    aliases = shard_aliases()
+    return aliases[employer_id % len(aliases)]
+
+
+def employer_for_vacancy(vacancy_id):
+    with _vacancy_employers_lock:
+        employer_id = _vacancy_employers.get(vacancy_id)
+        if employer_id is not None:
+            _vacancy_employers.move_to_end(vacancy_id)
+            return employer_id
+
+    employer_id = Vacancy.objects.filter(pk=vacancy_id).values_list('employer_id', flat=True).first()
+    if employer_id is None:
+        return None
+    with _vacancy_employers_lock:
+        _vacancy_employers[vacancy_id] = employer_id
+        while len(_vacancy_employers) > VACANCY_EMPLOYER_CACHE_SIZE:
+            _vacancy_employers.popitem(last=False)
+    return employer_id
+
+
+def forget_vacancy(vacancy_id):
+    with _vacancy_employers_lock:
+        _vacancy_employers.pop(vacancy_id, None)
+
+
+def shard_for_vacancy(vacancy_id):
+    employer_id = employer_for_vacancy(vacancy_id)
+    return shard_for_employer(employer_id) if employer_id is not None else DEFAULT_DB_ALIAS
+
+
+def for_employer(model, employer_id):
+    if not is_sharded():
+        return model.objects.all()
+    return model.objects.using(shard_for_employer(employer_id))
+
+
+# select_related une tablas de la misma base de datos; entre shards las
+# relaciones se cargan con consultas aparte, cada una en su alias
+def with_related(queryset, *lookups):
+    if is_sharded():
+        return queryset.prefetch_related(*lookups)
+    return queryset.select_related(*lookups)
+
+
+# transaccion en el shard y en el primario a la vez, para que el outbox se
+# confirme con el cambio (el primario confirma primero)
+@contextmanager
+def atomic(alias):
+    with ExitStack() as stack:
+        stack.enter_context(transaction.atomic(using=alias))
+        if alias != DEFAULT_DB_ALIAS:
+            stack.enter_context(transaction.atomic(using=DEFAULT_DB_ALIAS))
+        yield
+
+
+# Ejecuta build(queryset) en cada shard y mezcla los resultados, ya ordenados
+# en cada shard por key, sin volver a ordenar todo.
+def fan_out(model, build, key=None, reverse=False, limit=None):
+    results = []
+    for alias in shard_aliases():
+        queryset = build(model.objects.using(alias))
+        if limit is not None:
+            queryset = queryset[:limit]
+        results.append(list(queryset))
+
+    if len(results) == 1:
+        return results[0]
+    if key is None:
+        merged = (row for rows in results for row in rows)
+    else:
+        merged = heapq.merge(*results, key=key, reverse=reverse)
+    return list(islice(merged, limit))
+
+
+# busca una fila por pk recorriendo los shards (p. ej. un candidato que abre una
+# postulacion suya sin saber de que empleador es)
+def locate(model, build, pk):
+    for alias in shard_aliases():
+        instance = build(model.objects.using(alias)).filter(pk=pk).first()
+        if instance is not None:
+            return instance
+    return None
+
+
+def reserve_id_ranges(using, **kwargs):
+    aliases = shard_aliases()
+    if using not in aliases or aliases.index(using) == 0:
+        return
+    start = aliases.index(using) * SHARD_ID_SPAN
+    connection = connections[using]
+
+    with connection.cursor() as cursor:
+        for model in apps.get_app_config('job_applications').get_models():
+            if not is_sharded_model(model):
+                continue
+            table = model._meta.db_table
+            cursor.execute(f'SELECT MAX(id) FROM {connection.ops.quote_name(table)}')
+            if (cursor.fetchone()[0] or 0) >= start:
+                continue
+            if connection.vendor == 'sqlite':
+                cursor.execute('DELETE FROM sqlite_sequence WHERE name = %s', [table])
+                cursor.execute('INSERT INTO sqlite_sequence (name, seq) VALUES (%s, %s)', [table, start])
+            elif connection.vendor == 'postgresql':
+                cursor.execute("SELECT setval(pg_get_serial_sequence(%s, 'id'), %s)", [table, start])
+
+
+class ShardRouter:
+
+    def _shard_for_instance(self, instance):
+        if instance is None:
+            return None
+        # una fila sin guardar ya puede traer _state.db: se lo pone el primer
+        # ForeignKey asignado (employee=...) y no es su shard
+        if isinstance(instance, JobApplication):
+            if not instance._state.adding and instance._state.db in shard_aliases():
+                return instance._state.db
+            if instance.employer_id is not None:
+                return shard_for_employer(instance.employer_id)
+            if instance.vacancy_id is not None:
+                return shard_for_vacancy(instance.vacancy_id)
+            return None
+        if is_sharded_model(type(instance)):
+            if not instance._state.adding and instance._state.db in shard_aliases():
+                return instance._state.db
+            field = type(instance)._meta.get_field('application')
+            if field.is_cached(instance):
+                return self._shard_for_instance(instance.application)
+            return None
+        # relaciones inversas: vacancy.job_applications, employer.received_applications
+        if isinstance(instance, Vacancy):
+            return shard_for_employer(instance.employer_id)
+        if isinstance(instance, EmployerProfile):
+            return shard_for_employer(instance.pk)
+        return None
+
+    def _route(self, model, hints):
+        if not is_sharded() or not is_sharded_model(model):
+            return None
+        return self._shard_for_instance(hints.get('instance'))
+
+    def db_for_read(self, model, **hints):
+        return self._route(model, hints)
+
+    def db_for_write(self, model, **hints):
+        return self._route(model, hints)
+
+    def allow_relation(self, obj1, obj2, **hints):
+        if is_sharded_model(type(obj1)) and is_sharded_model(type(obj2)):
+            return obj1._state.db == obj2._state.db
+        return True
+
+    # los shards secundarios solo tienen las tablas de postulaciones
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        if db == DEFAULT_DB_ALIAS or db not in shard_aliases():
+            return None
+        return app_label == 'job_applications' and model_name in SHARDED_MODELS
@@ -0,0 +1,6 @@
+from django.dispatch import Signal
+
+# Enviada tras una transicion masiva de estados, que no dispara post_save.
+# `changes` es una lista de dicts con application_id, history_id, vacancy_id,
+# employer_id, employee_id, previous_status, new_status, applied_date, changed_date y changed_by.
+bulk_status_changed = Signal()
@@ -1,3 +1,617 @@
-from django.test import TestCase
+import asyncio
+import importlib
+import threading
+from contextlib import ExitStack
+from datetime import timedelta
+from unittest import mock
 
-# Create your tests here.
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.db import DEFAULT_DB_ALIAS, DatabaseError, connections
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from apps.users.models import EmployeeProfile, EmployerProfile, User
+from . import archive, autocomplete, matching, salary, sharding
+from .geo import encode_geohash
+from .matching import MatchIndex
+from .models import (
+    ApplicationStatusHistory,
+    ArchivedApplication,
+    ArchivedVacancy,
+    Interview,
+    JobApplication,
+    Technology,
+    TechnologyAlias,
+    Vacancy
+)
+from .normalization import resolve_technologies, resolver
+
+
+def create_employer(username, company_name='ACME'):
+    user = User.objects.create_user(username=username, email=f'{username}@example.com', password='pass1234', role='employer')
+    return EmployerProfile.objects.create(user=user, company_name=company_name)
+
+
+def create_employee(username, skills='Python, Django'):
+    user = User.objects.create_user(
+        username=username, email=f'{username}@example.com', password='pass1234', role='employee',
+        first_name=username.title(), last_name='Doe'
+    )
+    return EmployeeProfile.objects.create(user=user, skills=skills)
+
+
+def create_vacancy(employer, title='Backend developer', **fields):
+    return Vacancy.objects.create(
+        employer=employer, title=title, description='Build and run our APIs.' * 2, location='Madrid', **fields
+    )
+
+
+def client_for(user):
+    client = APIClient()
+    client.force_authenticate(user)
+    return client
+
+
+# postulaciones de todos los shards, por id
+def all_applications(**filters):
+    return sharding.fan_out(
+        JobApplication, lambda queryset: queryset.filter(**filters).order_by('pk'), key=lambda application: application.pk
+    )
+
+
+class ApplicationPermissionsTests(TestCase):
+    # con DATABASE_SHARDS las postulaciones van tambien a los shards
+    databases = '__all__'
+
+    def setUp(self):
+        self.employer = create_employer('acme')
+        self.employee = create_employee('jane')
+        self.vacancy = create_vacancy(self.employer)
+        self.application = JobApplication.objects.create(employee=self.employee, vacancy=self.vacancy, notes='strong')
+        self.candidate = client_for(self.employee.user)
+        self.recruiter = client_for(self.employer.user)
+
+    def test_candidate_cannot_change_status_or_notes(self):
+        response = self.candidate.patch(
+            f'/applications/{self.application.pk}/', {'status': 'accepted', 'notes': 'self-note'}, format='json'
+        )
+        self.assertEqual(response.status_code, 403)
+        self.application.refresh_from_db()
+        self.assertEqual(self.application.status, 'pending')
+        self.assertEqual(self.application.notes, 'strong')
+
+    def test_candidate_cannot_delete(self):
+        response = self.candidate.delete(f'/applications/{self.application.pk}/')
+        self.assertEqual(response.status_code, 403)
+        self.assertTrue(all_applications(pk=self.application.pk))
+
+    def test_candidate_withdraws(self):
+        response = self.candidate.post(f'/applications/{self.application.pk}/withdraw/', {'reason': 'took another offer'}, format='json')
+        self.assertEqual(response.status_code, 200, response.content)
+        self.assertEqual(response.data['status'], 'withdrawn')
+        self.assertEqual(self.application.status_history.get().new_status, 'withdrawn')
+        response = self.candidate.post(f'/applications/{self.application.pk}/withdraw/')
+        self.assertEqual(response.status_code, 400)
+
+    def test_employer_updates_but_cannot_withdraw(self):
+        response = self.recruiter.patch(f'/applications/{self.application.pk}/', {'status': 'reviewing', 'notes': 'call'}, format='json')
+        self.assertEqual(response.status_code, 200, response.content)
+        response = self.recruiter.patch(f'/applications/{self.application.pk}/', {'status': 'withdrawn'}, format='json')
+        self.assertEqual(response.status_code, 400)
+        response = self.recruiter.post(f'/applications/{self.application.pk}/withdraw/')
+        self.assertEqual(response.status_code, 403)
+
+    def test_other_employer_cannot_update(self):
+        other = client_for(create_employer('globex', 'Globex').user)
+        response = other.patch(f'/applications/{self.application.pk}/', {'status': 'rejected'}, format='json')
+        self.assertEqual(response.status_code, 404)
+
+
+# cada hilo hace su peticion con su propia conexion; todos arrancan a la vez
+def run_concurrently(requests):
+    barrier = threading.Barrier(len(requests))
+    responses = [None] * len(requests)
+
+    def run(index, request):
+        try:
+            barrier.wait()
+            responses[index] = request()
+        finally:
+            connections.close_all()
+
+    threads = [threading.Thread(target=run, args=(index, request)) for index, request in enumerate(requests)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return responses
+
+
+class ApplyConcurrencyTests(TransactionTestCase):
+    databases = '__all__'
+
+    def setUp(self):
+        self.employer = create_employer('acme')
+        self.vacancy = create_vacancy(self.employer)
+
+    def apply(self, employee):
+        client = client_for(employee.user)
+        return lambda: client.post('/applications/', {'vacancy': self.vacancy.pk}, format='json')
+
+    def test_parallel_duplicates_create_one_application(self):
+        employee = create_employee('jane')
+        responses = run_concurrently([self.apply(employee) for _ in range(8)])
+
+        self.assertEqual(sorted(response.status_code for response in responses), [201] + [400] * 7)
+        self.assertEqual(len(all_applications(vacancy=self.vacancy)), 1)
+        self.vacancy.refresh_from_db()
+        self.assertEqual(self.vacancy.applications_count, 1)
+
+    def test_parallel_candidates_are_all_counted(self):
+        employees = [create_employee(f'candidate{index}') for index in range(8)]
+        responses = run_concurrently([self.apply(employee) for employee in employees])
+
+        self.assertEqual([response.status_code for response in responses], [201] * 8)
+        self.vacancy.refresh_from_db()
+        self.assertEqual(self.vacancy.applications_count, 8)
+
+    # 240 peticiones a la vez y como mucho una postulacion por candidato
+    def test_load_is_capped_by_the_unique_constraint(self):
+        employees = [create_employee(f'candidate{index}') for index in range(24)]
+        requests = []
+        for employee in employees:
+            # un 500 se devuelve como respuesta en vez de romper el hilo
+            client = APIClient(raise_request_exception=False)
+            client.force_authenticate(employee.user)
+            requests += [lambda client=client: client.post('/applications/', {'vacancy': self.vacancy.pk}, format='json')] * 10
+        responses = run_concurrently(requests)
+
+        self.assertEqual(sorted(response.status_code for response in responses), [201] * 24 + [400] * 216)
+        for response in responses:
+            self.assertNotIn(b'database is locked', response.content)
+        rows = [JobApplication.objects.using(alias).filter(vacancy_id=self.vacancy.pk).count() for alias in settings.APPLICATION_SHARDS]
+        self.assertEqual(sum(rows), 24)
+        applicants = sorted(application.employee_id for application in all_applications(vacancy=self.vacancy))
+        self.assertEqual(applicants, sorted(employee.pk for employee in employees))
+        self.vacancy.refresh_from_db()
+        self.assertEqual(self.vacancy.applications_count, 24)
+
+
+class ApplicationsCountTests(TestCase):
+    databases = '__all__'
+
+    def setUp(self):
+        self.employer = create_employer('acme')
+        self.vacancy = create_vacancy(self.employer)
+        self.employees = [create_employee(f'candidate{index}') for index in range(3)]
+        for employee in self.employees:
+            response = client_for(employee.user).post('/applications/', {'vacancy': self.vacancy.pk}, format='json')
+            self.assertEqual(response.status_code, 201, response.content)
+        self.applications = all_applications()
+
+    def count(self):
+        self.vacancy.refresh_from_db()
+        return self.vacancy.applications_count
+
+    def test_withdraw_destroy_and_archive_release_the_counter(self):
+        self.assertEqual(self.count(), 3)
+
+        withdrawn = self.applications[0]
+        self.assertEqual(client_for(self.employees[0].user).post(f'/applications/{withdrawn.pk}/withdraw/').status_code, 200)
+        self.assertEqual(self.count(), 2)
+
+        # una postulacion ya retirada no se vuelve a restar
+        recruiter = client_for(self.employer.user)
+        self.assertEqual(recruiter.delete(f'/applications/{withdrawn.pk}/').status_code, 204)
+        self.assertEqual(self.count(), 2)
+
+        self.assertEqual(recruiter.delete(f'/applications/{self.applications[1].pk}/').status_code, 204)
+        self.assertEqual(self.count(), 1)
+
+        rejected = self.applications[2]
+        recruiter.patch(f'/applications/{rejected.pk}/', {'status': 'rejected'}, format='json')
+        sharding.for_employer(JobApplication, self.employer.pk).filter(pk=rejected.pk).update(last_updated=timezone.now() - timedelta(days=400))
+        archive.archive_applications(timezone.now() - timedelta(days=180))
+        self.assertEqual(self.count(), 0)
+
+
+class ArchiveTests(TestCase):
+    databases = '__all__'
+
+    def setUp(self):
+        self.employer = create_employer('acme')
+        self.employee = create_employee('jane')
+        self.vacancy = create_vacancy(self.employer)
+        self.application = JobApplication.objects.create(employee=self.employee, vacancy=self.vacancy, notes='strong')
+        ApplicationStatusHistory.objects.create(
+            application=self.application, previous_status='pending', new_status='rejected',
+            changed_by=self.employer.user, reason='no visa'
+        )
+        Interview.objects.create(
+            application=self.application, scheduled_date=timezone.now() + timedelta(days=1),
+            interviewer=self.employer.user, feedback='weak on SQL', score=3
+        )
+        Vacancy.objects.filter(pk=self.vacancy.pk).update(
+            state="C", closed_date=timezone.now() - timedelta(days=400), applications_count=1
+        )
+        self.cutoff = timezone.now() - timedelta(days=180)
+
+    def archived_applications(self):
+        return sharding.fan_out(ArchivedApplication, lambda queryset: queryset.order_by('pk'), key=lambda archived: archived.pk)
+
+    def test_archived_detail_hides_private_fields_from_the_candidate(self):
+        archive.archive_vacancies(self.cutoff)
+        url = f'/applications/{self.application.pk}/'
+
+        data = client_for(self.employee.user).get(url).data
+        self.assertTrue(data['archived'])
+        self.assertNotIn('notes', data)
+        self.assertEqual(data['status_history'][0]['new_status'], 'rejected')
+        self.assertNotIn('reason', data['status_history'][0])
+        self.assertNotIn('changed_by_id', data['status_history'][0])
+        self.assertNotIn('feedback', data['interviews'][0])
+        self.assertNotIn('score', data['interviews'][0])
+
+        data = client_for(self.employer.user).get(url).data
+        self.assertEqual(data['notes'], 'strong')
+        self.assertEqual(data['status_history'][0]['reason'], 'no visa')
+        self.assertEqual(data['interviews'][0]['feedback'], 'weak on SQL')
+
+    def test_vacancy_archive_resumes_after_failing_on_the_primary(self):
+        with mock.patch.object(ArchivedVacancy.objects, 'bulk_create', side_effect=DatabaseError("primary down")):
+            with self.assertRaises(DatabaseError):
+                archive.archive_vacancies(self.cutoff)
+
+        # las postulaciones ya estan archivadas; el contador no se toco
+        self.assertEqual(all_applications(), [])
+        self.assertEqual(len(self.archived_applications()), 1)
+        self.vacancy.refresh_from_db()
+        self.assertEqual(self.vacancy.applications_count, 1)
+
+        self.assertEqual(archive.archive_vacancies(self.cutoff), (1, 0))
+        self.assertFalse(Vacancy.objects.filter(pk=self.vacancy.pk).exists())
+        self.assertTrue(ArchivedVacancy.objects.filter(pk=self.vacancy.pk).exists())
+        self.assertEqual(len(self.archived_applications()), 1)
+        self.assertEqual(archive.archive_vacancies(self.cutoff), (0, 0))
+
+    def test_vacancy_reopened_mid_run_is_kept(self):
+        archive_application_ids = archive.archive_application_ids
+
+        def reopen(*args, **kwargs):
+            archived = archive_application_ids(*args, **kwargs)
+            Vacancy.objects.filter(pk=self.vacancy.pk).update(state="O")
+            return archived
+
+        with mock.patch.object(archive, 'archive_application_ids', side_effect=reopen):
+            self.assertEqual(archive.archive_vacancies(self.cutoff), (0, 1))
+        self.assertTrue(Vacancy.objects.filter(pk=self.vacancy.pk).exists())
+        self.assertFalse(ArchivedVacancy.objects.exists())
+
+
+class MatchIndexRefreshTests(TransactionTestCase):
+
+    def setUp(self):
+        self.python = Technology.objects.create(name='Python')
+        self.go = Technology.objects.create(name='Go')
+        self.vacancy = create_vacancy(create_employer('acme'))
+        self.vacancy.technologies.add(self.python)
+        self.index = MatchIndex()
+
+    def test_expired_index_is_served_while_it_rebuilds(self):
+        bits = 1 << self.python.pk
+        self.assertEqual(self.index.top_vacancies(bits), [(self.vacancy.pk, 1.0)])
+
+        # un cambio hecho por otro proceso: no pasa por las señales
+        other = create_vacancy(self.vacancy.employer, title='Data engineer')
+        Vacancy.technologies.through.objects.create(vacancy=other, technology=self.python)
+        self.index._built_at -= 3600
+
+        self.assertEqual(self.index.top_vacancies(bits), [(self.vacancy.pk, 1.0)])
+        rebuilding = self.index._rebuilding
+        self.assertIsNotNone(rebuilding)
+        rebuilding.join()
+        self.assertEqual(sorted(self.index.top_vacancies(bits)), sorted([(self.vacancy.pk, 1.0), (other.pk, 1.0)]))
+
+    def test_changes_during_rebuild_are_kept(self):
+        create_employee('jane', skills='Python')
+        self.index.ensure()
+        parse_skills = matching.parse_skills
+
+        # la vacante cambia despues de que la reconstruccion leyera las vacantes
+        def change_vacancy(*args):
+            if not self.vacancy.technologies.filter(pk=self.go.pk).exists():
+                self.vacancy.technologies.set([self.go])
+                self.index.update_vacancy(self.vacancy.pk)
+            return parse_skills(*args)
+
+        with mock.patch.object(matching, 'parse_skills', change_vacancy):
+            self.index.invalidate()
+            self.index.refresh().join()
+
+        self.assertEqual(self.index.top_vacancies(1 << self.go.pk), [(self.vacancy.pk, 1.0)])
+        self.assertEqual(self.index.top_vacancies(1 << self.python.pk), [])
+
+
+class AutocompleteWarmTests(TransactionTestCase):
+
+    def test_asgi_import_does_not_touch_the_database(self):
+        Technology.objects.create(name='Django')
+        autocomplete.index.invalidate()
+
+        # uvicorn importa el modulo con el event loop ya en marcha
+        async def load():
+            import config.asgi
+            importlib.reload(config.asgi)
+
+        asyncio.run(load())
+        for thread in threading.enumerate():
+            if thread.name == 'autocomplete-warm':
+                thread.join()
+        self.assertIsNotNone(autocomplete.index._built_at)
+        self.assertEqual([entry['name'] for entry in autocomplete.index.search('dj')], ['Django'])
+
+
+class TechnologyNormalizationTests(TestCase):
+
+    def setUp(self):
+        self.java = Technology.objects.create(name='Java')
+        self.scala = Technology.objects.create(name='Scala')
+        resolver.invalidate()
+
+    def test_similar_names_are_new_technologies(self):
+        technologies = resolve_technologies(['javac', 'Scalaz', 'JAVA'])
+        self.assertEqual(sorted(technology.name for technology in technologies), ['Java', 'Javac', 'Scalaz'])
+        self.assertFalse(TechnologyAlias.objects.exists())
+
+    def test_similar_names_can_be_created(self):
+        client = client_for(create_employer('acme').user)
+        response = client.post('/technologies/', {'name': 'javac'}, format='json')
+        self.assertEqual(response.status_code, 201, response.content)
+        response = client.post('/technologies/', {'name': 'JAVA'}, format='json')
+        self.assertEqual(response.status_code, 400)
+
+    def test_typos_get_suggestions(self):
+        self.assertEqual(resolver.match('jaava'), None)
+        self.assertEqual(resolver.suggest('jaava'), ['Java'])
+        response = client_for(create_employee('jane').user).get('/vacancies/salary-stats/', {'technology': 'scalla'})
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.data['suggestions'], ['Scala'])
+
+
+class SalaryStatsCacheTests(TestCase):
+
+    def setUp(self):
+        create_vacancy(create_employer('acme'), salary_min=30000, salary_max=50000)
+        self.stats = salary.SalaryStats()
+
+    @mock.patch.object(salary, 'SORTED_CACHE_SIZE', 3)
+    @mock.patch.object(salary, 'CURRENCY_CACHE_SIZE', 2)
+    def test_cache_is_bounded_by_least_recent_use(self):
+        self.assertEqual(self.stats.values('USD')[0], 4000000)
+        for index in range(20):
+            self.stats.values('USD', location=f'nowhere {index}')
+            self.stats.values(f'X{index:02d}')
+            # la distribucion mas pedida no se descarta
+            self.stats.values('USD')
+
+        self.assertEqual(len(self.stats._sorted), 3)
+        self.assertEqual(len(self.stats._rows), 2)
+        self.assertIn(('USD', None, None), self.stats._sorted)
+        with self.assertNumQueries(0):
+            self.assertEqual(self.stats.values('USD'), [4000000])
+
+
+class DeferredFieldTrackingTests(TestCase):
+
+    def setUp(self):
+        self.vacancy = create_vacancy(create_employer('acme'), salary_min=30000, salary_max=50000)
+
+    def partial(self):
+        return Vacancy.objects.only('id', 'salary_min', 'salary_max').get(pk=self.vacancy.pk)
+
+    # leer un campo diferido recarga solo ese campo
+    def test_pending_edits_survive_loading_a_deferred_field(self):
+        vacancy = self.partial()
+        vacancy.salary_min = 40000
+        self.assertEqual(vacancy.location, 'Madrid')
+
+        self.assertEqual(vacancy.changed_fields(), {'salary_min'})
+        vacancy.save()
+        self.vacancy.refresh_from_db()
+        self.assertEqual(self.vacancy.salary_min_cents, 4000000)
+
+    def test_invalid_edit_is_still_validated(self):
+        vacancy = self.partial()
+        vacancy.salary_min = 90000
+        vacancy.title
+        with self.assertRaises(ValidationError):
+            vacancy.save()
+
+
+# centro junto al ecuador y al meridiano 0: el radio cruza cuatro celdas de geohash
+class VacancyLocationFilterTests(TestCase):
+    near = {'near': '0.01,0.01', 'radius_km': 10}
+
+    def setUp(self):
+        employer = create_employer('acme')
+        self.client = client_for(create_employee('jane').user)
+        self.center = self.place(create_vacancy(employer, 'Center'), 0.01, 0.01)
+        # 9.4 km, en la celda vecina al otro lado del ecuador y del meridiano
+        self.other_cell = self.place(create_vacancy(employer, 'Other cell'), -0.05, -0.05)
+        # 9.95 km, dentro de la caja por poco
+        self.box_edge = self.place(create_vacancy(employer, 'Box edge'), 0.0995, 0.01)
+        # 10.06 km, fuera de la caja
+        self.outside_box = self.place(create_vacancy(employer, 'Outside box'), 0.1005, 0.01)
+        # 11 km, en la esquina de la caja pero fuera del radio
+        self.box_corner = self.place(create_vacancy(employer, 'Box corner'), 0.08, 0.08)
+        self.remote = self.place(create_vacancy(employer, 'Anywhere', modality='remote'), None, None)
+
+    def place(self, vacancy, latitude, longitude):
+        geohash = '' if latitude is None else encode_geohash(latitude, longitude)
+        Vacancy.objects.filter(pk=vacancy.pk).update(latitude=latitude, longitude=longitude, geohash=geohash)
+        return vacancy.pk
+
+    def search(self, **params):
+        response = self.client.get('/vacancies/', {**self.near, **params})
+        self.assertEqual(response.status_code, 200)
+        results = response.data['results'] if isinstance(response.data, dict) else response.data
+        return [(vacancy['id'], vacancy['distance_km']) for vacancy in results]
+
+    def test_nearest_first_with_remote_last(self):
+        self.assertEqual(self.search(), [
+            (self.center, 0.0), (self.other_cell, 9.4), (self.box_edge, 10.0), (self.remote, None)
+        ])
+
+    def test_include_remote_false(self):
+        self.assertEqual([pk for pk, _ in self.search(include_remote='false')], [self.center, self.other_cell, self.box_edge])
+
+    def test_radius_query_uses_the_indexes(self):
+        with CaptureQueriesContext(connections[DEFAULT_DB_ALIAS]) as queries:
+            self.search()
+        searches = [query['sql'] for query in queries if '"geohash" >=' in query['sql']]
+        self.assertTrue(searches)
+        with connections[DEFAULT_DB_ALIAS].cursor() as cursor:
+            for sql in searches:
+                cursor.execute(f'EXPLAIN QUERY PLAN {sql}')
+                plan = [row[-1] for row in cursor.fetchall()]
+                self.assertIn('MULTI-INDEX OR', plan)
+                self.assertFalse([step for step in plan if step.startswith('SCAN job_applications_vacancy')], plan)
+                self.assertTrue([step for step in plan if '(modality=?)' in step], plan)
+
+
+LOCAL_SHARD = 'shard_local'
+
+# Un segundo shard SQLite solo para los tests, configurado o no DATABASE_SHARDS.
+# Se da de alta al importar el modulo para que el runner cree su base de datos.
+connections.settings.setdefault(LOCAL_SHARD, {
+    **connections.settings[DEFAULT_DB_ALIAS],
+    'NAME': settings.BASE_DIR / f'{LOCAL_SHARD}.sqlite3',
+    'TEST': {**connections.settings[DEFAULT_DB_ALIAS]['TEST'], 'NAME': settings.BASE_DIR / f'test_{LOCAL_SHARD}.sqlite3'},
+})
+
+
+# los empleadores con id impar van a shard_local
+@override_settings(APPLICATION_SHARDS=[DEFAULT_DB_ALIAS, LOCAL_SHARD])
+class LocalShardTests(TransactionTestCase):
+    databases = {DEFAULT_DB_ALIAS, LOCAL_SHARD}
+
+    def setUp(self):
+        sharding.reserve_id_ranges(LOCAL_SHARD)
+        # flush reinicia los ids: una vacante nueva puede reutilizar el de otra
+        sharding._vacancy_employers.clear()
+        employers = [create_employer('acme'), create_employer('globex', 'Globex')]
+        self.local, self.primary = sorted(employers, key=lambda employer: employer.pk % 2 == 0)
+        self.local_vacancy = create_vacancy(self.local)
+        self.primary_vacancy = create_vacancy(self.primary)
+        self.employee = create_employee('jane')
+        self.candidate = client_for(self.employee.user)
+
+    def apply(self, vacancy):
+        response = self.candidate.post('/applications/', {'vacancy': vacancy.pk}, format='json')
+        self.assertEqual(response.status_code, 201, response.content)
+        return response
+
+    def test_applications_live_in_their_employer_shard(self):
+        self.apply(self.local_vacancy)
+        self.apply(self.primary_vacancy)
+
+        local = JobApplication.objects.using(LOCAL_SHARD).get()
+        primary = JobApplication.objects.using(DEFAULT_DB_ALIAS).get()
+        self.assertEqual((local.vacancy_id, primary.vacancy_id), (self.local_vacancy.pk, self.primary_vacancy.pk))
+        self.assertGreaterEqual(local.pk, sharding.SHARD_ID_SPAN)
+        self.assertLess(primary.pk, sharding.SHARD_ID_SPAN)
+
+        # el candidato ve las dos; cada empleador solo la suya
+        listed = self.candidate.get('/applications/').data
+        listed = listed['results'] if isinstance(listed, dict) else listed
+        self.assertEqual(sorted(item['id'] for item in listed), sorted([local.pk, primary.pk]))
+        recruiter = client_for(self.local.user)
+        self.assertEqual(recruiter.get(f'/applications/{local.pk}/').status_code, 200)
+        self.assertEqual(recruiter.get(f'/applications/{primary.pk}/').status_code, 404)
+
+        self.assertEqual(self.candidate.post(f'/applications/{local.pk}/withdraw/').status_code, 200)
+        self.assertEqual(local.status_history.get().new_status, 'withdrawn')
+        self.local_vacancy.refresh_from_db()
+        self.assertEqual(self.local_vacancy.applications_count, 0)
+
+    @mock.patch.object(sharding, 'VACANCY_EMPLOYER_CACHE_SIZE', 2)
+    def test_vacancy_employer_cache_is_bounded(self):
+        vacancies = [self.local_vacancy, self.primary_vacancy] + [create_vacancy(self.local) for _ in range(3)]
+        for vacancy in vacancies:
+            self.assertEqual(sharding.employer_for_vacancy(vacancy.pk), vacancy.employer_id)
+        self.assertEqual(list(sharding._vacancy_employers), [vacancies[-2].pk, vacancies[-1].pk])
+
+        with self.assertNumQueries(0):
+            sharding.employer_for_vacancy(vacancies[-1].pk)
+        vacancies[-1].delete()
+        self.assertNotIn(vacancies[-1].pk, sharding._vacancy_employers)
+        self.assertIsNone(sharding.employer_for_vacancy(vacancies[-1].pk))
+
+
+# Consultas por lectura de postulaciones, sumando todas las bases de datos. El
+# usuario y sus perfiles se cargan al autenticar; despues, sin shards, cada
+# lectura es un join, y con shards la lectura mas un salto por relacion que
+# no este ya en el mapa de identidad.
+class ApplicationQueryCountMixin:
+    counts = {}
+
+    def setUp(self):
+        super().setUp()
+        self.employer = create_employer('acme')
+        vacancies = [create_vacancy(self.employer), create_vacancy(self.employer, title='Frontend developer')]
+        self.applications = [
+            JobApplication.objects.create(employee=create_employee(f'candidate{index}'), vacancy=vacancies[index % 2])
+            for index in range(3)
+        ]
+
+    def assertQueries(self, action, request):
+        # un usuario recien cargado, como en cada peticion real
+        client = client_for(User.objects.get(pk=self.employer.user_id))
+        with ExitStack() as stack:
+            captured = [stack.enter_context(CaptureQueriesContext(connections[alias])) for alias in self.databases]
+            response = request(client)
+        self.assertEqual(response.status_code, 200, response.content)
+        self.assertEqual(sum(len(queries) for queries in captured), self.counts[action], action)
+        return response.data
+
+    def test_list(self):
+        data = self.assertQueries('list', lambda client: client.get('/applications/'))
+        data = data['results'] if isinstance(data, dict) else data
+        self.assertEqual({item['company_name'] for item in data}, {'ACME'})
+        self.assertEqual(len(data), 3)
+
+    def test_detail(self):
+        application = self.applications[0]
+        data = self.assertQueries('detail', lambda client: client.get(f'/applications/{application.pk}/'))
+        self.assertEqual(data['employee_name'], 'Candidate0 Doe')
+
+    def test_batch(self):
+        requests = [
+            {'id': 'list', 'path': '/applications/'},
+            {'id': 'detail', 'path': f'/applications/{self.applications[1].pk}/'},
+            {'id': 'titles', 'path': '/applications/?fields=id,vacancy_title'},
+        ]
+        data = self.assertQueries('batch', lambda client: client.post('/batch/', {'requests': requests}, format='json'))
+        self.assertEqual([response['status'] for response in data['responses']], [200, 200, 200])
+
+
+@override_settings(APPLICATION_SHARDS=[DEFAULT_DB_ALIAS])
+class ApplicationQueryCountTests(ApplicationQueryCountMixin, TestCase):
+    databases = {DEFAULT_DB_ALIAS}
+    counts = {'list': 3, 'detail': 3, 'batch': 5}
+
+
+# candidatos, sus usuarios y vacantes: un salto cada uno en la primera lectura;
+# el empleador ya esta en el mapa y las demas sub-peticiones no cargan nada
+@override_settings(APPLICATION_SHARDS=[DEFAULT_DB_ALIAS, LOCAL_SHARD])
+class ShardedApplicationQueryCountTests(ApplicationQueryCountMixin, TransactionTestCase):
+    databases = {DEFAULT_DB_ALIAS, LOCAL_SHARD}
+    counts = {'list': 6, 'detail': 6, 'batch': 8}
+
+    def setUp(self):
+        sharding.reserve_id_ranges(LOCAL_SHARD)
+        sharding._vacancy_employers.clear()
+        super().setUp()
@@ -0,0 +1,80 @@
+from django.utils import timezone
+
+from . import sharding
+from .models import JobApplication, ApplicationStatusHistory
+from .signals import bulk_status_changed
+
+BULK_TRANSITION_LIMIT = 10000
+
+
+def bulk_transition(user, application_ids, new_status, reason=''):
+    application_ids = list(dict.fromkeys(application_ids))[:BULK_TRANSITION_LIMIT]
+    results = {application_id: 'not_found' for application_id in application_ids}
+    now = timezone.now()
+
+    employer_id = user.employer_profile.pk
+    applications = sharding.for_employer(JobApplication, employer_id)
+    histories = sharding.for_employer(ApplicationStatusHistory, employer_id)
+
+    with sharding.atomic(sharding.shard_for_employer(employer_id)):
+        # una sola consulta comprueba existencia y propiedad
+        rows = list(
+            applications
+            .select_for_update()
+            .filter(pk__in=application_ids, employer_id=employer_id)
+            .values_list('id', 'status', 'vacancy_id', 'employer_id', 'employee_id', 'applied_date')
+        )
+
+        allowed_from = [
+            status for status, targets in JobApplication.STATUS_TRANSITIONS.items()
+            if new_status in targets
+        ]
+
+        changed = []
+        for application_id, status, vacancy_id, employer_id, employee_id, applied_date in rows:
+            if status == new_status:
+                results[application_id] = 'unchanged'
+            elif status not in allowed_from:
+                results[application_id] = 'invalid_transition'
+            else:
+                results[application_id] = 'updated'
+                changed.append({
+                    'application_id': application_id,
+                    'vacancy_id': vacancy_id,
+                    'employer_id': employer_id,
+                    'employee_id': employee_id,
+                    'previous_status': status,
+                    'new_status': new_status,
+                    'applied_date': applied_date,
+                    'changed_date': now,
+                    'changed_by': user.pk,
+                })
+
+        if changed:
+            applications.filter(
+                pk__in=[change['application_id'] for change in changed],
+                status__in=allowed_from
+            ).update(status=new_status, last_updated=now)
+
+            created = histories.bulk_create(
+                [
+                    ApplicationStatusHistory(
+                        application_id=change['application_id'],
+                        previous_status=change['previous_status'],
+                        new_status=new_status,
+                        changed_by=user,
+                        reason=reason
+                    )
+                    for change in changed
+                ],
+                batch_size=1000
+            )
+            for change, history in zip(changed, created):
+                change['history_id'] = history.pk
+
+            bulk_status_changed.send(sender=JobApplication, changes=changed)
+
+    return {
+        'updated': len(changed),
+        'results': results,
+    }
@@ -1,10 +1,11 @@
 from django.urls import path, include
-from .views import VacancyViewSet, ThechnologyViewSet
+from .views import VacancyViewSet, ThechnologyViewSet, JobApplicationViewSet
 from rest_framework.routers import DefaultRouter
 
 router = DefaultRouter()
 router.register(r'vacancies', VacancyViewSet, basename='vacancy')
 router.register(r'technologies', ThechnologyViewSet, basename='technology')
+router.register(r'applications', JobApplicationViewSet, basename='application')
 
 urlpatterns = [
     path("", include(router.urls)),
@@ -0,0 +1,70 @@
+# Ejecuta clean() desde save() solo cuando hace falta: al insertar, o cuando
+# alguno de VALIDATED_FIELDS cambio desde que se cargo la fila. TRACKED_FIELDS
+# se vigilan igual pero sin disparar la validacion.
+class ValidatedModelMixin:
+
+    VALIDATED_FIELDS = []
+    TRACKED_FIELDS = []
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._take_snapshot()
+        return instance
+
+    def refresh_from_db(self, using=None, fields=None, from_queryset=None):
+        super().refresh_from_db(using=using, fields=fields, from_queryset=from_queryset)
+        if fields is None:
+            self._take_snapshot()
+            return
+        # Django tambien llega aqui al leer un campo diferido, con fields=[ese
+        # campo]: los cambios sin guardar en los demas siguen pendientes
+        fields = set(fields)
+        loaded = getattr(self, '_loaded_values', {})
+        for name, attname in zip(self._tracked_names(), self._tracked_attnames()):
+            if (name in fields or attname in fields) and attname in self.__dict__:
+                loaded[attname] = self.__dict__[attname]
+        self._loaded_values = loaded
+
+    def _tracked_names(self):
+        return list(self.VALIDATED_FIELDS) + list(self.TRACKED_FIELDS)
+
+    def _tracked_attnames(self):
+        return [self._meta.get_field(name).attname for name in self._tracked_names()]
+
+    def _take_snapshot(self):
+        self._loaded_values = {
+            attname: self.__dict__[attname]
+            for attname in self._tracked_attnames()
+            if attname in self.__dict__
+        }
+
+    def changed_fields(self):
+        loaded = getattr(self, '_loaded_values', {})
+        changed = set()
+        for name in self._tracked_names():
+            attname = self._meta.get_field(name).attname
+            # un campo diferido que no se ha tocado no esta en __dict__
+            if attname not in self.__dict__:
+                continue
+            if attname not in loaded or loaded[attname] != self.__dict__[attname]:
+                changed.add(name)
+        return changed
+
+    def needs_validation(self, update_fields=None):
+        if self._state.adding:
+            return True
+        changed = self.changed_fields() & set(self.VALIDATED_FIELDS)
+        if update_fields is not None:
+            changed = {
+                name for name in changed
+                if name in update_fields or self._meta.get_field(name).attname in update_fields
+            }
+        return bool(changed)
+
+    # validate=False para caminos que ya comprobaron las invariantes por su cuenta
+    def save(self, *args, validate=True, **kwargs):
+        if validate and self.needs_validation(kwargs.get('update_fields')):
+            self.clean()
+        super().save(*args, **kwargs)
+        self._take_snapshot()
@@ -1,10 +1,16 @@
-from django.db.models import Prefetch
+from django.db import DEFAULT_DB_ALIAS
+from django.db.models import Prefetch, Q
+from django.http import Http404
+from django_filters.rest_framework import DjangoFilterBackend
 from rest_framework import viewsets, permissions, filters, status
 from rest_framework.decorators import action
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
 
-from .models import Technology, Vacancy, JobApplication, ApplicationStatusHistory
+from config import identity
+from config.fieldsets import SparseFieldsetMixin
+from apps.users.models import EmployeeProfile
+from .models import ArchivedApplication, ArchivedVacancy, Technology, Vacancy, JobApplication, ApplicationStatusHistory
 from .serializers import (
     TechnologySerializer,
     VacancySerializer,
@@ -12,8 +18,17 @@ from .serializers import (
     VacancyCreateSerializer,
     JobApplicationSerializer,
     JobApplicationListSerializer,
-    JobApplicationCreateSerializer
+    JobApplicationCreateSerializer,
+    JobApplicationUpdateSerializer,
+    JobApplicationBulkStatusSerializer
 )
+from .filters import VacancyLocationFilter, VacancySalaryFilter, salary_param
+from .transitions import BULK_TRANSITION_LIMIT, bulk_transition
+from .matching import index as match_index
+from .autocomplete import index as autocomplete_index
+from . import archive, sharding
+from .normalization import resolver
+from .salary import stats as salary_stats
 
 
 class IsEmployer(permissions.BasePermission):
@@ -31,20 +46,34 @@ class IsEmployerOwnerOrReadOnly(permissions.BasePermission):
             request.user
             and request.user.is_authenticated
             and hasattr(request.user, "employer_profile")
-            and obj.employer == request.user.employer_profile
+            and obj.employer_id == request.user.employer_profile.pk
         )
 
-class IsApplicationParticipantOrReadOnly(permissions.BasePermission):
-    
+# estado, notas internas y borrado son cosa del empleador de la vacante; el
+# candidato solo puede retirar su postulacion (accion withdraw)
+class IsApplicationEmployerOrReadOnly(permissions.BasePermission):
+
     def has_object_permission(self, request, view, obj):
         if request.method in permissions.SAFE_METHODS:
             return True
         user = request.user
-        if not (user and user.is_authenticated):
-            return False
-        is_employee_owner = hasattr(user, "employee_profile") and obj.employee == user.employee_profile
-        is_employer_owner = hasattr(user, "employer_profile") and obj.vacancy.employer == user.employer_profile
-        return is_employee_owner or is_employer_owner
+        return bool(
+            user
+            and user.is_authenticated
+            and hasattr(user, "employer_profile")
+            and obj.employer_id == user.employer_profile.pk
+        )
+
+class IsApplicationCandidate(permissions.BasePermission):
+
+    def has_object_permission(self, request, view, obj):
+        user = request.user
+        return bool(
+            user
+            and user.is_authenticated
+            and hasattr(user, "employee_profile")
+            and obj.employee_id == user.employee_profile.pk
+        )
     
 class TechnologyViewSet(viewsets.ModelViewSet):
     queryset = Technology.objects.all().order_by("name")
@@ -59,9 +88,22 @@ class TechnologyViewSet(viewsets.ModelViewSet):
         # Writes require authentication (either role)
         return [permissions.IsAuthenticated()]
     
-class ThechnologyViewSet(viewsets.ModelViewSet):
+class ThechnologyViewSet(SparseFieldsetMixin, viewsets.ModelViewSet):
     queryset = Technology.objects.all()
     serializer_class = TechnologySerializer
+    throttle_scope = "technologies"
+
+    # sugerencias por prefijo servidas desde memoria, sin consultar la base de datos
+    @action(detail=False, methods=["GET"], permission_classes=[permissions.AllowAny])
+    def autocomplete(self, request):
+        try:
+            limit = min(max(int(request.query_params.get('limit', 10)), 1), 50)
+        except ValueError:
+            limit = 10
+
+        return Response(
+            autocomplete_index.search(request.query_params.get('q', ''), limit)
+        )
 
     # crear tecnologia segun la información del serializer
     def createTechnology(self, request, *args, **kwargs):
@@ -77,16 +119,119 @@ class ThechnologyViewSet(viewsets.ModelViewSet):
         )
 
 
-class VacancyViewSet(viewsets.ModelViewSet):
-    queryset = Vacancy.objects.all().order_by("title")
+class VacancyViewSet(SparseFieldsetMixin, viewsets.ModelViewSet):
+    queryset = Vacancy.objects.select_related("employer").prefetch_related("technologies").order_by("title")
     
     serializer_class = VacancySerializer
     permission_classes = [IsAuthenticated]
-    filter_backends = [filters.SearchFilter] #metodo importado para la busqueda
+    filter_backends = [filters.SearchFilter, DjangoFilterBackend, VacancyLocationFilter, VacancySalaryFilter] #metodo importado para la busqueda
     search_fields = [ #filtrado por titulo y id
         'id',
         'title'
     ]
+    filterset_fields = ['modality', 'state']
+
+    def _top_k(self):
+        try:
+            return min(max(int(self.request.query_params.get('k', 10)), 1), 100)
+        except ValueError:
+            return 10
+
+    # vacantes recomendadas para el candidato autenticado
+    @action(detail=False, methods=["GET"])
+    def recommended(self, request):
+        if not hasattr(request.user, "employee_profile"):
+            return Response(
+                {"error": "Only candidates get recommendations."},
+                status=status.HTTP_403_FORBIDDEN
+            )
+
+        salary = request.query_params.get('salary')
+        try:
+            salary = float(salary) if salary else None
+        except ValueError:
+            salary = None
+
+        ranked = match_index.top_vacancies(
+            match_index.candidate_bits(request.user.employee_profile.pk),
+            k=self._top_k(),
+            modality=request.query_params.get('modality'),
+            salary=salary
+        )
+        vacancies = Vacancy.objects.select_related('employer').prefetch_related('technologies').in_bulk(
+            [vacancy_id for vacancy_id, score in ranked]
+        )
+        return Response([
+            {'score': score, 'vacancy': VacancyListSerializer(vacancies[vacancy_id]).data}
+            for vacancy_id, score in ranked
+            if vacancy_id in vacancies
+        ])
+
+    # mejores candidatos para una vacante del empleador
+    @action(detail=True, methods=["GET"], permission_classes=[IsEmployer])
+    def candidates(self, request, pk=None):
+        vacancy = self.get_object()
+        if vacancy.employer.user_id != request.user.pk:
+            return Response(status=status.HTTP_403_FORBIDDEN)
+
+        ranked = match_index.top_candidates(vacancy.pk, k=self._top_k())
+        profiles = EmployeeProfile.objects.select_related('user').in_bulk(
+            [employee_id for employee_id, score, matched in ranked]
+        )
+        technologies = dict(
+            Technology.objects.filter(
+                pk__in={technology_id for employee_id, score, matched in ranked for technology_id in matched}
+            ).values_list('id', 'name')
+        )
+        return Response([
+            {
+                'employee': employee_id,
+                'name': profiles[employee_id].user.get_full_name(),
+                'score': score,
+                'matched_technologies': [technologies[technology_id] for technology_id in matched if technology_id in technologies],
+            }
+            for employee_id, score, matched in ranked
+            if employee_id in profiles
+        ])
+
+    # distribucion de salarios de las vacantes abiertas: ?technology=, ?location=,
+    # ?currency= (USD por defecto), ?buckets= y ?salary= para ubicar un salario
+    @action(detail=False, methods=["GET"], url_path="salary-stats")
+    def salary_stats(self, request):
+        technology = request.query_params.get('technology')
+        technology_id = None
+        if technology:
+            technology_id = int(technology) if technology.isdigit() else resolver.match(technology)
+            if technology_id is None:
+                return Response(
+                    {"error": f"Unknown technology '{technology}'.", "suggestions": resolver.suggest(technology)},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
+
+        try:
+            buckets = int(request.query_params.get('buckets', 10))
+        except ValueError:
+            buckets = 10
+
+        return Response(salary_stats.summary(
+            request.query_params.get('currency', 'USD').strip().upper(),
+            technology_id=technology_id,
+            location=request.query_params.get('location'),
+            buckets=buckets,
+            salary=salary_param(request, 'salary')
+        ))
+
+    # una vacante archivada sigue respondiendo en el detalle, en solo lectura
+    def retrieve(self, request, *args, **kwargs):
+        try:
+            return super().retrieve(request, *args, **kwargs)
+        except Http404:
+            if not str(self.kwargs['pk']).isdigit():
+                raise
+            archived = ArchivedVacancy.objects.filter(pk=self.kwargs['pk']).values_list('data', flat=True).first()
+            if archived is None:
+                raise
+            return Response({**self.sparse_data(archived), 'archived': True})
 
     # listar vacantes
     def listVacancy(self, request):
@@ -107,3 +252,191 @@ class VacancyViewSet(viewsets.ModelViewSet):
             status=status.HTTP_400_BAD_REQUEST
         )
 
+
+
+class JobApplicationViewSet(SparseFieldsetMixin, viewsets.ModelViewSet):
+    queryset = JobApplication.objects.all()
+    permission_classes = [IsAuthenticated, IsApplicationEmployerOrReadOnly]
+    fieldset_required = ("employee", "employer", "vacancy")
+
+    related_lookups = ('employee__user', 'vacancy__employer')
+
+    # entre shards no hay joins: candidatos, vacantes y empleadores se cargan
+    # despues por el mapa de identidad, una vez por peticion aunque se repitan
+    # en varios shards o en varias sub-peticiones de /batch/
+    def joins_related(self):
+        return not sharding.is_sharded()
+
+    def _related(self, queryset):
+        if sharding.is_sharded():
+            return queryset
+        return queryset.select_related(*self.related_lookups)
+
+    def initial(self, request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)
+        # el usuario y sus perfiles ya estan cargados
+        user = request.user
+        identity.register([
+            user,
+            getattr(user, 'employee_profile', None),
+            getattr(user, 'employer_profile', None),
+        ])
+
+    # sin shards las relaciones ya vienen del join; attach() solo completa lo
+    # que falte y deja esas filas en el mapa para el resto de la peticion
+    def get_serializer(self, *args, **kwargs):
+        if args and args[0] is not None:
+            instances = list(args[0]) if kwargs.get('many') else [args[0]]
+            identity.attach(instances, *self.related_paths(JobApplication, self.related_lookups))
+            if kwargs.get('many'):
+                args = (instances, *args[1:])
+        return super().get_serializer(*args, **kwargs)
+
+    def _participant_filter(self):
+        user = self.request.user
+        participant = Q(pk__in=[])
+        if hasattr(user, "employee_profile"):
+            participant |= Q(employee_id=user.employee_profile.pk)
+        if hasattr(user, "employer_profile"):
+            participant |= Q(employer_id=user.employer_profile.pk)
+        return participant
+
+    def get_queryset(self):
+        # cada usuario ve sus postulaciones o las de sus vacantes; el empleador
+        # lee solo de su shard
+        user = self.request.user
+        if hasattr(user, "employer_profile"):
+            queryset = sharding.for_employer(JobApplication, user.employer_profile.pk)
+        else:
+            queryset = self.queryset
+        return self._related(queryset).filter(self._participant_filter())
+
+    # las postulaciones de un candidato estan repartidas entre todos los shards
+    def _candidate_across_shards(self):
+        user = self.request.user
+        return (
+            sharding.is_sharded()
+            and hasattr(user, "employee_profile")
+            and not hasattr(user, "employer_profile")
+        )
+
+    # el detalle de una postulacion archivada sale de la tabla de archivo de su shard
+    def retrieve(self, request, *args, **kwargs):
+        try:
+            return super().retrieve(request, *args, **kwargs)
+        except Http404:
+            if not str(self.kwargs['pk']).isdigit():
+                raise
+            archived = self._archived(self.kwargs['pk'])
+            if archived is None:
+                raise
+            data = archived.data
+            user = request.user
+            if not (hasattr(user, "employer_profile") and archived.employer_id == user.employer_profile.pk):
+                data = archive.public_snapshot(data)
+            return Response({**self.sparse_data(data), 'archived': True})
+
+    def _archived(self, pk):
+        user = self.request.user
+        if hasattr(user, "employer_profile"):
+            queryset = sharding.for_employer(ArchivedApplication, user.employer_profile.pk)
+            return queryset.filter(self._participant_filter(), pk=pk).first()
+        return sharding.locate(
+            ArchivedApplication,
+            lambda queryset: queryset.filter(self._participant_filter()),
+            pk
+        )
+
+    def list(self, request, *args, **kwargs):
+        if not self._candidate_across_shards():
+            return super().list(request, *args, **kwargs)
+
+        applications = sharding.fan_out(
+            JobApplication,
+            lambda queryset: self.sparse_queryset(self._related(queryset)).filter(self._participant_filter()).order_by('-applied_date', '-id'),
+            key=lambda application: (application.applied_date, application.pk),
+            reverse=True
+        )
+        serializer = self.get_serializer(applications, many=True)
+        return Response(serializer.data)
+
+    def get_object(self):
+        if not self._candidate_across_shards():
+            return super().get_object()
+
+        pk = self.kwargs[self.lookup_url_kwarg or self.lookup_field]
+        if not str(pk).isdigit():
+            raise Http404
+        application = sharding.locate(
+            JobApplication,
+            lambda queryset: self.sparse_queryset(self._related(queryset)).filter(self._participant_filter()),
+            pk
+        )
+        if application is None:
+            raise Http404
+        self.check_object_permissions(self.request, application)
+        return application
+
+    def perform_destroy(self, instance):
+        with sharding.atomic(instance._state.db or DEFAULT_DB_ALIAS):
+            instance.delete()
+            if instance.status != 'withdrawn':
+                Vacancy.release_applications({instance.vacancy_id: 1})
+
+    def get_serializer_class(self):
+        if self.action == "list":
+            return JobApplicationListSerializer
+        if self.action == "create":
+            return JobApplicationCreateSerializer
+        if self.action in ["update", "partial_update"]:
+            return JobApplicationUpdateSerializer
+        return JobApplicationSerializer
+
+    # el candidato retira su postulacion; no puede tocar el estado ni las notas
+    @action(detail=True, methods=["POST"], permission_classes=[IsAuthenticated, IsApplicationCandidate])
+    def withdraw(self, request, pk=None):
+        application = self.get_object()
+        if not application.can_withdraw:
+            return Response(
+                {"error": f"An application in status '{application.status}' cannot be withdrawn."},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        data = {'status': 'withdrawn'}
+        if request.data.get('reason'):
+            data['reason'] = request.data['reason']
+        serializer = JobApplicationUpdateSerializer(
+            application,
+            data=data,
+            partial=True,
+            context={**self.get_serializer_context(), 'withdraw': True}
+        )
+        serializer.is_valid(raise_exception=True)
+        serializer.save()
+        return Response(JobApplicationSerializer(application, context=self.get_serializer_context()).data)
+
+    # cambia el estado de muchas postulaciones en una sola transaccion
+    @action(detail=False, methods=["POST"], url_path="bulk-status", permission_classes=[IsEmployer])
+    def bulk_status(self, request):
+        serializer = JobApplicationBulkStatusSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        data = serializer.validated_data
+
+        ids = data.get('ids')
+        if not ids:
+            employer_id = request.user.employer_profile.pk
+            applications = sharding.for_employer(JobApplication, employer_id).filter(
+                vacancy_id=data['vacancy'],
+                employer_id=employer_id
+            )
+            if data.get('from_status'):
+                applications = applications.filter(status=data['from_status'])
+            ids = list(applications.values_list('id', flat=True)[:BULK_TRANSITION_LIMIT])
+
+        result = bulk_transition(
+            request.user,
+            ids,
+            data['status'],
+            data.get('reason', '')
+        )
+        return Response(result)
@@ -0,0 +1,6 @@
+from django.contrib import admin
+from .models import OutboxDelivery, OutboxEvent
+
+# Register your models here.
+admin.site.register(OutboxEvent)
+admin.site.register(OutboxDelivery)
@@ -0,0 +1,34 @@
+import json
+import time
+
+from django.core.management.base import BaseCommand
+
+from apps.outbox import worker
+
+
+class Command(BaseCommand):
+    help = "Deliver pending outbox events to their subscribers in batches."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=worker.BATCH_SIZE)
+        parser.add_argument('--interval', type=float, default=1.0, help="Seconds to sleep when idle.")
+        parser.add_argument('--once', action='store_true', help="Drain what is ready and exit.")
+        parser.add_argument('--stats', action='store_true', help="Print backlog metrics and exit.")
+        parser.add_argument('--purge-days', type=int, help="Delete events processed more than N days ago and exit.")
+
+    def handle(self, *args, **options):
+        if options['stats']:
+            self.stdout.write(json.dumps(worker.stats()))
+            return
+
+        if options['purge_days'] is not None:
+            deleted = worker.purge(options['purge_days'])
+            self.stdout.write(self.style.SUCCESS(f"Purged {deleted} processed events."))
+            return
+
+        while True:
+            handled = worker.drain(options['batch_size'])
+            if options['once'] and handled < options['batch_size']:
+                break
+            if not handled:
+                time.sleep(options['interval'])
@@ -0,0 +1,28 @@
+# Generated by Django 5.2.4 on 2026-10-19 17:46
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('outbox', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='OutboxDelivery',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('subscriber', models.CharField(max_length=200)),
+                ('delivered_date', models.DateTimeField(auto_now_add=True)),
+                ('event', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='deliveries', to='outbox.outboxevent')),
+            ],
+            options={
+                'verbose_name': 'Outbox Delivery',
+                'verbose_name_plural': 'Outbox Deliveries',
+                'unique_together': {('event', 'subscriber')},
+            },
+        ),
+    ]
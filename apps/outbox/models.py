@@ -0,0 +1,69 @@
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import models
+from django.utils import timezone
+
+
+class OutboxEvent(models.Model):
+    topic = models.CharField(
+        max_length=100,
+        db_index=True
+    )
+
+    payload = models.JSONField(
+        encoder=DjangoJSONEncoder,
+        default=dict
+    )
+
+    created_date = models.DateTimeField(auto_now_add=True)
+
+    available_at = models.DateTimeField(
+        default=timezone.now,
+        help_text="The event is not handed to a worker before this time."
+    )
+
+    attempts = models.PositiveIntegerField(default=0)
+
+    processed_date = models.DateTimeField(
+        null=True,
+        blank=True
+    )
+
+    last_error = models.TextField(blank=True)
+
+    class Meta:
+        verbose_name = 'Outbox Event'
+        verbose_name_plural = 'Outbox Events'
+        ordering = ['id']
+        indexes = [
+            models.Index(fields=['processed_date', 'available_at']),
+        ]
+
+    def __str__(self):
+        return f"{self.topic} #{self.pk}"
+
+    @property
+    def is_processed(self):
+        return self.processed_date is not None
+
+
+# Un evento entregado a un subscriber. Se escribe en la misma transaccion que
+# los efectos del handler: si el lote se repite (otro handler fallo o expiro el
+# lease), ese handler no vuelve a recibir el evento.
+class OutboxDelivery(models.Model):
+    event = models.ForeignKey(
+        OutboxEvent,
+        on_delete=models.CASCADE,
+        related_name='deliveries'
+    )
+
+    subscriber = models.CharField(max_length=200)
+
+    delivered_date = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        verbose_name = 'Outbox Delivery'
+        verbose_name_plural = 'Outbox Deliveries'
+        unique_together = ['event', 'subscriber']
+
+    def __str__(self):
+        return f"{self.event_id} -> {self.subscriber}"
@@ -0,0 +1,38 @@
+from collections import defaultdict
+
+from .models import OutboxEvent
+
+_subscribers = defaultdict(list)
+
+
+# Los eventos se escriben en la misma transaccion que el cambio que los origina;
+# el worker los entrega despues, fuera del request.
+def publish(topic, payload):
+    return OutboxEvent.objects.create(topic=topic, payload=payload)
+
+
+def publish_many(topic, payloads):
+    return OutboxEvent.objects.bulk_create(
+        [OutboxEvent(topic=topic, payload=payload) for payload in payloads],
+        batch_size=1000
+    )
+
+
+# Registra un handler que recibe la lista de payloads de un lote del mismo topic,
+# cada uno con su 'event_id'. Un handler recibe cada evento una sola vez si sus
+# escrituras van a la base de datos principal (se confirman con la entrega); lo
+# que haga fuera de ella (HTTP, otros shards) puede repetirse.
+def subscriber(*topics):
+    def register(handler):
+        for topic in topics:
+            _subscribers[topic].append(handler)
+        return handler
+    return register
+
+
+def subscribers_for(topic):
+    return list(_subscribers.get(topic, []))
+
+
+def subscriber_name(handler):
+    return f"{handler.__module__}.{handler.__qualname__}"
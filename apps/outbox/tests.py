@@ -0,0 +1,60 @@
+from django.test import TestCase
+from django.utils import timezone
+
+from . import publisher, worker
+from .models import OutboxDelivery, OutboxEvent
+
+
+class DrainTests(TestCase):
+    topic = 'test.event'
+
+    def setUp(self):
+        self.calls = {'ok': [], 'flaky': []}
+        self.failures = 1
+
+        def ok(payloads):
+            self.calls['ok'].append([payload['event_id'] for payload in payloads])
+
+        def flaky(payloads):
+            self.calls['flaky'].append([payload['event_id'] for payload in payloads])
+            if self.failures:
+                self.failures -= 1
+                raise RuntimeError("endpoint down")
+
+        self.handlers = [ok, flaky]
+        for handler in self.handlers:
+            publisher.subscriber(self.topic)(handler)
+
+    def tearDown(self):
+        publisher._subscribers.pop(self.topic, None)
+
+    def retry_now(self):
+        OutboxEvent.objects.update(available_at=timezone.now())
+
+    def test_failed_handler_does_not_replay_the_others(self):
+        events = publisher.publish_many(self.topic, [{'n': 1}, {'n': 2}])
+        ids = [event.pk for event in events]
+
+        worker.drain()
+        self.assertEqual(OutboxEvent.objects.filter(processed_date__isnull=True).count(), 2)
+
+        self.retry_now()
+        worker.drain()
+
+        self.assertEqual(self.calls['ok'], [ids])
+        self.assertEqual(self.calls['flaky'], [ids, ids])
+        self.assertEqual(OutboxEvent.objects.filter(processed_date__isnull=True).count(), 0)
+        self.assertEqual(OutboxDelivery.objects.count(), 4)
+
+    def test_expired_lease_skips_delivered_handlers(self):
+        self.failures = 0
+        publisher.publish(self.topic, {'n': 1})
+        worker.drain()
+
+        # otro worker toma el mismo evento tras expirar el lease
+        OutboxEvent.objects.update(processed_date=None)
+        self.retry_now()
+        worker.drain()
+
+        self.assertEqual(len(self.calls['ok']), 1)
+        self.assertEqual(len(self.calls['flaky']), 1)
@@ -0,0 +1,6 @@
+from django.urls import path
+from .views import OutboxStatsView
+
+urlpatterns = [
+    path("outbox/stats/", OutboxStatsView.as_view(), name="outbox-stats"),
+]
@@ -0,0 +1,124 @@
+import logging
+from collections import defaultdict
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F, Min
+from django.utils import timezone
+
+from .models import OutboxDelivery, OutboxEvent
+from .publisher import subscriber_name, subscribers_for
+
+logger = logging.getLogger(__name__)
+
+BATCH_SIZE = getattr(settings, 'OUTBOX_BATCH_SIZE', 100)
+MAX_ATTEMPTS = getattr(settings, 'OUTBOX_MAX_ATTEMPTS', 10)
+# tiempo que un worker tiene reservado un lote antes de que otro pueda tomarlo
+LEASE_SECONDS = getattr(settings, 'OUTBOX_LEASE_SECONDS', 60)
+
+
+def pending():
+    return OutboxEvent.objects.filter(
+        processed_date__isnull=True,
+        attempts__lt=MAX_ATTEMPTS
+    )
+
+
+def _claim(batch_size):
+    now = timezone.now()
+    with transaction.atomic():
+        ids = list(
+            pending()
+            .filter(available_at__lte=now)
+            .select_for_update(skip_locked=True)
+            .order_by('id')
+            .values_list('id', flat=True)[:batch_size]
+        )
+        if ids:
+            OutboxEvent.objects.filter(pk__in=ids).update(
+                available_at=now + timedelta(seconds=LEASE_SECONDS),
+                attempts=F('attempts') + 1
+            )
+    return list(OutboxEvent.objects.filter(pk__in=ids).order_by('id'))
+
+
+def _retry_delay(attempts):
+    return timedelta(seconds=min(2 ** attempts, 3600))
+
+
+def _deliver(handler, events):
+    name = subscriber_name(handler)
+    delivered = set(
+        OutboxDelivery.objects.filter(
+            subscriber=name,
+            event_id__in=[event.pk for event in events]
+        ).values_list('event_id', flat=True)
+    )
+    events = [event for event in events if event.pk not in delivered]
+    if not events:
+        return
+
+    # los efectos del handler y el registro de la entrega se confirman juntos;
+    # si otro worker ya lo entrego, la restriccion unica deshace este intento
+    with transaction.atomic():
+        handler([{**event.payload, 'event_id': event.pk} for event in events])
+        OutboxDelivery.objects.bulk_create(
+            [OutboxDelivery(event=event, subscriber=name) for event in events]
+        )
+
+
+def drain(batch_size=BATCH_SIZE):
+    events = _claim(batch_size)
+
+    by_topic = defaultdict(list)
+    for event in events:
+        by_topic[event.topic].append(event)
+
+    processed = []
+    failed = {}
+    for topic, topic_events in by_topic.items():
+        # cada handler avanza por su cuenta: el fallo de uno no repite a los demas
+        for handler in subscribers_for(topic):
+            try:
+                _deliver(handler, topic_events)
+            except Exception as exc:
+                logger.exception("Outbox handler %s failed for %s", subscriber_name(handler), topic)
+                for event in topic_events:
+                    failed.setdefault(event.pk, (event, exc))
+        processed.extend(event.pk for event in topic_events if event.pk not in failed)
+
+    now = timezone.now()
+    for event, exc in failed.values():
+        OutboxEvent.objects.filter(pk=event.pk).update(
+            available_at=now + _retry_delay(event.attempts),
+            last_error=repr(exc)[:2000]
+        )
+
+    if processed:
+        OutboxEvent.objects.filter(pk__in=processed).update(processed_date=now)
+
+    return len(events)
+
+
+# Metricas de contrapresion: cuanto trabajo hay acumulado y que edad tiene.
+def stats():
+    now = timezone.now()
+    backlog = pending()
+    oldest = backlog.aggregate(oldest=Min('created_date'))['oldest']
+    return {
+        'pending': backlog.count(),
+        'ready': backlog.filter(available_at__lte=now).count(),
+        'retrying': backlog.filter(attempts__gt=0).count(),
+        'dead': OutboxEvent.objects.filter(
+            processed_date__isnull=True,
+            attempts__gte=MAX_ATTEMPTS
+        ).count(),
+        'oldest_pending_seconds': (now - oldest).total_seconds() if oldest else 0,
+    }
+
+
+def purge(older_than_days):
+    cutoff = timezone.now() - timedelta(days=older_than_days)
+    deleted, _ = OutboxEvent.objects.filter(processed_date__lt=cutoff).delete()
+    return deleted
@@ -0,0 +1,211 @@
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import tempfile
+import threading
+from collections import defaultdict
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.core.serializers.json import DjangoJSONEncoder
+
+logger = logging.getLogger(__name__)
+
+# mensajes pendientes por conexion; si un cliente lento se queda atras se
+# descartan y recibe RESET para que vuelva a pedir su lista
+QUEUE_SIZE = getattr(settings, 'PUSH_QUEUE_SIZE', 64)
+
+RESET = b'event: reset\ndata: {}\n\n'
+
+
+# Una conexion suscrita a uno o mas canales. Vive en el event loop del
+# servidor ASGI; publish() puede llamarse desde cualquier hilo. Una conexion
+# inactiva solo ocupa este objeto y una cola vacia.
+class Subscription:
+    __slots__ = ('broker', 'channels', 'loop', 'queue')
+
+    def __init__(self, broker, channels, loop):
+        self.broker = broker
+        self.channels = tuple(channels)
+        self.loop = loop
+        self.queue = asyncio.Queue(QUEUE_SIZE)
+
+    def _put(self, message):
+        if self.queue.full():
+            while not self.queue.empty():
+                self.queue.get_nowait()
+            message = RESET
+        self.queue.put_nowait(message)
+
+    def deliver(self, message):
+        try:
+            self.loop.call_soon_threadsafe(self._put, message)
+        except RuntimeError:
+            # el loop ya se cerro sin que la conexion se diera de baja
+            self.close()
+
+    async def get(self, timeout=None):
+        return await asyncio.wait_for(self.queue.get(), timeout)
+
+    def close(self):
+        self.broker.unsubscribe(self)
+
+
+# Pub/sub en memoria del proceso: basta con un solo proceso ASGI que tambien
+# atiende las escrituras (ver claim_local_broker). Los mensajes son bytes ya codificados, asi una
+# publicacion se codifica una vez sea cual sea el numero de suscriptores.
+class LocalBroker:
+
+    def __init__(self):
+        self._channels = defaultdict(set)
+        self._lock = threading.Lock()
+        self.published = 0
+        self.delivered = 0
+
+    def subscribe(self, channels):
+        subscription = Subscription(self, channels, asyncio.get_running_loop())
+        with self._lock:
+            for channel in subscription.channels:
+                self._channels[channel].add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            for channel in subscription.channels:
+                subscribers = self._channels.get(channel)
+                if subscribers is not None:
+                    subscribers.discard(subscription)
+                    if not subscribers:
+                        del self._channels[channel]
+
+    def publish(self, channel, message):
+        with self._lock:
+            subscribers = list(self._channels.get(channel, ()))
+            self.published += 1
+            self.delivered += len(subscribers)
+        for subscription in subscribers:
+            subscription.deliver(message)
+        return len(subscribers)
+
+    def stats(self):
+        with self._lock:
+            return {
+                'broker': type(self).__name__,
+                'channels': len(self._channels),
+                'subscriptions': len({id(s) for subscribers in self._channels.values() for s in subscribers}),
+                'published': self.published,
+                'delivered': self.delivered,
+            }
+
+
+# Con varios procesos o maquinas las publicaciones pasan por Redis (pub/sub).
+# Cada proceso abre una sola suscripcion a push:* en un hilo y reparte los
+# mensajes a sus conexiones con un LocalBroker; las conexiones no abren nada
+# contra Redis.
+class RedisBroker(LocalBroker):
+    prefix = 'push:'
+
+    def __init__(self, url):
+        super().__init__()
+        import redis
+        self.client = redis.Redis.from_url(url)
+        self._listener = None
+
+    def _listen(self):
+        pubsub = self.client.pubsub(ignore_subscribe_messages=True)
+        pubsub.psubscribe(self.prefix + '*')
+        for item in pubsub.listen():
+            channel = item['channel'].decode()[len(self.prefix):]
+            try:
+                super().publish(channel, item['data'])
+            except Exception:
+                logger.exception("Push delivery failed for %s", channel)
+
+    def subscribe(self, channels):
+        if self._listener is None:
+            with self._lock:
+                if self._listener is None:
+                    self._listener = threading.Thread(target=self._listen, name='push-broker', daemon=True)
+                    self._listener.start()
+        return super().subscribe(channels)
+
+    def publish(self, channel, message):
+        return self.client.publish(self.prefix + channel, message)
+
+
+# Sin PUSH_REDIS_URL un aviso solo llega a las conexiones del proceso que
+# escribe. Cada proceso servidor (config/asgi.py, config/wsgi.py) se reserva el
+# El servidor ASGI (config.asgi) reclama el broker local con un flock sobre
+# LOCAL_LOCK_PATH: si otro proceso ASGI vivo ya lo tiene, el segundo no
+# arranca en vez de perder avisos en silencio. Los procesos WSGI no lo
+# reclaman (gunicorn -w N, una API WSGI junto al servidor ASGI): no sirven
+# /events/ y lo que publican solo llega al servidor ASGI con PUSH_REDIS_URL.
+# Entre varias maquinas no se detecta; ahi tambien hace falta PUSH_REDIS_URL.
+LOCAL_LOCK_PATH = getattr(settings, 'PUSH_LOCAL_LOCK', None) or os.path.join(
+    tempfile.gettempdir(), f"push-local-{hashlib.sha1(str(settings.BASE_DIR).encode()).hexdigest()[:12]}.lock"
+)
+
+MULTIPLE_PROCESSES = (
+    "Another process is already serving with the in-process push broker, so /events/ connections "
+    "would miss updates written elsewhere. Set PUSH_REDIS_URL to run more than one process."
+)
+
+_local_lock = None
+_local_lock_pid = None
+
+
+def claim_local_broker():
+    global _local_lock, _local_lock_pid
+    if getattr(settings, 'PUSH_REDIS_URL', None) or _local_lock is not None:
+        return
+    try:
+        import fcntl
+    except ImportError:
+        # sin flock (Windows) no se comprueba
+        return
+    handle = open(LOCAL_LOCK_PATH, 'a')
+    try:
+        fcntl.flock(handle, fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except OSError:
+        handle.close()
+        raise ImproperlyConfigured(MULTIPLE_PROCESSES)
+    _local_lock, _local_lock_pid = handle, os.getpid()
+
+
+_broker = None
+_broker_lock = threading.Lock()
+
+
+def get_broker():
+    global _broker
+    if _broker is None:
+        with _broker_lock:
+            if _broker is None:
+                url = getattr(settings, 'PUSH_REDIS_URL', None)
+                # un servidor que importa la aplicacion y luego hace fork
+                # (gunicorn --preload) comparte el flock con todos sus workers
+                if not url and _local_lock is not None and _local_lock_pid != os.getpid():
+                    raise ImproperlyConfigured(MULTIPLE_PROCESSES)
+                _broker = RedisBroker(url) if url else LocalBroker()
+    return _broker
+
+
+def employee_channel(employee_id):
+    return f'employee:{employee_id}'
+
+
+def employer_channel(employer_id):
+    return f'employer:{employer_id}'
+
+
+def encode(event, payload):
+    return f'event: {event}\ndata: {json.dumps(payload, cls=DjangoJSONEncoder)}\n\n'.encode()
+
+
+def publish(event, payload, channels):
+    message = encode(event, payload)
+    broker = get_broker()
+    for channel in channels:
+        broker.publish(channel, message)
@@ -0,0 +1,94 @@
+from django.db import transaction
+from django.db.models.signals import post_save
+from django.dispatch import receiver
+
+from apps.job_applications import sharding
+from apps.job_applications.models import ApplicationStatusHistory, Interview, JobApplication, Vacancy
+from apps.job_applications.signals import bulk_status_changed
+from .broker import employee_channel, employer_channel, publish
+
+# Los avisos salen cuando la transaccion se confirma: un cliente nunca recibe
+# un cambio que luego se deshace. Solo llevan ids y estados; el cliente pide
+# el detalle a la API si lo necesita.
+
+
+def _status_payload(change):
+    return {
+        'application_id': change['application_id'],
+        'vacancy_id': change['vacancy_id'],
+        'previous_status': change['previous_status'],
+        'new_status': change['new_status'],
+        'changed_date': change['changed_date'],
+    }
+
+
+def _push_status(change):
+    publish(
+        'application.status_changed',
+        _status_payload(change),
+        [employee_channel(change['employee_id']), employer_channel(change['employer_id'])]
+    )
+
+
+@receiver(post_save, sender=ApplicationStatusHistory)
+def status_changed(sender, instance, created, **kwargs):
+    if not created:
+        return
+    application = instance.application
+    change = {
+        'application_id': application.pk,
+        'vacancy_id': application.vacancy_id,
+        'employer_id': application.employer_id,
+        'employee_id': application.employee_id,
+        'previous_status': instance.previous_status,
+        'new_status': instance.new_status,
+        'changed_date': instance.changed_date,
+    }
+    transaction.on_commit(lambda: _push_status(change), using=instance._state.db)
+
+
+@receiver(bulk_status_changed)
+def statuses_changed(sender, changes, **kwargs):
+    changes = list(changes)
+    if changes:
+        # una transicion masiva es de un solo empleador, en su shard
+        transaction.on_commit(
+            lambda: [_push_status(change) for change in changes],
+            using=sharding.shard_for_employer(changes[0]['employer_id'])
+        )
+
+
+@receiver(post_save, sender=Interview)
+def interview_scheduled(sender, instance, created, **kwargs):
+    if not created:
+        return
+    application = instance.application
+    payload = {
+        'interview_id': instance.pk,
+        'application_id': application.pk,
+        'vacancy_id': application.vacancy_id,
+        'interview_type': instance.interview_type,
+        'scheduled_date': instance.scheduled_date,
+    }
+    channels = [employee_channel(application.employee_id), employer_channel(application.employer_id)]
+    transaction.on_commit(lambda: publish('interview.scheduled', payload, channels), using=instance._state.db)
+
+
+def _push_vacancy_closed(vacancy_id, employer_id, closed_date):
+    employee_ids = sharding.for_employer(JobApplication, employer_id).filter(
+        vacancy_id=vacancy_id
+    ).order_by().values_list('employee_id', flat=True).distinct()
+    publish(
+        'vacancy.closed',
+        {'vacancy_id': vacancy_id, 'closed_date': closed_date},
+        [employee_channel(employee_id) for employee_id in employee_ids]
+    )
+
+
+# changed_fields() aun compara con lo cargado: el snapshot se toma despues de post_save
+@receiver(post_save, sender=Vacancy)
+def vacancy_closed(sender, instance, created, **kwargs):
+    if created or instance.state != "C" or 'state' not in instance.changed_fields():
+        return
+    vacancy_id, employer_id, closed_date = instance.pk, instance.employer_id, instance.closed_date
+    transaction.on_commit(lambda: _push_vacancy_closed(vacancy_id, employer_id, closed_date))
@@ -0,0 +1,61 @@
+import fcntl
+import importlib
+import os
+import tempfile
+from unittest import mock
+
+from django.core.exceptions import ImproperlyConfigured
+from django.test import SimpleTestCase, override_settings
+
+from . import broker
+
+
+@override_settings(PUSH_REDIS_URL=None)
+class LocalBrokerClaimTests(SimpleTestCase):
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.path = os.path.join(directory.name, 'push.lock')
+        # cada test empieza como un proceso recien arrancado
+        for name, value in [('LOCAL_LOCK_PATH', self.path), ('_local_lock', None), ('_local_lock_pid', None), ('_broker', None)]:
+            patcher = mock.patch.object(broker, name, value)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def hold_lock(self):
+        # otro descriptor, como si fuera otro proceso
+        handle = open(self.path, 'a')
+        self.addCleanup(handle.close)
+        fcntl.flock(handle, fcntl.LOCK_EX | fcntl.LOCK_NB)
+
+    def test_single_process_claims_the_local_broker(self):
+        broker.claim_local_broker()
+        broker.claim_local_broker()
+        self.addCleanup(broker._local_lock.close)
+        self.assertIsInstance(broker.get_broker(), broker.LocalBroker)
+
+    def test_second_process_refuses_to_start(self):
+        self.hold_lock()
+        with self.assertRaisesMessage(ImproperlyConfigured, 'PUSH_REDIS_URL'):
+            broker.claim_local_broker()
+
+    def test_forked_workers_refuse_the_local_broker(self):
+        broker.claim_local_broker()
+        self.addCleanup(broker._local_lock.close)
+        with mock.patch.object(broker, '_local_lock_pid', os.getpid() + 1):
+            with self.assertRaisesMessage(ImproperlyConfigured, 'PUSH_REDIS_URL'):
+                broker.get_broker()
+
+    def test_second_wsgi_process_still_boots(self):
+        self.hold_lock()
+        with mock.patch('apps.job_applications.autocomplete.index.warm'):
+            import config.wsgi
+            importlib.reload(config.wsgi)
+        self.assertIsNone(broker._local_lock)
+
+    @override_settings(PUSH_REDIS_URL='redis://localhost:6379/0')
+    def test_redis_needs_no_claim(self):
+        self.hold_lock()
+        broker.claim_local_broker()
+        self.assertIsNone(broker._local_lock)
@@ -0,0 +1,7 @@
+from django.urls import path
+from .views import PushStatsView, events
+
+urlpatterns = [
+    path("events/", events, name="events"),
+    path("events/stats/", PushStatsView.as_view(), name="events-stats"),
+]
@@ -0,0 +1,96 @@
+import asyncio
+import time
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.http import JsonResponse, StreamingHttpResponse
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework.permissions import IsAdminUser
+from rest_framework.response import Response
+from rest_framework.views import APIView
+from rest_framework_simplejwt.exceptions import InvalidToken, TokenError
+
+from apps.accounts.authentication import RevocableJWTAuthentication
+from .broker import employee_channel, employer_channel, get_broker
+
+# comentario periodico para que proxies y balanceadores no corten la conexion
+HEARTBEAT_SECONDS = getattr(settings, 'PUSH_HEARTBEAT_SECONDS', 25)
+RETRY_MILLISECONDS = getattr(settings, 'PUSH_RETRY_MILLISECONDS', 5000)
+
+
+# EventSource no puede mandar cabeceras: el access token puede ir tambien en
+# ?token=. La query string queda en los logs de acceso del servidor ASGI y de
+# cualquier proxy delante, token incluido: es un access token de vida corta,
+# pero esos logs deben tratarse como sensibles o filtrar el parametro. Los
+# clientes que pueden mandar cabeceras deben usar Authorization.
+def _authenticate(request):
+    authentication = RevocableJWTAuthentication()
+    header = authentication.get_header(request)
+    raw_token = authentication.get_raw_token(header) if header else None
+    if raw_token is None and request.GET.get('token'):
+        raw_token = request.GET['token'].encode()
+    if raw_token is None:
+        return None, None
+    try:
+        token = authentication.get_validated_token(raw_token)
+        return authentication.get_user(token), token
+    except (AuthenticationFailed, InvalidToken, TokenError):
+        return None, None
+
+
+def _channels(user):
+    channels = []
+    if hasattr(user, 'employee_profile'):
+        channels.append(employee_channel(user.employee_profile.pk))
+    if hasattr(user, 'employer_profile'):
+        channels.append(employer_channel(user.employer_profile.pk))
+    return channels
+
+
+async def _stream(channels, expires_at):
+    # la suscripcion se crea en el event loop del servidor, que es el que
+    # recorre la respuesta
+    subscription = get_broker().subscribe(channels)
+    try:
+        yield f'retry: {RETRY_MILLISECONDS}\n\n'.encode()
+        while True:
+            remaining = expires_at - time.time()
+            if remaining <= 0:
+                # el cliente se reconecta con un token nuevo
+                yield b'event: token_expired\ndata: {}\n\n'
+                return
+            try:
+                yield await subscription.get(min(HEARTBEAT_SECONDS, remaining))
+            except asyncio.TimeoutError:
+                yield b': ping\n\n'
+    finally:
+        subscription.close()
+
+
+# GET /events/ (text/event-stream): cambios de estado de las postulaciones,
+# entrevistas nuevas y vacantes cerradas del usuario autenticado. Necesita el
+# servidor ASGI (config/asgi.py): cada conexion abierta es una tarea del event
+# loop, no un hilo.
+async def events(request):
+    if request.method != 'GET':
+        return JsonResponse({'detail': f'Method "{request.method}" not allowed.'}, status=405)
+
+    user, token = await sync_to_async(_authenticate)(request)
+    if user is None:
+        return JsonResponse({'detail': 'Authentication credentials were not provided or are invalid.'}, status=401)
+    channels = await sync_to_async(_channels)(user)
+    if not channels:
+        return JsonResponse({'detail': 'Only candidates and employers receive events.'}, status=403)
+
+    response = StreamingHttpResponse(_stream(channels, token['exp']), content_type='text/event-stream')
+    # sin compresion ni buffer intermedio: cada evento sale en cuanto se publica
+    response['Cache-Control'] = 'no-cache, no-transform'
+    response['X-Accel-Buffering'] = 'no'
+    return response
+
+
+class PushStatsView(APIView):
+    permission_classes = [IsAdminUser]
+
+    def get(self, request):
+        return Response(get_broker().stats())
@@ -1,7 +1,48 @@
 from rest_framework import serializers
+from django.contrib.auth.base_user import BaseUserManager
+from django.db import IntegrityError, transaction
+from django.utils.crypto import get_random_string
 from .models import User, EmployeeProfile, EmployerProfile
 import re
 
+
+# Usuario sin guardar con la contrasena ya hasheada: el hash (PBKDF2) se calcula
+# fuera de la transaccion para no retener la conexion ni el lock de escritura
+def build_user(validated_data, role=None):
+    validated_data = dict(validated_data)
+    validated_data.pop('password2', None)
+    password = validated_data.pop('password')
+    user = User(**validated_data)
+    user.email = BaseUserManager.normalize_email(user.email)
+    if not user.username:
+        user.username = user.email[:150]
+    if role:
+        user.role = role
+    user.set_password(password)
+    return user
+
+
+# La unicidad del email la garantiza la restriccion de la base de datos; un
+# conflicto al insertar se devuelve como error de validacion. Que restriccion
+# fallo se averigua despues, con una consulta solo en el camino de error.
+def save_registration(user, profile_model=None, profile_data=None):
+    for attempt in range(2):
+        try:
+            with transaction.atomic():
+                user.save()
+                if profile_model is not None:
+                    profile_model.objects.create(user=user, **(profile_data or {}))
+            return user
+        except IntegrityError:
+            if User.objects.filter(email=user.email).exists():
+                raise serializers.ValidationError({'email': ["Email already registered."]})
+            # el username sale del email truncado: dos emails largos pueden
+            # compartirlo. Se reintenta una vez con un sufijo aleatorio.
+            if attempt or not User.objects.filter(username=user.username).exists():
+                raise
+            user.username = f"{user.email[:141]}.{get_random_string(8)}"
+
+
 class UserSerializer(serializers.ModelSerializer):
     password2 = serializers.CharField(
         write_only=True,
@@ -27,7 +68,9 @@ class UserSerializer(serializers.ModelSerializer):
         read_only_fields = ['id', 'role', 'is_active', 'date_joined']
         extra_kwargs = {
             'password': {'write_only': True, 'style':{'input_type': 'password'}},
-            'profile_pic': {'required': False}
+            'profile_pic': {'required': False},
+            # sin UniqueValidator: la restriccion unique se comprueba al insertar
+            'email': {'validators': []}
         }
 
     def validate_bio(self, value):
@@ -55,13 +98,6 @@ class UserSerializer(serializers.ModelSerializer):
             )
         return value
     
-    def validate_email(self, value):
-        if User.objects.filter(email=value).exists():
-            raise serializers.ValidationError(
-                "Email already registered."
-            )
-        return value
-            
     def validate_phone_number(self, value):
         if not value.isdigit():
             raise serializers.ValidationError(
@@ -86,13 +122,8 @@ class UserSerializer(serializers.ModelSerializer):
             )
         return data
     
-    def create(self, validated_data):   
-        validated_data.pop('password2')
-        password = validated_data.pop('password')
-        user = User(**validated_data)
-        user.set_password(password)
-        user.save()
-        return user
+    def create(self, validated_data):
+        return save_registration(build_user(validated_data))
     
 class EmployeeProfileSerializer(serializers.ModelSerializer):
     class Meta:
@@ -142,3 +173,54 @@ class EmployerProfileSerializer(serializers.ModelSerializer):
             'company_website': {'required': False},
             'founded_year': {'required': False}
         }
+
+
+# Registro de usuario y perfil en una sola transaccion: {"user": {...}, <campos del perfil>}
+class RegistrationSerializer(serializers.Serializer):
+    user = UserSerializer()
+
+    role = None
+    profile_model = None
+
+    def create(self, validated_data):
+        user = build_user(validated_data.pop('user'), role=self.role)
+        return save_registration(user, self.profile_model, validated_data)
+
+    def to_representation(self, instance):
+        return UserSerializer(instance).data
+
+
+class EmployeeRegistrationSerializer(RegistrationSerializer):
+    skills = serializers.CharField(required=False, allow_blank=True)
+    github_url = serializers.URLField(required=False, allow_blank=True)
+    linkedin_url = serializers.URLField(required=False, allow_blank=True)
+
+    role = 'employee'
+    profile_model = EmployeeProfile
+
+    def _validate_url(self, value, domain):
+        if value and domain not in value.lower():
+            raise serializers.ValidationError(f"{domain.title()} URL is not valid")
+        return value
+
+    def validate_github_url(self, value):
+        return self._validate_url(value, 'github.com')
+
+    def validate_linkedin_url(self, value):
+        return self._validate_url(value, 'linkedin.com')
+
+
+class EmployerRegistrationSerializer(RegistrationSerializer):
+    company_name = serializers.CharField(max_length=255)
+    company_website = serializers.URLField(required=False, allow_blank=True)
+    company_description = serializers.CharField(required=False, allow_blank=True)
+    founded_year = serializers.IntegerField(required=False, allow_null=True, min_value=1)
+
+    role = 'employer'
+    profile_model = EmployerProfile
+
+    def validate_founded_year(self, value):
+        from datetime import date
+        if value and value > date.today().year:
+            raise serializers.ValidationError("Founded year cannot be in the future.")
+        return value
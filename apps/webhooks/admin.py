@@ -0,0 +1,6 @@
+from django.contrib import admin
+from .models import WebhookEndpoint, WebhookDelivery
+
+# Register your models here.
+admin.site.register(WebhookEndpoint)
+admin.site.register(WebhookDelivery)
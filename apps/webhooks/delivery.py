@@ -0,0 +1,209 @@
+import hashlib
+import hmac
+import http.client
+import ipaddress
+import json
+import socket
+import time
+import urllib.error
+import urllib.request
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import transaction
+from django.utils import timezone
+
+from .models import WebhookDelivery
+
+BATCH_SIZE = getattr(settings, 'WEBHOOK_BATCH_SIZE', 50)
+MAX_ATTEMPTS = getattr(settings, 'WEBHOOK_MAX_ATTEMPTS', 8)
+TIMEOUT = getattr(settings, 'WEBHOOK_TIMEOUT', 5)
+LEASE_SECONDS = getattr(settings, 'WEBHOOK_LEASE_SECONDS', 60)
+
+
+class UnsafeDestination(OSError):
+    pass
+
+
+def _is_public(address):
+    ip = ipaddress.ip_address(address.split('%')[0])
+    if ip.version == 6 and ip.ipv4_mapped:
+        ip = ip.ipv4_mapped
+    return ip.is_global and not ip.is_multicast
+
+
+# Resuelve el host y devuelve sus direcciones si todas son publicas: un webhook
+# no puede apuntar a la red interna, a localhost ni a los metadatos del cloud.
+def public_addresses(host, port):
+    try:
+        infos = socket.getaddrinfo(host, port, type=socket.SOCK_STREAM)
+    except socket.gaierror as exc:
+        raise UnsafeDestination(f"{host} could not be resolved") from exc
+    addresses = list(dict.fromkeys(info[4][0] for info in infos))
+    if not getattr(settings, 'WEBHOOK_ALLOW_PRIVATE_HOSTS', False):
+        for address in addresses:
+            if not _is_public(address):
+                raise UnsafeDestination(f"{host} resolves to a non-public address ({address})")
+    return addresses
+
+
+# La conexion va a la direccion que se acaba de comprobar, no a una segunda
+# resolucion del nombre (DNS rebinding). Tambien vale para las redirecciones.
+def _connect_public(address, timeout=socket._GLOBAL_DEFAULT_TIMEOUT, source_address=None):
+    host, port = address
+    error = None
+    for ip in public_addresses(host, port):
+        try:
+            return socket.create_connection((ip, port), timeout, source_address)
+        except OSError as exc:
+            error = exc
+    raise error
+
+
+class _PublicHTTPConnection(http.client.HTTPConnection):
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._create_connection = _connect_public
+
+
+class _PublicHTTPSConnection(http.client.HTTPSConnection):
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._create_connection = _connect_public
+
+
+class _PublicHTTPHandler(urllib.request.HTTPHandler):
+    def do_open(self, http_class, request, **kwargs):
+        return super().do_open(_PublicHTTPConnection, request, **kwargs)
+
+
+class _PublicHTTPSHandler(urllib.request.HTTPSHandler):
+    def do_open(self, http_class, request, **kwargs):
+        return super().do_open(_PublicHTTPSConnection, request, **kwargs)
+
+
+# sin proxies del entorno: la comprobacion se hace sobre el destino real
+_opener = urllib.request.build_opener(urllib.request.ProxyHandler({}), _PublicHTTPHandler, _PublicHTTPSHandler)
+
+
+def sign(secret, timestamp, body):
+    message = f"{timestamp}.".encode() + body
+    return hmac.new(secret.encode(), message, hashlib.sha256).hexdigest()
+
+
+def backoff(attempts):
+    # 30s, 1m, 2m, 4m ... con tope de 6 horas
+    return timedelta(seconds=min(30 * 2 ** (attempts - 1), 6 * 3600))
+
+
+def _claim(limit):
+    now = timezone.now()
+    with transaction.atomic():
+        ids = list(
+            WebhookDelivery.objects
+            .filter(status='pending', next_attempt_at__lte=now, endpoint__is_active=True)
+            .select_for_update(skip_locked=True)
+            .order_by('id')
+            .values_list('id', flat=True)[:limit]
+        )
+        if ids:
+            WebhookDelivery.objects.filter(pk__in=ids).update(
+                next_attempt_at=now + timedelta(seconds=LEASE_SECONDS)
+            )
+    return list(
+        WebhookDelivery.objects.filter(pk__in=ids).select_related('endpoint').order_by('id')
+    )
+
+
+# Envia un lote de entregas de un mismo endpoint en una sola peticion POST.
+# No toca la base de datos para poder ejecutarse en los hilos del pool.
+def post_batch(endpoint, deliveries):
+    body = json.dumps(
+        {
+            'deliveries': [
+                {
+                    'id': delivery.pk,
+                    'event_id': delivery.event_id,
+                    'event': delivery.event,
+                    'created': delivery.created_date,
+                    'data': delivery.payload,
+                }
+                for delivery in deliveries
+            ]
+        },
+        cls=DjangoJSONEncoder
+    ).encode()
+    timestamp = str(int(time.time()))
+
+    request = urllib.request.Request(
+        endpoint.url,
+        data=body,
+        method='POST',
+        headers={
+            'Content-Type': 'application/json',
+            'User-Agent': 'JobBoardAPI-Webhooks',
+            'X-Webhook-Timestamp': timestamp,
+            'X-Webhook-Signature': f"sha256={sign(endpoint.secret, timestamp, body)}",
+        }
+    )
+
+    try:
+        with _opener.open(request, timeout=TIMEOUT) as response:
+            return response.status, ''
+    except urllib.error.HTTPError as exc:
+        return exc.code, f"HTTP {exc.code}"
+    except (urllib.error.URLError, OSError) as exc:
+        return None, str(exc)
+
+
+def _record(deliveries, code, error):
+    now = timezone.now()
+    ids = [delivery.pk for delivery in deliveries]
+
+    if code is not None and 200 <= code < 300:
+        WebhookDelivery.objects.filter(pk__in=ids).update(
+            status='delivered',
+            response_code=code,
+            delivered_date=now,
+            last_error=''
+        )
+        return
+
+    for delivery in deliveries:
+        attempts = delivery.attempts + 1
+        dead = attempts >= MAX_ATTEMPTS
+        WebhookDelivery.objects.filter(pk=delivery.pk).update(
+            attempts=attempts,
+            status='dead' if dead else 'pending',
+            next_attempt_at=now if dead else now + backoff(attempts),
+            response_code=code,
+            last_error=error[:2000]
+        )
+
+
+def deliver_pending(workers=8, batch_size=BATCH_SIZE, limit=1000):
+    deliveries = _claim(limit)
+
+    batches = defaultdict(list)
+    for delivery in deliveries:
+        batches[delivery.endpoint_id].append(delivery)
+
+    jobs = []
+    for endpoint_deliveries in batches.values():
+        for start in range(0, len(endpoint_deliveries), batch_size):
+            chunk = endpoint_deliveries[start:start + batch_size]
+            jobs.append((chunk[0].endpoint, chunk))
+
+    if not jobs:
+        return 0
+
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        results = list(pool.map(lambda job: post_batch(*job), jobs))
+
+    for (endpoint, chunk), (code, error) in zip(jobs, results):
+        _record(chunk, code, error)
+
+    return len(deliveries)
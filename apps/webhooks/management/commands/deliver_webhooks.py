@@ -0,0 +1,26 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from apps.webhooks import delivery
+
+
+class Command(BaseCommand):
+    help = "Send pending webhook deliveries, batched per endpoint, from a worker pool."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=8)
+        parser.add_argument('--batch-size', type=int, default=delivery.BATCH_SIZE)
+        parser.add_argument('--interval', type=float, default=1.0, help="Seconds to sleep when idle.")
+        parser.add_argument('--once', action='store_true', help="Send what is due and exit.")
+
+    def handle(self, *args, **options):
+        while True:
+            sent = delivery.deliver_pending(
+                workers=options['workers'],
+                batch_size=options['batch_size']
+            )
+            if options['once']:
+                break
+            if not sent:
+                time.sleep(options['interval'])
@@ -0,0 +1,22 @@
+# Generated by Django 5.2.4 on 2026-10-19 17:51
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('webhooks', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='webhookdelivery',
+            name='event_id',
+            field=models.PositiveBigIntegerField(blank=True, help_text='Outbox event id. Sent with every attempt so receivers can drop duplicates.', null=True),
+        ),
+        migrations.AlterUniqueTogether(
+            name='webhookdelivery',
+            unique_together={('endpoint', 'event_id')},
+        ),
+    ]
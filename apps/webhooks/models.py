@@ -0,0 +1,119 @@
+import secrets
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import models
+from django.utils import timezone
+from apps.users.models import EmployerProfile
+
+
+def generate_secret():
+    return secrets.token_hex(32)
+
+
+class WebhookEndpoint(models.Model):
+    EVENT_CHOICES = [
+        ('application.created', 'Application created'),
+        ('application.status_changed', 'Application status changed'),
+        ('interview.scheduled', 'Interview scheduled')
+    ]
+
+    employer = models.ForeignKey(
+        EmployerProfile,
+        on_delete=models.CASCADE,
+        related_name='webhook_endpoints'
+    )
+
+    url = models.URLField(max_length=500)
+
+    secret = models.CharField(
+        max_length=64,
+        default=generate_secret,
+        help_text="Shared secret used to sign deliveries (HMAC-SHA256)."
+    )
+
+    events = models.JSONField(
+        default=list,
+        blank=True,
+        help_text="Subscribed events. Empty means all events."
+    )
+
+    is_active = models.BooleanField(default=True)
+
+    created_date = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        verbose_name = 'Webhook Endpoint'
+        verbose_name_plural = 'Webhook Endpoints'
+        ordering = ['-created_date']
+
+    def __str__(self):
+        return f"{self.employer.company_name} - {self.url}"
+
+    def wants(self, event):
+        return not self.events or event in self.events
+
+
+class WebhookDelivery(models.Model):
+    STATUS_CHOICES = [
+        ('pending', 'Pending'),
+        ('delivered', 'Delivered'),
+        ('dead', 'Dead letter')
+    ]
+
+    endpoint = models.ForeignKey(
+        WebhookEndpoint,
+        on_delete=models.CASCADE,
+        related_name='deliveries'
+    )
+
+    event = models.CharField(
+        max_length=50,
+        choices=WebhookEndpoint.EVENT_CHOICES
+    )
+
+    event_id = models.PositiveBigIntegerField(
+        null=True,
+        blank=True,
+        help_text="Outbox event id. Sent with every attempt so receivers can drop duplicates."
+    )
+
+    payload = models.JSONField(
+        encoder=DjangoJSONEncoder,
+        default=dict
+    )
+
+    status = models.CharField(
+        max_length=10,
+        choices=STATUS_CHOICES,
+        default='pending'
+    )
+
+    attempts = models.PositiveIntegerField(default=0)
+
+    next_attempt_at = models.DateTimeField(default=timezone.now)
+
+    response_code = models.PositiveIntegerField(
+        null=True,
+        blank=True
+    )
+
+    last_error = models.TextField(blank=True)
+
+    created_date = models.DateTimeField(auto_now_add=True)
+
+    delivered_date = models.DateTimeField(
+        null=True,
+        blank=True
+    )
+
+    class Meta:
+        verbose_name = 'Webhook Delivery'
+        verbose_name_plural = 'Webhook Deliveries'
+        ordering = ['id']
+        indexes = [
+            models.Index(fields=['status', 'next_attempt_at']),
+        ]
+        unique_together = ['endpoint', 'event_id']
+
+    def __str__(self):
+        return f"{self.event} -> {self.endpoint.url} ({self.status})"
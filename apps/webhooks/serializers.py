@@ -0,0 +1,59 @@
+from urllib.parse import urlsplit
+
+from rest_framework import serializers
+from .delivery import UnsafeDestination, public_addresses
+from .models import WebhookEndpoint, WebhookDelivery
+
+
+class WebhookEndpointSerializer(serializers.ModelSerializer):
+    events = serializers.ListField(
+        child=serializers.ChoiceField(choices=WebhookEndpoint.EVENT_CHOICES),
+        required=False
+    )
+
+    class Meta:
+        model = WebhookEndpoint
+        fields = [
+            'id',
+            'url',
+            'secret',
+            'events',
+            'is_active',
+            'created_date'
+        ]
+        read_only_fields = ['id', 'secret', 'created_date']
+
+    def validate_url(self, value):
+        if not value.lower().startswith(('https://', 'http://')):
+            raise serializers.ValidationError(
+                "Webhook URL must be http or https."
+            )
+        url = urlsplit(value)
+        try:
+            public_addresses(url.hostname, url.port or (443 if url.scheme.lower() == 'https' else 80))
+        except (UnsafeDestination, ValueError) as exc:
+            raise serializers.ValidationError(f"Webhook URL is not allowed: {exc}")
+        return value
+
+    def create(self, validated_data):
+        validated_data['employer'] = self.context['request'].user.employer_profile
+        return super().create(validated_data)
+
+
+class WebhookDeliverySerializer(serializers.ModelSerializer):
+    class Meta:
+        model = WebhookDelivery
+        fields = [
+            'id',
+            'event',
+            'event_id',
+            'payload',
+            'status',
+            'attempts',
+            'next_attempt_at',
+            'response_code',
+            'last_error',
+            'created_date',
+            'delivered_date'
+        ]
+        read_only_fields = fields
@@ -0,0 +1,75 @@
+from collections import defaultdict
+
+from apps.job_applications import sharding
+from apps.job_applications.models import JobApplication, Vacancy
+from apps.outbox.publisher import subscriber
+from .models import WebhookEndpoint, WebhookDelivery
+
+
+def _enqueue(event, payloads_by_employer):
+    endpoints = defaultdict(list)
+    for endpoint in WebhookEndpoint.objects.filter(
+        employer_id__in=payloads_by_employer.keys(),
+        is_active=True
+    ):
+        if endpoint.wants(event):
+            endpoints[endpoint.employer_id].append(endpoint)
+
+    # un evento del outbox se encola una sola vez por endpoint
+    WebhookDelivery.objects.bulk_create(
+        [
+            WebhookDelivery(
+                endpoint=endpoint,
+                event=event,
+                event_id=payload.get('event_id'),
+                payload={key: value for key, value in payload.items() if key != 'event_id'}
+            )
+            for employer_id, payloads in payloads_by_employer.items()
+            for endpoint in endpoints[employer_id]
+            for payload in payloads
+        ],
+        batch_size=1000,
+        ignore_conflicts=True
+    )
+
+
+def _group_by_vacancy_employer(payloads):
+    employers = dict(
+        Vacancy.objects.filter(
+            pk__in={payload['vacancy_id'] for payload in payloads}
+        ).order_by().values_list('id', 'employer_id')
+    )
+    grouped = defaultdict(list)
+    for payload in payloads:
+        if payload['vacancy_id'] in employers:
+            grouped[employers[payload['vacancy_id']]].append(payload)
+    return grouped
+
+
+@subscriber('application.created')
+def application_created(payloads):
+    _enqueue('application.created', _group_by_vacancy_employer(payloads))
+
+
+@subscriber('application.status_changed')
+def application_status_changed(payloads):
+    _enqueue('application.status_changed', _group_by_vacancy_employer(payloads))
+
+
+@subscriber('interview.scheduled')
+def interview_scheduled(payloads):
+    # los eventos anteriores a employer_id en el payload se resuelven en los shards
+    missing = {payload['application_id'] for payload in payloads if not payload.get('employer_id')}
+    employers = dict(
+        sharding.fan_out(
+            JobApplication,
+            lambda queryset: queryset.filter(pk__in=missing).order_by().values_list('id', 'employer_id')
+        )
+    ) if missing else {}
+
+    grouped = defaultdict(list)
+    for payload in payloads:
+        employer_id = payload.get('employer_id') or employers.get(payload['application_id'])
+        if employer_id:
+            grouped[employer_id].append(payload)
+    _enqueue('interview.scheduled', grouped)
@@ -0,0 +1,94 @@
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from django.test import TestCase, override_settings
+
+from apps.job_applications.models import JobApplication
+from apps.job_applications.tests import client_for, create_employee, create_employer, create_vacancy
+from apps.outbox import worker
+from apps.outbox.models import OutboxEvent
+from . import delivery, subscribers
+from .models import WebhookDelivery, WebhookEndpoint
+
+
+# servidor HTTP local que hace de receptor de los webhooks
+class Receiver(ThreadingHTTPServer):
+
+    def __init__(self):
+        self.requests = []
+        receiver = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(self):
+                body = self.rfile.read(int(self.headers['Content-Length']))
+                receiver.requests.append((dict(self.headers), body))
+                self.send_response(204)
+                self.end_headers()
+
+            def log_message(self, *args):
+                pass
+
+        super().__init__(('127.0.0.1', 0), Handler)
+        self.url = f'http://127.0.0.1:{self.server_port}/hook'
+        threading.Thread(target=self.serve_forever, daemon=True).start()
+
+    def close(self):
+        self.shutdown()
+        self.server_close()
+
+
+class WebhookTests(TestCase):
+    databases = '__all__'
+
+    def setUp(self):
+        self.employer = create_employer('acme')
+        self.vacancy = create_vacancy(self.employer)
+        self.recruiter = client_for(self.employer.user)
+        self.receiver = Receiver()
+        self.addCleanup(self.receiver.close)
+
+    def apply(self):
+        employee = create_employee('jane')
+        JobApplication.objects.create(employee=employee, vacancy=self.vacancy)
+        while worker.drain():
+            pass
+
+    def test_rejects_internal_urls(self):
+        for url in [self.receiver.url, 'http://localhost/hook', 'http://169.254.169.254/latest/meta-data/', 'http://[::1]/hook']:
+            response = self.recruiter.post('/webhooks/', {'url': url}, format='json')
+            self.assertEqual(response.status_code, 400, url)
+            self.assertIn('url', response.data)
+
+    def test_refuses_internal_address_at_delivery(self):
+        # la URL se guardo cuando resolvia a una direccion publica
+        endpoint = WebhookEndpoint.objects.create(employer=self.employer, url=self.receiver.url)
+        self.apply()
+        delivery.deliver_pending()
+
+        self.assertEqual(self.receiver.requests, [])
+        failed = WebhookDelivery.objects.get(endpoint=endpoint)
+        self.assertEqual(failed.status, 'pending')
+        self.assertIn('non-public', failed.last_error)
+
+    @override_settings(WEBHOOK_ALLOW_PRIVATE_HOSTS=True)
+    def test_delivers_signed_batch_with_event_id(self):
+        response = self.recruiter.post('/webhooks/', {'url': self.receiver.url}, format='json')
+        self.assertEqual(response.status_code, 201, response.content)
+        self.apply()
+        event = OutboxEvent.objects.get(topic='application.created')
+
+        # otra entrega del mismo evento del outbox no se encola dos veces
+        subscribers.application_created([{**event.payload, 'event_id': event.pk}])
+        self.assertEqual(WebhookDelivery.objects.count(), 1)
+
+        self.assertEqual(delivery.deliver_pending(), 1)
+        self.assertEqual(WebhookDelivery.objects.get().status, 'delivered')
+
+        [(headers, body)] = self.receiver.requests
+        expected = delivery.sign(response.data['secret'], headers['X-Webhook-Timestamp'], body)
+        self.assertEqual(headers['X-Webhook-Signature'], f'sha256={expected}')
+        [sent] = json.loads(body)['deliveries']
+        self.assertEqual(sent['event_id'], event.pk)
+        self.assertEqual(sent['data']['application_id'], event.payload['application_id'])
+        self.assertNotIn('event_id', sent['data'])
@@ -0,0 +1,10 @@
+from django.urls import path, include
+from .views import WebhookEndpointViewSet
+from rest_framework.routers import DefaultRouter
+
+router = DefaultRouter()
+router.register(r'webhooks', WebhookEndpointViewSet, basename='webhook')
+
+urlpatterns = [
+    path("", include(router.urls)),
+]
@@ -0,0 +1,31 @@
+from django.utils import timezone
+from rest_framework import viewsets
+from rest_framework.decorators import action
+from rest_framework.response import Response
+
+from apps.job_applications.views import IsEmployer
+from .models import WebhookEndpoint
+from .serializers import WebhookEndpointSerializer, WebhookDeliverySerializer
+
+
+class WebhookEndpointViewSet(viewsets.ModelViewSet):
+    serializer_class = WebhookEndpointSerializer
+    permission_classes = [IsEmployer]
+
+    def get_queryset(self):
+        return WebhookEndpoint.objects.filter(employer__user=self.request.user)
+
+    # entregas que agotaron los reintentos
+    @action(detail=True, methods=["GET"], url_path="dead-letters")
+    def dead_letters(self, request, pk=None):
+        deliveries = self.get_object().deliveries.filter(status='dead').order_by('-id')[:100]
+        return Response(WebhookDeliverySerializer(deliveries, many=True).data)
+
+    @action(detail=True, methods=["POST"])
+    def redeliver(self, request, pk=None):
+        updated = self.get_object().deliveries.filter(status='dead').update(
+            status='pending',
+            attempts=0,
+            next_attempt_at=timezone.now()
+        )
+        return Response({'requeued': updated})
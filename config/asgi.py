@@ -13,4 +13,16 @@ from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings')
 
+# /events/ (avisos en tiempo real, apps.realtime) solo funciona sobre ASGI:
+# cada conexion abierta es una tarea del event loop
 application = get_asgi_application()
+
+# sin PUSH_REDIS_URL solo puede servir un proceso (ver apps.realtime.broker)
+from apps.realtime.broker import claim_local_broker  # noqa: E402
+
+claim_local_broker()
+
+# precarga el indice de autocompletado en segundo plano
+from apps.job_applications.autocomplete import index as technology_autocomplete  # noqa: E402
+
+technology_autocomplete.warm()
@@ -0,0 +1,99 @@
+import logging
+from io import BytesIO
+from urllib.parse import urlsplit
+
+from django.conf import settings
+from django.core.handlers.wsgi import WSGIRequest
+from django.urls import Resolver404, resolve
+from rest_framework import status
+from rest_framework.permissions import IsAuthenticated
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+logger = logging.getLogger(__name__)
+
+MAX_REQUESTS = getattr(settings, 'BATCH_MAX_REQUESTS', 20)
+
+# solo lecturas: un lote no puede dejar escrituras a medias
+BATCH_METHODS = ('GET',)
+
+
+def _error(request_id, code, message):
+    return {'id': request_id, 'status': code, 'body': {'detail': message}}
+
+
+# Peticion interna con las cabeceras de la original pero otra ruta y query
+# string; lleva el usuario ya autenticado para que DRF no vuelva a decodificar
+# el JWT ni a cargar el usuario.
+def build_subrequest(request, method, path):
+    url = urlsplit(path)
+    environ = {
+        key: value for key, value in request.META.items()
+        if key not in ('CONTENT_TYPE', 'CONTENT_LENGTH', 'wsgi.input')
+    }
+    environ.update({
+        'REQUEST_METHOD': method,
+        'PATH_INFO': url.path,
+        'QUERY_STRING': url.query,
+        'wsgi.input': BytesIO(b''),
+    })
+    subrequest = WSGIRequest(environ)
+    subrequest.user = request.user
+    subrequest._force_auth_user = request.user
+    subrequest._force_auth_token = request.auth
+    subrequest.batch = True
+    return subrequest
+
+
+def dispatch(request, entry):
+    request_id = entry.get('id')
+    method = str(entry.get('method', 'GET')).upper()
+    path = entry.get('path')
+
+    if method not in BATCH_METHODS:
+        return _error(request_id, status.HTTP_405_METHOD_NOT_ALLOWED, f"Method {method} is not allowed in a batch.")
+    if not isinstance(path, str) or not path.startswith('/'):
+        return _error(request_id, status.HTTP_400_BAD_REQUEST, "path must be an absolute path.")
+
+    try:
+        match = resolve(urlsplit(path).path)
+    except Resolver404:
+        return _error(request_id, status.HTTP_404_NOT_FOUND, "Not found.")
+    view_class = getattr(match.func, 'cls', None)
+    if view_class is None or not issubclass(view_class, APIView) or issubclass(view_class, BatchView):
+        return _error(request_id, status.HTTP_400_BAD_REQUEST, "Only API endpoints can be batched.")
+
+    try:
+        response = match.func(build_subrequest(request, method, path), *match.args, **match.kwargs)
+    except Exception:
+        logger.exception("Batch sub-request %s %s failed", method, path)
+        return _error(request_id, status.HTTP_500_INTERNAL_SERVER_ERROR, "Internal server error.")
+
+    # el cuerpo se devuelve sin renderizar: la respuesta del lote se
+    # serializa una sola vez, con el renderer que negocie el cliente
+    return {
+        'id': request_id,
+        'status': response.status_code,
+        'body': getattr(response, 'data', None),
+    }
+
+
+# POST /batch/ {"requests": [{"id": "open", "method": "GET", "path": "/vacancies/?state=O"}, ...]}
+# Ejecuta las sub-peticiones en orden dentro de esta misma peticion: una sola
+# autenticacion y una sola pasada por las middlewares.
+class BatchView(APIView):
+    permission_classes = [IsAuthenticated]
+
+    def post(self, request):
+        entries = request.data.get('requests') if isinstance(request.data, dict) else None
+        if not isinstance(entries, list) or not entries:
+            return Response({"requests": ["A non-empty list is required."]}, status=status.HTTP_400_BAD_REQUEST)
+        if len(entries) > MAX_REQUESTS:
+            return Response(
+                {"requests": [f"At most {MAX_REQUESTS} requests per batch."]},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        if not all(isinstance(entry, dict) for entry in entries):
+            return Response({"requests": ["Each request must be an object."]}, status=status.HTTP_400_BAD_REQUEST)
+
+        return Response({'responses': [dispatch(request, entry) for entry in entries]})
@@ -0,0 +1,218 @@
+import hashlib
+import zlib
+
+from django.conf import settings
+from django.core.cache import cache
+from django.utils.cache import patch_vary_headers
+from django.utils.text import compress_string
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+# por debajo de este tamano no compensa comprimir
+MIN_SIZE = getattr(settings, 'COMPRESSION_MIN_SIZE', 1024)
+# segundos que se guarda en cache el cuerpo ya comprimido (0 lo desactiva)
+CACHE_TIMEOUT = getattr(settings, 'COMPRESSION_CACHE_TIMEOUT', 300)
+CACHE_MIN_SIZE = getattr(settings, 'COMPRESSION_CACHE_MIN_SIZE', 16 * 1024)
+
+COMPRESSIBLE_TYPES = (
+    'text/',
+    'application/json',
+    'application/x-ndjson',
+    'application/javascript',
+    'application/xml',
+    'application/msgpack',
+)
+
+# gzip lleva bytes aleatorios en la cabecera (igual que GZipMiddleware) para
+# que la longitud no revele el contenido comprimido (BREACH)
+GZIP_RANDOM_BYTES = 100
+
+
+class GzipCodec:
+    name = 'gzip'
+
+    def compress(self, data):
+        return compress_string(data, max_random_bytes=GZIP_RANDOM_BYTES)
+
+    def stream(self):
+        return ZlibStream(zlib.compressobj(6, zlib.DEFLATED, 31))
+
+
+class ZlibStream:
+
+    def __init__(self, compressor):
+        self.compressor = compressor
+
+    def compress(self, chunk):
+        return self.compressor.compress(chunk) + self.compressor.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self):
+        return self.compressor.flush()
+
+
+class BrotliCodec:
+    name = 'br'
+    quality = getattr(settings, 'COMPRESSION_BROTLI_QUALITY', 5)
+
+    def compress(self, data):
+        return brotli.compress(data, quality=self.quality)
+
+    def stream(self):
+        return BrotliStream(brotli.Compressor(quality=self.quality))
+
+
+class BrotliStream:
+
+    def __init__(self, compressor):
+        self.compressor = compressor
+
+    def compress(self, chunk):
+        return self.compressor.process(chunk) + self.compressor.flush()
+
+    def finish(self):
+        return self.compressor.finish()
+
+
+class ZstdCodec:
+    name = 'zstd'
+    level = getattr(settings, 'COMPRESSION_ZSTD_LEVEL', 3)
+
+    def compress(self, data):
+        return zstandard.ZstdCompressor(level=self.level).compress(data)
+
+    def stream(self):
+        return ZstdStream(zstandard.ZstdCompressor(level=self.level).compressobj())
+
+
+class ZstdStream:
+
+    def __init__(self, compressor):
+        self.compressor = compressor
+
+    def compress(self, chunk):
+        return self.compressor.compress(chunk) + self.compressor.flush(zstandard.COMPRESSOBJ_FLUSH_BLOCK)
+
+    def finish(self):
+        return self.compressor.flush()
+
+
+# en orden de preferencia del servidor; solo los que tienen su modulo instalado
+CODECS = [
+    codec for codec, available in (
+        (BrotliCodec(), brotli is not None),
+        (ZstdCodec(), zstandard is not None),
+        (GzipCodec(), True),
+    )
+    if available
+]
+
+
+def accepted_encodings(header):
+    accepted = {}
+    for part in header.split(','):
+        name, _, params = part.strip().partition(';')
+        quality = 1.0
+        params = params.strip()
+        if params.startswith('q='):
+            try:
+                quality = float(params[2:])
+            except ValueError:
+                quality = 0.0
+        if name:
+            accepted[name.strip().lower()] = quality
+    return accepted
+
+
+def negotiate(header):
+    accepted = accepted_encodings(header)
+    for codec in CODECS:
+        quality = accepted.get(codec.name, accepted.get('*', 0))
+        if quality > 0:
+            return codec
+    return None
+
+
+def compress_cached(codec, body):
+    if not CACHE_TIMEOUT or len(body) < CACHE_MIN_SIZE:
+        return codec.compress(body)
+    key = f'compressed:{codec.name}:{hashlib.blake2b(body, digest_size=16).hexdigest()}:{len(body)}'
+    compressed = cache.get(key)
+    if compressed is None:
+        compressed = codec.compress(body)
+        cache.set(key, compressed, CACHE_TIMEOUT)
+    return compressed
+
+
+def compress_stream(codec, chunks):
+    stream = codec.stream()
+    for chunk in chunks:
+        data = stream.compress(chunk)
+        if data:
+            yield data
+    yield stream.finish()
+
+
+async def acompress_stream(codec, chunks):
+    stream = codec.stream()
+    async for chunk in chunks:
+        data = stream.compress(chunk)
+        if data:
+            yield data
+    yield stream.finish()
+
+
+# Comprime las respuestas con brotli, zstd o gzip segun Accept-Encoding. Los
+# cuerpos grandes comprimidos se guardan en cache por su hash, asi una pagina
+# muy pedida que no cambia no se vuelve a comprimir. Las respuestas en
+# streaming se comprimen trozo a trozo, sin esperar al final.
+class CompressionMiddleware:
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def is_compressible(self, response):
+        if response.has_header('Content-Encoding') or response.status_code in (204, 206, 304):
+            return False
+        if 'no-transform' in response.get('Cache-Control', ''):
+            return False
+        content_type = response.get('Content-Type', '').split(';')[0].strip().lower()
+        return content_type.startswith(COMPRESSIBLE_TYPES)
+
+    def __call__(self, request):
+        response = self.get_response(request)
+        if not self.is_compressible(response):
+            return response
+        if not response.streaming and len(response.content) < MIN_SIZE:
+            return response
+
+        patch_vary_headers(response, ('Accept-Encoding',))
+        codec = negotiate(request.META.get('HTTP_ACCEPT_ENCODING', ''))
+        if codec is None:
+            return response
+
+        if response.streaming:
+            if response.is_async:
+                response.streaming_content = acompress_stream(codec, response.streaming_content)
+            else:
+                response.streaming_content = compress_stream(codec, response.streaming_content)
+            del response.headers['Content-Length']
+        else:
+            compressed = compress_cached(codec, response.content)
+            if len(compressed) >= len(response.content):
+                return response
+            response.content = compressed
+            response.headers['Content-Length'] = str(len(compressed))
+
+        etag = response.get('ETag')
+        if etag and etag.startswith('"'):
+            response.headers['ETag'] = 'W/' + etag
+        response.headers['Content-Encoding'] = codec.name
+        return response
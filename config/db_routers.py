@@ -0,0 +1,56 @@
+import random
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections
+
+# None fuera de una peticion (comandos, worker, shell): todo va al primario.
+# La middleware lo pone a False solo en peticiones de lectura que pueden ir
+# a una replica, y a True cuando la peticion debe leer sus propias escrituras.
+_use_primary = ContextVar('use_primary', default=None)
+
+
+def replica_aliases():
+    return list(getattr(settings, 'READ_REPLICAS', []))
+
+
+@contextmanager
+def use_replicas(enabled=True):
+    token = _use_primary.set(not enabled)
+    try:
+        yield
+    finally:
+        _use_primary.reset(token)
+
+
+@contextmanager
+def use_primary():
+    with use_replicas(False):
+        yield
+
+
+class PrimaryReplicaRouter:
+
+    def __init__(self):
+        self.replicas = replica_aliases()
+
+    def db_for_read(self, model, **hints):
+        if not self.replicas or _use_primary.get() is not False:
+            return DEFAULT_DB_ALIAS
+        # dentro de una transaccion del primario se lee lo que ya se escribio
+        if connections[DEFAULT_DB_ALIAS].in_atomic_block:
+            return DEFAULT_DB_ALIAS
+        return random.choice(self.replicas)
+
+    def db_for_write(self, model, **hints):
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        return True
+
+    # las replicas reciben el esquema por replicacion, no por migrate
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        if db in self.replicas:
+            return False
+        return None
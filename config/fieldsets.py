@@ -0,0 +1,179 @@
+import re
+
+from django.core.exceptions import FieldDoesNotExist
+from rest_framework import serializers
+from rest_framework.exceptions import ValidationError
+
+from .middleware import SAFE_METHODS
+
+DISPLAY_METHOD = re.compile(r'get_(\w+)_display')
+
+
+def _names(value):
+    return [name.strip() for name in value.split(',') if name.strip()] if value else []
+
+
+def prune(serializer, fields=None, exclude=()):
+    if isinstance(serializer, serializers.ListSerializer):
+        serializer = serializer.child
+    available = set(serializer.fields)
+    unknown = (set(fields or ()) | set(exclude)) - available
+    if unknown:
+        raise ValidationError({
+            'fields': [f"Unknown field(s): {', '.join(sorted(unknown))}. Available: {', '.join(sorted(available))}."]
+        })
+    keep = available if fields is None else set(fields)
+    for name in available - keep | set(exclude):
+        serializer.fields.pop(name)
+    return serializer
+
+
+# Columnas, joins y prefetches que necesitan los campos de un serializer.
+# Meta.fieldset_sources declara lo que leen las propiedades del modelo
+# (p. ej. salary_range -> salary_min, salary_max); un atributo que no se puede
+# resolver carga todas las columnas de su modelo.
+class QueryPlan:
+
+    def __init__(self, model, required=()):
+        self.model = model
+        self.only = set(required)
+        self.select = set()
+        self.prefetch = set()
+        self.full = set()
+
+    def add(self, path, model, whole=False):
+        prefix = []
+        for index, attr in enumerate(path):
+            try:
+                field = model._meta.get_field(attr)
+            except FieldDoesNotExist:
+                display = DISPLAY_METHOD.fullmatch(attr)
+                if display and display.group(1) in {f.name for f in model._meta.concrete_fields}:
+                    self.only.add('__'.join(prefix + [display.group(1)]))
+                else:
+                    self.full.add('__'.join(prefix))
+                return
+            lookup = '__'.join(prefix + [attr])
+            if field.many_to_many or field.one_to_many:
+                self.prefetch.add(lookup)
+                return
+            if field.is_relation and (index < len(path) - 1 or whole):
+                self.select.add(lookup)
+                prefix.append(attr)
+                model = field.related_model
+                continue
+            self.only.add(lookup)
+            return
+        self.full.add('__'.join(prefix))
+
+    def add_field(self, name, field, sources):
+        if field.write_only:
+            return
+        if name in sources:
+            for source in sources[name]:
+                self.add(source.split('__'), self.model)
+            return
+        if field.source == '*':
+            self.full.add('')
+            return
+        self.add(field.source_attrs, self.model)
+        # un serializer anidado usa el objeto relacionado entero
+        if isinstance(field, serializers.BaseSerializer) and not isinstance(field, serializers.ListSerializer):
+            self.add(field.source_attrs, self.model, whole=True)
+
+    def apply(self, queryset, joins=True):
+        # select_related() sin argumentos seguiria todas las FK
+        queryset = queryset.select_related(None).prefetch_related(None)
+        # sin joins las relaciones de self.select las carga la vista despues
+        # (mapa de identidad), solo se leen sus columnas FK
+        if joins and self.select:
+            queryset = queryset.select_related(*self.select)
+        queryset = queryset.prefetch_related(*self.prefetch)
+        if '' in self.full:
+            return queryset
+
+        only = set()
+        for lookup in self.only:
+            if '__' not in lookup or joins:
+                only.add(lookup)
+        if joins:
+            for path in self.full:
+                model = self.model
+                for attr in path.split('__'):
+                    model = model._meta.get_field(attr).related_model
+                only.update(f'{path}__{field.name}' for field in model._meta.concrete_fields)
+        else:
+            only.update(path.split('__')[0] for path in self.select)
+        return queryset.only(*only)
+
+
+def plan_for(serializer, model, required=()):
+    if isinstance(serializer, serializers.ListSerializer):
+        serializer = serializer.child
+    sources = getattr(getattr(serializer, 'Meta', None), 'fieldset_sources', {})
+    plan = QueryPlan(model, required)
+    for name, field in serializer.fields.items():
+        plan.add_field(name, field, sources)
+    return plan
+
+
+# ?fields=id,title y ?exclude=description en list y retrieve: la respuesta
+# solo lleva esos campos y la consulta solo carga las columnas, joins y
+# prefetches que hacen falta para ellos.
+class SparseFieldsetMixin:
+    fieldset_actions = ('list', 'retrieve')
+    # columnas que la vista usa aunque no se pidan (permisos, enrutado)
+    fieldset_required = ()
+
+    def get_fieldset(self):
+        if not hasattr(self, '_fieldset'):
+            self._fieldset = None
+            request = self.request
+            if request is not None and request.method in SAFE_METHODS and self.action in self.fieldset_actions:
+                fields = _names(request.query_params.get('fields'))
+                exclude = _names(request.query_params.get('exclude'))
+                if fields or exclude:
+                    self._fieldset = (fields or None, exclude)
+        return self._fieldset
+
+    def get_serializer(self, *args, **kwargs):
+        serializer = super().get_serializer(*args, **kwargs)
+        fieldset = self.get_fieldset()
+        if fieldset is not None:
+            prune(serializer, *fieldset)
+        return serializer
+
+    def joins_related(self):
+        return True
+
+    def get_query_plan(self, model):
+        if not hasattr(self, '_query_plan'):
+            self._query_plan = plan_for(self.get_serializer(), model, self.fieldset_required)
+        return self._query_plan
+
+    def sparse_queryset(self, queryset):
+        if self.get_fieldset() is None:
+            return queryset
+        return self.get_query_plan(queryset.model).apply(queryset, joins=self.joins_related())
+
+    # relaciones FK a cargar: todas las de `paths`, o con ?fields= solo las
+    # que usan los campos pedidos
+    def related_paths(self, model, paths):
+        if self.get_fieldset() is None:
+            return paths
+        select = self.get_query_plan(model).select
+        return [path for path in select if not any(other.startswith(path + '__') for other in select)]
+
+    def filter_queryset(self, queryset):
+        return self.sparse_queryset(super().filter_queryset(queryset))
+
+    # para respuestas que no salen del serializer (p. ej. filas archivadas)
+    def sparse_data(self, data):
+        fieldset = self.get_fieldset()
+        if fieldset is None:
+            return data
+        fields, exclude = fieldset
+        return {
+            key: value for key, value in data.items()
+            if (fields is None or key in fields) and key not in exclude
+        }
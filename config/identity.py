@@ -0,0 +1,149 @@
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.db.models.signals import post_delete, post_save
+
+# Mapa de identidad de la peticion: (modelo, pk) -> instancia. Lo abre la
+# middleware y lo comparten vistas, serializers, permisos y las sub-peticiones
+# de /batch/, de modo que cada fila se carga como mucho una vez por peticion.
+# Fuera de una peticion (comandos, worker) no hay mapa y todo consulta la base.
+_identity_map = ContextVar('identity_map', default=None)
+
+
+def _key(model, pk):
+    return (model._meta.concrete_model._meta.label, pk)
+
+
+class IdentityMap:
+
+    def __init__(self):
+        self.instances = {}
+        self.loads = 0
+
+    def get(self, model, pk):
+        return self.instances.get(_key(model, pk))
+
+    def add(self, instance):
+        if instance is not None and instance.pk is not None:
+            self.instances.setdefault(_key(type(instance), instance.pk), instance)
+        return instance
+
+    def discard(self, model, pk):
+        self.instances.pop(_key(model, pk), None)
+
+
+def current():
+    return _identity_map.get()
+
+
+@contextmanager
+def request_scope():
+    # una sub-peticion de /batch/ reutiliza el mapa de la peticion exterior
+    if _identity_map.get() is not None:
+        yield _identity_map.get()
+        return
+    token = _identity_map.set(IdentityMap())
+    try:
+        yield _identity_map.get()
+    finally:
+        _identity_map.reset(token)
+
+
+def register(instances):
+    identity_map = current()
+    if identity_map is not None:
+        for instance in instances:
+            identity_map.add(instance)
+    return instances
+
+
+def get_many(model, pks, queryset=None):
+    identity_map = current()
+    found = {}
+    missing = set()
+    for pk in pks:
+        if pk is None:
+            continue
+        instance = identity_map.get(model, pk) if identity_map is not None else None
+        if instance is None:
+            missing.add(pk)
+        else:
+            found[pk] = instance
+    if missing:
+        queryset = queryset if queryset is not None else model._default_manager.all()
+        loaded = queryset.in_bulk(missing)
+        if identity_map is not None:
+            identity_map.loads += 1
+            loaded = {pk: identity_map.add(instance) for pk, instance in loaded.items()}
+        found.update(loaded)
+    return found
+
+
+def get(model, pk, queryset=None):
+    return get_many(model, [pk], queryset).get(pk)
+
+
+def _load_related(field, instances):
+    # agrupadas por base de datos: el router decide el alias de la relacion a
+    # partir de la instancia (p. ej. la postulacion de una entrevista esta en
+    # el mismo shard)
+    by_db = {}
+    for instance in instances:
+        by_db.setdefault(instance._state.db, []).append(instance)
+    for group in by_db.values():
+        queryset = field.related_model._base_manager.db_manager(hints={'instance': group[0]}).all()
+        related = get_many(field.related_model, {getattr(instance, field.attname) for instance in group}, queryset)
+        for instance in group:
+            field.set_cached_value(instance, related.get(getattr(instance, field.attname)))
+
+
+# Carga las relaciones FK de `path` (p. ej. 'vacancy__employer') para todas las
+# instancias con una consulta por salto, reutilizando las filas ya conocidas,
+# y las deja en la cache de la relacion como haria select_related. Lo que ya
+# estaba cargado no se consulta otra vez.
+def attach(instances, *paths):
+    for path in paths:
+        level = [instance for instance in instances if instance is not None]
+        for attr in path.split('__'):
+            if not level:
+                break
+            field = type(level[0])._meta.get_field(attr)
+            pending = [instance for instance in level if not field.is_cached(instance)]
+            if pending:
+                _load_related(field, pending)
+            level = list({id(obj): obj for obj in (getattr(instance, attr) for instance in level) if obj is not None}.values())
+            # las filas que ya venian completas de un select_related tambien
+            # entran en el mapa; las de un .only() (?fields=) no
+            register([obj for obj in level if not obj.get_deferred_fields()])
+    return instances
+
+
+# equivalente a instance.a.b.c pero pasando por el mapa en cada salto
+def related(instance, path):
+    for attr in path.split('__'):
+        if instance is None:
+            return None
+        attach([instance], attr)
+        instance = getattr(instance, attr)
+    return instance
+
+
+# una fila guardada o borrada en la peticion no se sirve desde el mapa
+def _evict(sender, instance, **kwargs):
+    identity_map = current()
+    if identity_map is not None and instance.pk is not None:
+        identity_map.discard(sender, instance.pk)
+
+
+post_save.connect(_evict, dispatch_uid='identity_map_evict_saved')
+post_delete.connect(_evict, dispatch_uid='identity_map_evict_deleted')
+
+
+class IdentityMapMiddleware:
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        with request_scope():
+            return self.get_response(request)
@@ -0,0 +1,60 @@
+from django.conf import settings
+from django.core import signing
+
+from .db_routers import use_replicas
+
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+
+# segundos durante los que un cliente que acaba de escribir sigue leyendo del
+# primario, mas que el retraso esperado de las replicas
+REPLICA_PIN_SECONDS = getattr(settings, 'REPLICA_PIN_SECONDS', 5)
+
+# rutas que reciben POST pero solo leen (p. ej. el endpoint de lotes)
+READ_ONLY_PATHS = getattr(settings, 'READ_ONLY_PATHS', ('/batch/',))
+
+
+def is_write(request):
+    return request.method not in SAFE_METHODS and request.path not in READ_ONLY_PATHS
+
+
+PIN_COOKIE = 'replica_pin'
+PIN_HEADER = 'X-Replica-Pin'
+PIN_SALT = 'config.middleware.replica-pin'
+
+
+def is_pinned(request):
+    value = request.COOKIES.get(PIN_COOKIE) or request.headers.get(PIN_HEADER)
+    if not value:
+        return False
+    try:
+        signing.loads(value, salt=PIN_SALT, max_age=REPLICA_PIN_SECONDS)
+    except signing.BadSignature:
+        return False
+    return True
+
+
+# Las lecturas (GET/HEAD/OPTIONS) van a las replicas salvo que el mismo cliente
+# haya escrito hace menos de REPLICA_PIN_SECONDS; las escrituras y todo lo que
+# leen van al primario. La marca viaja con el cliente (cookie firmada, o la
+# cabecera X-Replica-Pin para clientes sin cookies), asi que vale aunque la
+# siguiente lectura la atienda otro proceso u otra maquina.
+class ReplicaRoutingMiddleware:
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        write = is_write(request)
+        pinned = write or is_pinned(request)
+
+        with use_replicas(not pinned):
+            response = self.get_response(request)
+
+        if write and response.status_code < 400:
+            pin = signing.dumps(True, salt=PIN_SALT)
+            response.set_cookie(
+                PIN_COOKIE, pin, max_age=REPLICA_PIN_SECONDS, httponly=True, samesite='Lax',
+                secure=request.is_secure()
+            )
+            response[PIN_HEADER] = pin
+        return response
@@ -1,3 +1,5 @@
+import os
+from importlib.util import find_spec
 from pathlib import Path
 from datetime import timedelta
 
@@ -33,17 +35,25 @@ INSTALLED_APPS = [
     'rest_framework',
     'rest_framework_simplejwt',
     'apps.accounts',
+    'apps.outbox',
+    'apps.analytics',
+    'apps.webhooks',
+    'apps.realtime',
     'django_filters',
 ]
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
+    'config.compression.CompressionMiddleware',
+    'config.throttling.PreAuthThrottleMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'config.middleware.ReplicaRoutingMiddleware',
+    'config.identity.IdentityMapMiddleware',
 ]
 
 ROOT_URLCONF = 'config.urls'
@@ -71,11 +81,70 @@ WSGI_APPLICATION = 'config.wsgi.application'
 
 DATABASES = {
     'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
+        # sqlite3 con las transacciones de escritura en cola (SQLITE_SERIALIZE_WRITES)
+        'ENGINE': 'config.sqlite',
         'NAME': BASE_DIR / 'db.sqlite3',
+        # conexiones persistentes, comprobadas antes de reutilizarse
+        'CONN_MAX_AGE': int(os.environ.get('DATABASE_CONN_MAX_AGE', 60)),
+        'CONN_HEALTH_CHECKS': True,
+        # los tests de concurrencia abren una conexion por hilo: una base en
+        # memoria no admite escritores concurrentes, un fichero en WAL si
+        'TEST': {'NAME': BASE_DIR / 'test_db.sqlite3'},
+        'OPTIONS': {
+            # los escritores toman el lock al empezar la transaccion en vez de
+            # fallar con "database is locked" al intentar promoverla
+            'transaction_mode': 'IMMEDIATE',
+            'timeout': 20,
+            # WAL: las lecturas no se bloquean con las escrituras
+            'init_command': (
+                'PRAGMA journal_mode=WAL;'
+                'PRAGMA synchronous=NORMAL;'
+                'PRAGMA mmap_size=134217728;'
+                'PRAGMA temp_store=MEMORY;'
+                'PRAGMA cache_size=-20000'
+            ),
+        },
     }
 }
 
+# Replicas de solo lectura: DATABASE_REPLICAS=/ruta/replica1.sqlite3,/ruta/replica2.sqlite3
+READ_REPLICAS = []
+for position, replica in enumerate(filter(None, os.environ.get('DATABASE_REPLICAS', '').split(',')), start=1):
+    DATABASES[f'replica_{position}'] = {
+        **DATABASES['default'],
+        'NAME': replica.strip(),
+        'TEST': {'MIRROR': 'default'},
+    }
+    READ_REPLICAS.append(f'replica_{position}')
+
+# Shards de postulaciones por empleador: DATABASE_SHARDS=/ruta/shard1.sqlite3,...
+# 'default' es siempre el primer shard
+APPLICATION_SHARDS = ['default']
+for position, shard in enumerate(filter(None, os.environ.get('DATABASE_SHARDS', '').split(',')), start=1):
+    DATABASES[f'shard_{position}'] = {
+        **DATABASES['default'],
+        'NAME': shard.strip(),
+        'TEST': {'NAME': BASE_DIR / f'test_shard_{position}.sqlite3'},
+    }
+    APPLICATION_SHARDS.append(f'shard_{position}')
+
+DATABASE_ROUTERS = [
+    'apps.job_applications.sharding.ShardRouter',
+    'config.db_routers.PrimaryReplicaRouter',
+]
+
+# segundos que un cliente lee del primario despues de escribir
+REPLICA_PIN_SECONDS = 5
+
+# con SQLite, las transacciones del proceso sobre una misma base van de una en
+# una (config.sqlite); fuera de la transaccion las peticiones no esperan
+SQLITE_SERIALIZE_WRITES = True
+
+# vacantes cerradas y postulaciones finalizadas hace mas de estos dias pasan
+# a las tablas de archivo (manage.py archive_records)
+ARCHIVE_AFTER_DAYS = 180
+ARCHIVE_BATCH_SIZE = 500
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
@@ -120,15 +189,63 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': [
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'apps.accounts.authentication.RevocableJWTAuthentication',
         'rest_framework.authentication.BasicAuthentication',
         'rest_framework.authentication.SessionAuthentication',
     ],
     'DEFAULT_FILTER_BACKENDS': [
         'django_filters.rest_framework.DjangoFilterBackend'
         ],
+    'DEFAULT_RENDERER_CLASSES': [
+        'config.renderers.FastJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ] + (['config.renderers.MessagePackRenderer'] if find_spec('msgpack') else []),
+    'DEFAULT_PARSER_CLASSES': [
+        'config.renderers.FastJSONParser',
+        'rest_framework.parsers.FormParser',
+        'rest_framework.parsers.MultiPartParser',
+    ] + (['config.renderers.MessagePackParser'] if find_spec('msgpack') else []),
+    'DEFAULT_THROTTLE_CLASSES': [
+        'config.throttling.AnonRateThrottle',
+        'config.throttling.UserRateThrottle',
+        'config.throttling.EndpointRateThrottle',
+    ],
+    'DEFAULT_THROTTLE_RATES': {
+        'anon': '300/minute',
+        'user': '1200/minute',
+        'login': '10/minute',
+        'register': '5/minute',
+        'basic': '30/minute',
+        'technologies': '120/minute',
+    },
+}
+
+# rutas cuyo limite por IP se comprueba antes de autenticar (ver config.throttling)
+PRE_AUTH_THROTTLES = {
+    '/users/login/': 'login',
+    '/api/token/': 'login',
+    '/users/accept-invite/': 'login',
+    '/users/register/': 'register',
+    '/employers/register/': 'register',
+    '/employees/register/': 'register',
 }
 
+# con varios procesos los contadores de throttling deben ser compartidos
+THROTTLE_REDIS_URL = os.environ.get('THROTTLE_REDIS_URL')
+
+# proxies delante de la aplicacion (IPs separadas por comas): solo sus
+# X-Forwarded-For cuentan para los limites por IP (ver config.throttling)
+TRUSTED_PROXIES = [address.strip() for address in os.environ.get('TRUSTED_PROXIES', '').split(',') if address.strip()]
+
+# avisos en tiempo real (/events/): sin URL el pub/sub es local al proceso, lo
+# que solo sirve si un unico proceso ASGI atiende tambien las escrituras; un
+# segundo proceso ASGI se niega a arrancar (apps.realtime.broker)
+PUSH_REDIS_URL = os.environ.get('PUSH_REDIS_URL')
+
+# los webhooks solo se entregan a direcciones publicas; activarlo solo en
+# desarrollo para probar contra un servidor local
+WEBHOOK_ALLOW_PRIVATE_HOSTS = os.environ.get('WEBHOOK_ALLOW_PRIVATE_HOSTS', '').lower() in ('1', 'true', 'yes')
+
 SIMPLE_JWT = {
     'ACCESS_TOKEN_LIFETIME': timedelta(minutes=5),   # Token de acceso
     'REFRESH_TOKEN_LIFETIME': timedelta(days=1),     # Token de refresco
@@ -137,4 +254,14 @@ SIMPLE_JWT = {
     'ALGORITHM': 'HS256',
     'SIGNING_KEY': SECRET_KEY,
     'AUTH_HEADER_TYPES': ('Bearer',),
-}
\ No newline at end of file
+    'TOKEN_REFRESH_SERIALIZER': 'apps.accounts.serializers.RevocableTokenRefreshSerializer',
+}
+
+# respuestas de al menos COMPRESSION_MIN_SIZE bytes se comprimen; los cuerpos
+# comprimidos de mas de COMPRESSION_CACHE_MIN_SIZE se guardan en cache
+COMPRESSION_MIN_SIZE = 1024
+COMPRESSION_CACHE_TIMEOUT = 300
+COMPRESSION_CACHE_MIN_SIZE = 16 * 1024
+
+# cada cuanto cada proceso incorpora al filtro los tokens revocados por otros
+REVOCATION_SYNC_SECONDS = 5
\ No newline at end of file
@@ -0,0 +1,62 @@
+import threading
+
+from django.conf import settings
+from django.db import OperationalError
+from django.db.backends.sqlite3 import base
+
+_write_locks = {}
+_write_locks_guard = threading.Lock()
+
+
+def write_lock(name):
+    with _write_locks_guard:
+        return _write_locks.setdefault(str(name), threading.Lock())
+
+
+# SQLite admite un solo escritor. Con transaction_mode IMMEDIATE cada
+# transaccion toma el lock del fichero en el BEGIN; en vez de que los hilos del
+# proceso compitan por el (y esperen con busy_timeout), hacen cola en un lock
+# del proceso que se toma con el BEGIN y se suelta con el COMMIT o el ROLLBACK.
+# Solo se serializa la transaccion: hashear una contraseña o renderizar la
+# respuesta no hace esperar a nadie. Las lecturas fuera de transaccion no esperan.
+class DatabaseWrapper(base.DatabaseWrapper):
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._write_lock = None
+
+    def _start_transaction_under_autocommit(self):
+        if getattr(settings, 'SQLITE_SERIALIZE_WRITES', False) and self._write_lock is None:
+            lock = write_lock(self.settings_dict['NAME'])
+            # mismo limite que busy_timeout: si otra conexion del proceso no
+            # suelta el lock, el error es el mismo que daria SQLite
+            if not lock.acquire(timeout=self.settings_dict['OPTIONS'].get('timeout', 5)):
+                raise OperationalError("database is locked")
+            self._write_lock = lock
+        try:
+            super()._start_transaction_under_autocommit()
+        except Exception:
+            self._release_write_lock()
+            raise
+
+    def _release_write_lock(self):
+        lock, self._write_lock = self._write_lock, None
+        if lock is not None:
+            lock.release()
+
+    def _commit(self):
+        result = super()._commit()
+        self._release_write_lock()
+        return result
+
+    def _rollback(self):
+        try:
+            return super()._rollback()
+        finally:
+            self._release_write_lock()
+
+    def _close(self):
+        try:
+            return super()._close()
+        finally:
+            self._release_write_lock()
@@ -0,0 +1,133 @@
+import threading
+import time
+from unittest import mock
+
+from django.conf import settings
+from django.db import connection, connections, transaction
+from django.http import HttpResponse
+from django.test import RequestFactory, SimpleTestCase, TransactionTestCase, override_settings
+
+from apps.users.models import User
+
+from . import db_routers, middleware, throttling
+from .sqlite.base import write_lock
+
+
+class ReplicaPinTests(SimpleTestCase):
+
+    def setUp(self):
+        self.factory = RequestFactory()
+        self.routed = []
+
+        def view(request):
+            self.routed.append('primary' if db_routers._use_primary.get() else 'replica')
+            return HttpResponse(status=201 if request.method == 'POST' else 200)
+
+        self.view = view
+
+    def request(self, method='get', **extra):
+        # cada peticion la atiende una instancia nueva, como otro proceso sin cache compartida
+        return middleware.ReplicaRoutingMiddleware(self.view)(getattr(self.factory, method)('/vacancies/', **extra))
+
+    def test_write_pins_the_client_to_the_primary(self):
+        self.request()
+        response = self.request('post')
+        pin = response.cookies[middleware.PIN_COOKIE].value
+        self.assertEqual(response[middleware.PIN_HEADER], pin)
+
+        self.request(HTTP_COOKIE=f'{middleware.PIN_COOKIE}={pin}')
+        self.request(HTTP_X_REPLICA_PIN=pin)
+        self.request()
+        self.assertEqual(self.routed, ['replica', 'primary', 'primary', 'primary', 'replica'])
+
+    def test_forged_or_expired_pin_is_ignored(self):
+        pin = self.request('post')[middleware.PIN_HEADER]
+        self.request(HTTP_X_REPLICA_PIN='forged')
+        with mock.patch('django.core.signing.time.time', return_value=time.time() + middleware.REPLICA_PIN_SECONDS + 1):
+            self.request(HTTP_X_REPLICA_PIN=pin)
+        self.assertEqual(self.routed, ['primary', 'replica', 'replica'])
+
+
+class SQLiteWriteQueueTests(TransactionTestCase):
+
+    def run_in_thread(self, target):
+        def run():
+            try:
+                target()
+            finally:
+                connections.close_all()
+        thread = threading.Thread(target=run)
+        thread.start()
+        return thread
+
+    def test_only_transactions_wait_for_the_write_lock(self):
+        if connection.vendor != 'sqlite':
+            self.skipTest("SQLite only")
+        events = []
+        lock = write_lock(connection.settings_dict['NAME'])
+        inside = threading.Event()
+        release = threading.Event()
+
+        def writer():
+            with transaction.atomic():
+                User.objects.create_user(username='first', email='first@example.com', password='pass1234')
+                inside.set()
+                release.wait(5)
+                events.append('first committed')
+
+        def reader_and_writer():
+            inside.wait(5)
+            events.append(f'read {User.objects.count()} users, queue locked: {lock.locked()}')
+            release.set()
+            with transaction.atomic():
+                events.append('second began')
+                User.objects.create_user(username='second', email='second@example.com', password='pass1234')
+
+        threads = [self.run_in_thread(writer), self.run_in_thread(reader_and_writer)]
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(events, ['read 0 users, queue locked: True', 'first committed', 'second began'])
+        self.assertEqual(User.objects.count(), 2)
+        self.assertFalse(lock.locked())
+
+
+class ThrottleIdentTests(SimpleTestCase):
+
+    def setUp(self):
+        self.factory = RequestFactory()
+
+    def ident(self, forwarded, remote_addr='203.0.113.7'):
+        return throttling.client_ident(
+            self.factory.get('/', REMOTE_ADDR=remote_addr, HTTP_X_FORWARDED_FOR=forwarded)
+        )
+
+    def test_forwarded_for_is_ignored_without_proxies(self):
+        self.assertEqual(self.ident('198.51.100.1'), '203.0.113.7')
+
+    @override_settings(TRUSTED_PROXIES=['10.0.0.1', '10.0.0.2'])
+    def test_trusted_proxies(self):
+        self.assertEqual(self.ident('1.1.1.1, 198.51.100.1, 10.0.0.2', remote_addr='10.0.0.1'), '198.51.100.1')
+        # una peticion que no viene de un proxy no elige su IP
+        self.assertEqual(self.ident('198.51.100.1'), '203.0.113.7')
+
+    def test_num_proxies(self):
+        with override_settings(REST_FRAMEWORK={**settings.REST_FRAMEWORK, 'NUM_PROXIES': 1}):
+            self.assertEqual(self.ident('1.1.1.1, 198.51.100.1', remote_addr='10.0.0.1'), '198.51.100.1')
+
+    def test_spoofed_header_does_not_reset_the_login_limit(self):
+        store = throttling.LocalCounterStore()
+        guard = throttling.PreAuthThrottleMiddleware(lambda request: HttpResponse())
+        with mock.patch.object(throttling, '_store', store), mock.patch.object(throttling, 'rate_for', return_value='2/minute'):
+            statuses = [
+                guard(self.factory.post('/api/token/', REMOTE_ADDR='203.0.113.7', HTTP_X_FORWARDED_FOR=f'198.51.100.{n}')).status_code
+                for n in range(3)
+            ]
+        self.assertEqual(statuses, [200, 200, 429])
+
+    def test_take_sweeps_expired_buckets(self):
+        store = throttling.LocalCounterStore()
+        store.SWEEP_EVERY = 2
+        store.take('throttle:login:a', 1, 1, 0)
+        store.take('throttle:login:b', 1, 1, 60)
+        self.assertEqual(list(store._values), ['throttle:login:b'])
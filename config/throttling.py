@@ -0,0 +1,314 @@
+import logging
+import math
+import threading
+import time
+from collections import Counter
+
+from django.conf import settings
+from django.http import JsonResponse
+from rest_framework.settings import api_settings
+from rest_framework.throttling import BaseThrottle
+
+logger = logging.getLogger(__name__)
+
+PERIODS = {'s': 1, 'm': 60, 'h': 3600, 'd': 86400}
+
+
+# "10/minute" -> (10, 60), igual que los rates de DRF
+def parse_rate(rate):
+    if rate is None:
+        return None, None
+    limit, period = rate.split('/')
+    return int(limit), PERIODS[period[0]]
+
+
+# Contadores en memoria del proceso: sirven para un solo proceso y como sustituto
+# local de Redis (misma interfaz que RedisCounterStore).
+class LocalCounterStore:
+    SWEEP_EVERY = 10000
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._values = {}
+        self._expires = {}
+        self._operations = 0
+
+    def _get(self, key, now):
+        if self._expires.get(key, math.inf) <= now:
+            self._values.pop(key, None)
+            self._expires.pop(key, None)
+        return self._values.get(key)
+
+    def _sweep(self, now):
+        for key in [key for key, expires in self._expires.items() if expires <= now]:
+            self._values.pop(key, None)
+            self._expires.pop(key, None)
+
+    # cada SWEEP_EVERY escrituras se borran las claves caducadas que nadie ha
+    # vuelto a leer
+    def _written(self, now):
+        self._operations += 1
+        if self._operations % self.SWEEP_EVERY == 0:
+            self._sweep(now)
+
+    def incr(self, key, ttl):
+        now = time.monotonic()
+        with self._lock:
+            value = (self._get(key, now) or 0) + 1
+            self._values[key] = value
+            self._expires.setdefault(key, now + ttl)
+            self._written(now)
+            return value
+
+    def get_many(self, keys):
+        now = time.monotonic()
+        with self._lock:
+            return [self._get(key, now) or 0 for key in keys]
+
+    # descuenta un token si hay; devuelve (permitido, segundos hasta el siguiente)
+    def take(self, key, capacity, refill_rate, ttl):
+        now = time.monotonic()
+        with self._lock:
+            tokens, updated = self._get(key, now) or (capacity, now)
+            tokens = min(capacity, tokens + (now - updated) * refill_rate)
+            allowed = tokens >= 1
+            if allowed:
+                tokens -= 1
+            self._values[key] = (tokens, now)
+            self._expires[key] = now + ttl
+            self._written(now)
+            return allowed, 0 if allowed else (1 - tokens) / refill_rate
+
+
+TAKE_SCRIPT = """
+local bucket = redis.call('HMGET', KEYS[1], 'tokens', 'updated')
+local capacity = tonumber(ARGV[1])
+local refill_rate = tonumber(ARGV[2])
+local now = tonumber(ARGV[4])
+local tokens = tonumber(bucket[1]) or capacity
+local updated = tonumber(bucket[2]) or now
+tokens = math.min(capacity, tokens + (now - updated) * refill_rate)
+local allowed = 0
+if tokens >= 1 then
+    tokens = tokens - 1
+    allowed = 1
+end
+redis.call('HSET', KEYS[1], 'tokens', tostring(tokens), 'updated', tostring(now))
+redis.call('EXPIRE', KEYS[1], ARGV[3])
+return {allowed, tostring(tokens)}
+"""
+
+
+# Contadores compartidos entre procesos y maquinas en Redis (o un servidor
+# compatible). El bucket se actualiza con un script Lua para que sea atomico.
+class RedisCounterStore:
+
+    def __init__(self, url):
+        import redis
+        self.client = redis.Redis.from_url(url)
+        self._take = self.client.register_script(TAKE_SCRIPT)
+
+    def incr(self, key, ttl):
+        pipeline = self.client.pipeline()
+        pipeline.incr(key)
+        pipeline.expire(key, ttl)
+        return pipeline.execute()[0]
+
+    def get_many(self, keys):
+        return [int(value or 0) for value in self.client.mget(keys)]
+
+    def take(self, key, capacity, refill_rate, ttl):
+        allowed, tokens = self._take(keys=[key], args=[capacity, refill_rate, math.ceil(ttl), time.time()])
+        tokens = float(tokens)
+        return bool(allowed), 0 if allowed else (1 - tokens) / refill_rate
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_store():
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                url = getattr(settings, 'THROTTLE_REDIS_URL', None)
+                _store = RedisCounterStore(url) if url else LocalCounterStore()
+    return _store
+
+
+# Token bucket: admite rafagas de hasta `limit` peticiones y se recarga a
+# limit/period por segundo.
+class TokenBucket:
+
+    def __init__(self, limit, period):
+        self.limit = limit
+        self.period = period
+
+    def allow(self, store, key):
+        return store.take(key, self.limit, self.limit / self.period, self.period)
+
+
+# Ventana deslizante aproximada con dos contadores: la ventana anterior pesa
+# segun cuanto de ella sigue dentro del periodo. Dos operaciones por peticion.
+class SlidingWindow:
+
+    def __init__(self, limit, period):
+        self.limit = limit
+        self.period = period
+
+    def allow(self, store, key):
+        now = time.time()
+        window, elapsed = divmod(now, self.period)
+        previous, current = store.get_many([f'{key}:{int(window) - 1}', f'{key}:{int(window)}'])
+        weight = 1 - elapsed / self.period
+        if previous * weight + current >= self.limit:
+            return False, self.period - elapsed
+        store.incr(f'{key}:{int(window)}', self.period * 2)
+        return True, 0
+
+
+ALGORITHMS = {
+    'bucket': TokenBucket,
+    'window': SlidingWindow,
+}
+
+
+class Metrics:
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.allowed = Counter()
+        self.rejected = Counter()
+
+    def record(self, scope, allowed):
+        with self._lock:
+            (self.allowed if allowed else self.rejected)[scope] += 1
+        if not allowed:
+            logger.info("Throttled request in scope %s", scope)
+
+    def stats(self):
+        with self._lock:
+            return {
+                'allowed': dict(self.allowed),
+                'rejected': dict(self.rejected),
+            }
+
+
+metrics = Metrics()
+
+
+# IP del cliente para los limites por IP. X-Forwarded-For lo puede escribir
+# cualquiera: solo cuenta si hay proxies declarados, con NUM_PROXIES (en
+# REST_FRAMEWORK) o con TRUSTED_PROXIES (sus direcciones). Sin ninguno de los
+# dos se usa REMOTE_ADDR.
+def client_ident(request):
+    if api_settings.NUM_PROXIES is not None:
+        return BaseThrottle().get_ident(request)
+    remote_addr = request.META.get('REMOTE_ADDR', '')
+    forwarded = request.META.get('HTTP_X_FORWARDED_FOR')
+    trusted = getattr(settings, 'TRUSTED_PROXIES', ())
+    if not forwarded or remote_addr not in trusted:
+        return remote_addr
+    # la primera direccion, empezando por la derecha, que no es uno de los proxies
+    for address in reversed([address.strip() for address in forwarded.split(',')]):
+        if address and address not in trusted:
+            return address
+    return remote_addr
+
+
+def rate_for(scope):
+    return api_settings.DEFAULT_THROTTLE_RATES.get(scope)
+
+
+def check(scope, ident, algorithm='bucket'):
+    limit, period = parse_rate(rate_for(scope))
+    if limit is None:
+        return True, 0
+    allowed, wait = ALGORITHMS[algorithm](limit, period).allow(get_store(), f'throttle:{scope}:{ident}')
+    metrics.record(scope, allowed)
+    return allowed, wait
+
+
+class RateThrottle(BaseThrottle):
+    scope = None
+    algorithm = 'bucket'
+
+    def get_scope(self, request, view):
+        return self.scope
+
+    def get_ident_key(self, request, view):
+        return client_ident(request)
+
+    def allow_request(self, request, view):
+        scope = self.get_scope(request, view)
+        if scope is None:
+            return True
+        allowed, self._wait = check(scope, self.get_ident_key(request, view), self.algorithm)
+        return allowed
+
+    def wait(self):
+        return self._wait
+
+
+class AnonRateThrottle(RateThrottle):
+    scope = 'anon'
+
+    def get_scope(self, request, view):
+        return None if request.user.is_authenticated else self.scope
+
+
+class UserRateThrottle(RateThrottle):
+    scope = 'user'
+
+    def get_scope(self, request, view):
+        return self.scope if request.user.is_authenticated else None
+
+    def get_ident_key(self, request, view):
+        return request.user.pk
+
+
+# por endpoint: `throttle_scope` del ViewSet, o el de la accion si lo declara
+# en `throttle_scopes`; por usuario o por IP
+class EndpointRateThrottle(RateThrottle):
+    algorithm = 'window'
+
+    def get_scope(self, request, view):
+        scopes = getattr(view, 'throttle_scopes', {})
+        return scopes.get(getattr(view, 'action', None), getattr(view, 'throttle_scope', None))
+
+    def get_ident_key(self, request, view):
+        if request.user.is_authenticated:
+            return f'user:{request.user.pk}'
+        return client_ident(request)
+
+
+# Limites por IP que se comprueban antes de que DRF autentique: login,
+# registro y cualquier peticion con Basic auth cuestan un hash de contrasena
+# cada una, y ese trabajo ocurre antes de que corran los throttles de DRF.
+class PreAuthThrottleMiddleware:
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.paths = getattr(settings, 'PRE_AUTH_THROTTLES', {})
+
+    def scope_for(self, request):
+        if request.method == 'POST' and request.path in self.paths:
+            return self.paths[request.path]
+        if request.META.get('HTTP_AUTHORIZATION', '').lower().startswith('basic '):
+            return 'basic'
+        return None
+
+    def __call__(self, request):
+        scope = self.scope_for(request)
+        if scope is not None:
+            allowed, wait = check(scope, client_ident(request))
+            if not allowed:
+                response = JsonResponse(
+                    {'detail': f"Request was throttled. Expected available in {math.ceil(wait)} seconds."},
+                    status=429
+                )
+                response['Retry-After'] = str(math.ceil(wait))
+                return response
+        return self.get_response(request)
+
@@ -20,11 +20,19 @@ from rest_framework_simplejwt.views import (
     TokenObtainPairView,
     TokenRefreshView,
 )
+from config.batch import BatchView
+from config.views import ThrottleStatsView
 
 urlpatterns = [
     path('admin/', admin.site.urls),
     path('api/token/', TokenObtainPairView.as_view(), name='token_obtain_pair'),
     path('api/token/refresh/', TokenRefreshView.as_view(), name='token_refresh'),
+    path('api/throttling/stats/', ThrottleStatsView.as_view(), name='throttling_stats'),
+    path('batch/', BatchView.as_view(), name='batch'),
     path('', include('apps.accounts.urls')),
     path('', include('apps.job_applications.urls')),
+    path('', include('apps.analytics.urls')),
+    path('', include('apps.outbox.urls')),
+    path('', include('apps.webhooks.urls')),
+    path('', include('apps.realtime.urls')),
 ]
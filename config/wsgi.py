@@ -14,3 +14,8 @@ from django.core.wsgi import get_wsgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings')
 
 application = get_wsgi_application()
+
+# precarga el indice de autocompletado en segundo plano
+from apps.job_applications.autocomplete import index as technology_autocomplete  # noqa: E402
+
+technology_autocomplete.warm()